@@ -0,0 +1,77 @@
+"""
+Time backtest sweeps over rebalance frequencies and drift thresholds.
+
+Prices are a seeded random walk, so the reported best CAGR doubles as a
+check that results did not change between commits.
+
+    python benchmarks/bench_backtest.py --symbols 500 --years 10 --thresholds 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, "src"))
+)
+from portfolio_app.analysis import backtest  # noqa: E402
+
+SEED = 1234
+
+
+def random_prices(symbols: int, years: int) -> pd.DataFrame:
+    days = years * backtest.TRADING_DAYS
+    rng = np.random.default_rng(SEED)
+    returns = rng.normal(0.0003, 0.015, (days, symbols))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(returns, axis=0)),
+        index=pd.bdate_range("2000-01-03", periods=days),
+        columns=[f"SYM{i}" for i in range(symbols)],
+    )
+
+
+def run(symbols: int, years: int, thresholds: int, repeat: int) -> Dict:
+    prices = random_prices(symbols, years)
+    weights = dict(zip(prices.columns, np.linspace(1, 2, symbols)))
+    variants = [None, *np.linspace(0.001, 0.1, thresholds)]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = backtest.sweep(weights, prices, tuple(backtest.FREQUENCIES), variants)
+        timings.append(time.perf_counter() - start)
+    print(
+        f"{len(results)} variants, {symbols} symbols x {len(prices)} days: "
+        f"{statistics.median(timings):.2f} s"
+    )
+    return {
+        "symbols": symbols,
+        "days": len(prices),
+        "variants": len(results),
+        "median_s": statistics.median(timings),
+        "best_cagr": float(results["cagr"].max()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--thresholds", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args()
+    result = run(args.symbols, args.years, args.thresholds, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-call CPU cost and payload size of OpenAI allocation lookup requests.
+
+Compares building request arguments with a freshly generated schema (the
+old behaviour) against the precomputed function definitions, and the full
+schema against the slim one. Token counts are estimated at four characters
+per token.
+
+    python benchmarks/bench_openai_payload.py --output payload.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, "src"))
+)
+from portfolio_app.portfolio.models import SecurityAllocation  # noqa: E402
+from portfolio_app.provider.openai import (  # noqa: E402
+    LOOKUP_FUNCTION_NAME,
+    LOOKUP_PROMPT,
+    MODEL,
+    OpenAIClient,
+)
+
+CHARS_PER_TOKEN = 4
+
+
+def regenerated_args(symbol: str) -> Dict:
+    return {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": LOOKUP_PROMPT.format(symbol=symbol)}],
+        "functions": [
+            {
+                "name": LOOKUP_FUNCTION_NAME,
+                "parameters": SecurityAllocation.model_json_schema(),
+            }
+        ],
+        "function_call": {"name": LOOKUP_FUNCTION_NAME},
+    }
+
+
+def per_call_us(build: Callable[[str], Dict], number: int) -> float:
+    return timeit.timeit(lambda: build("SPY"), number=number) / number * 1e6
+
+
+def payload(args: Dict) -> Dict[str, int]:
+    size = len(json.dumps(args["functions"]))
+    return {"function_bytes": size, "approx_tokens": size // CHARS_PER_TOKEN}
+
+
+def run(number: int) -> Dict:
+    full = OpenAIClient(slim_schema=False)
+    slim = OpenAIClient(slim_schema=True)
+    return {
+        "args_us": {
+            "regenerated": round(per_call_us(regenerated_args, number), 2),
+            "precomputed": round(per_call_us(full._lookup_allocation_args, number), 2),
+        },
+        "single": {
+            "full": payload(full._lookup_allocation_args("SPY")),
+            "slim": payload(slim._lookup_allocation_args("SPY")),
+        },
+        "batch": {
+            "full": payload(full._lookup_allocations_args(["SPY"] * 10)),
+            "slim": payload(slim._lookup_allocations_args(["SPY"] * 10)),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args()
+    results = run(args.number)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
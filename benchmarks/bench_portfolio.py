@@ -0,0 +1,256 @@
+"""
+Benchmarks for portfolio load, exposure computation and rendering prep.
+
+Synthetic E*Trade exports are priced with MockPolygonClient and resolved
+with MockOpenAIClient, so no network access is needed. Results are written
+as JSON so runs from different commits can be compared:
+
+    python benchmarks/bench_portfolio.py --output before.json
+    python benchmarks/bench_portfolio.py --output after.json
+    python benchmarks/bench_portfolio.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, "src"))
+)
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from portfolio_app.charts import ChartManager  # noqa: E402
+from portfolio_app.datasource.etrade import ETradeCSVDataSource  # noqa: E402
+from portfolio_app.portfolio import portfolio as portfolio_module  # noqa: E402
+from portfolio_app.portfolio.cache import portfolio_cache  # noqa: E402
+from portfolio_app.portfolio.portfolio import Portfolio  # noqa: E402
+from portfolio_app.portfolio.snapshot import (  # noqa: E402
+    load_portfolio,
+    save_portfolio,
+)
+from portfolio_app.provider.openai import MockOpenAIClient  # noqa: E402
+from portfolio_app.provider.polygon import MockPolygonClient  # noqa: E402
+from portfolio_app.repository.allocation import (  # noqa: E402
+    AllocationCache,
+    AllocationLookupService,
+)
+
+DEFAULT_SIZES = [10, 1_000, 50_000]
+SAMPLE_CSV = os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir,
+    "resources",
+    "portfolio-etrade-sample.csv",
+)
+DIMENSION_METHODS = [
+    "get_fund_asset_df",
+    "get_market_cap_df",
+    "get_us_international_df",
+    "get_region_df",
+    "get_growth_value_df",
+    "get_economic_status_df",
+    "get_sector_df",
+]
+
+
+def synthetic_symbols(size: int) -> List[str]:
+    return [f"S{i:05d}" for i in range(size)]
+
+
+def synthetic_etrade_csv(symbols: List[str]) -> bytes:
+    """
+    An E*Trade export with the sample's summary block and footer around
+    `len(symbols)` generated positions.
+    """
+    with open(SAMPLE_CSV, "rb") as fh:
+        lines = fh.read().split(b"\n")
+    header = next(i for i, line in enumerate(lines) if line.startswith(b"Symbol,Last"))
+    footer = next(i for i, line in enumerate(lines) if line.startswith(b"CASH,"))
+    rng = np.random.default_rng(len(symbols))
+    quantities = rng.integers(1, 500, len(symbols))
+    prices = MockPolygonClient().last_prices(symbols)
+    positions = [
+        f"{symbol},{last_price:.2f},0,0,{quantity},{last_price * 0.9:.2f},0,0,0,"
+        f"{quantity * last_price:.2f}".encode()
+        for symbol, quantity, (_, last_price) in zip(
+            symbols, quantities, prices.values()
+        )
+    ]
+    return b"\n".join(lines[: header + 1] + positions + lines[footer:])
+
+
+def use_mock_allocation_service() -> None:
+    portfolio_module.allocation_service = AllocationLookupService(
+        allocation_client=MockOpenAIClient(),
+        cache=AllocationCache(disk_cache=None),
+    )
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int,
+    setup: Optional[Callable[[], None]] = None,
+) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+    }
+
+
+def run_size(size: int, repeat: int) -> List[Dict[str, object]]:
+    results = []
+
+    def record(name: str, fn, setup=None, times: int = repeat) -> None:
+        result = {"name": name, "holdings": size, **measure(fn, times, setup)}
+        results.append(result)
+        print(
+            f"{size:>7} {name:<32} {result['median_s'] * 1000:10.2f} ms",
+            file=sys.stderr,
+        )
+
+    use_mock_allocation_service()
+    csv_bytes = synthetic_etrade_csv(synthetic_symbols(size))
+    record(
+        "etrade.get_portfolio",
+        lambda: ETradeCSVDataSource(BytesIO(csv_bytes)).get_portfolio(),
+    )
+
+    portfolio: Portfolio = ETradeCSVDataSource(BytesIO(csv_bytes)).get_portfolio()
+
+    def cold_fetch() -> None:
+        use_mock_allocation_service()
+        portfolio.security_allocation_data.clear()
+        portfolio._data_complete = False
+        portfolio_cache.clear()
+
+    # allocation lookups go through the mock provider on every repeat
+    record("portfolio.allocation_df", portfolio.allocation_df, setup=cold_fetch)
+
+    def cold() -> None:
+        portfolio_cache.clear()
+        portfolio._invalidate()
+
+    record("portfolio.df", portfolio.df, setup=cold)
+    record("portfolio.df (cached)", portfolio.df)
+    for method in DIMENSION_METHODS:
+        record(f"portfolio.{method}", getattr(portfolio, method), setup=cold)
+    record("portfolio.get_total_expense_ratio", portfolio.get_total_expense_ratio, cold)
+    record("portfolio.total_value", portfolio.total_value)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "portfolio.arrow")
+        record(
+            "snapshot.save_portfolio",
+            lambda: save_portfolio(portfolio, snapshot_path),
+        )
+        record("snapshot.load_portfolio", lambda: load_portfolio(snapshot_path))
+
+        def load_and_render() -> None:
+            loaded = load_portfolio(snapshot_path)
+            for method in DIMENSION_METHODS:
+                getattr(loaded, method)()
+
+        record(
+            "snapshot.load_portfolio + frames",
+            load_and_render,
+            setup=portfolio_cache.clear,
+        )
+
+    frames = [getattr(portfolio, method)() for method in DIMENSION_METHODS]
+    record(
+        "ChartManager.get_pie_chart",
+        lambda: [ChartManager.get_pie_chart(frame).to_dict() for frame in frames],
+    )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, object]:
+    results = []
+    for size in sizes:
+        results.extend(run_size(size, repeat))
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as fh:
+        before = json.load(fh)
+    with open(after_path) as fh:
+        after = json.load(fh)
+    baseline = {(r["name"], r["holdings"]): r["median_s"] for r in before["results"]}
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    for result in after["results"]:
+        key = (result["name"], result["holdings"])
+        if key not in baseline:
+            continue
+        ratio = result["median_s"] / baseline[key] if baseline[key] else float("nan")
+        print(
+            f"{result['holdings']:>7} {result['name']:<32} "
+            f"{baseline[key] * 1000:10.2f} ms {result['median_s'] * 1000:10.2f} ms "
+            f"{ratio:6.2f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two runs"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    report = run(args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Time Monte Carlo retirement projections for a range of path counts.
+
+Every run uses the same seed, so the reported median at retirement doubles
+as a check that results did not change between commits.
+
+    python benchmarks/bench_projection.py --paths 100000 1000000 --processes 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, "src"))
+)
+from portfolio_app.analysis import projection  # noqa: E402
+
+WEIGHTS = (0.6, 0.3, 0.05, 0.05)
+SEED = 1234
+
+
+def run(
+    paths_list: List[int], repeat: int, years: int, processes: Optional[int]
+) -> List[Dict]:
+    results = []
+    for paths in paths_list:
+        for workers in dict.fromkeys([None, processes]):
+            timings = []
+            for _ in range(repeat):
+                projection._project.cache_clear()
+                start = time.perf_counter()
+                result = projection.project(
+                    WEIGHTS,
+                    100_000,
+                    65 - years,
+                    65,
+                    paths=paths,
+                    seed=SEED,
+                    processes=workers,
+                )
+                timings.append(time.perf_counter() - start)
+            results.append(
+                {
+                    "paths": paths,
+                    "processes": workers,
+                    "median_s": statistics.median(timings),
+                    "median_at_retirement": result.at_retirement()[50],
+                }
+            )
+            print(
+                f"{paths:>9} paths  processes={workers or '-':<3}"
+                f"{statistics.median(timings) * 1000:10.1f} ms"
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--paths", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--years", type=int, default=35)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--processes", type=int, help="also time a process pool")
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args()
+    results = run(args.paths, args.repeat, args.years, args.processes)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Historical performance of fixed target weights under a rebalancing rule.
+
+Between rebalances each holding simply follows its price, so the value on
+day t of a portfolio last rebalanced on day r is
+
+    V(t) = V(r) * sum_i w_i * P_i(t) / P_i(r)
+
+for the target weights w. Given the rebalance days, every day's growth since
+its rebalance is one row-wise product of the price matrix with w / P(r),
+and the value on each rebalance day is a cumulative product of the growth
+over the rebalances before it.
+
+Calendar rules ("monthly", ...) rebalance on the first trading day of each
+period. A drift threshold rebalances once any weight is more than
+`threshold` away from its target, checked daily or, together with a
+frequency, only on that frequency's days. Which day crosses the threshold
+depends on the previous rebalance, so the search steps from one rebalance
+to the next, testing blocks of candidate days at a time rather than single
+days.
+"""
+
+import itertools
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from portfolio_app.portfolio.portfolio import Portfolio
+
+# numpy calendar unit of each rebalance frequency; quarters are 3 months and
+# weeks start on Monday
+FREQUENCIES: Dict[str, Optional[str]] = {
+    "never": None,
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "quarterly": "Q",
+    "annually": "Y",
+}
+TRADING_DAYS = 252
+# first number of candidate days tested at once for a threshold crossing
+_SEARCH_BLOCK = 32
+
+
+class BacktestResult:
+    """Daily value of a backtested portfolio and its summary statistics."""
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        values: np.ndarray,
+        rebalance_rows: np.ndarray,
+        missing: Sequence[str] = (),
+    ):
+        self.dates = dates
+        self.values = values
+        # rows of `dates` whose close the portfolio was rebalanced at
+        self.rebalance_rows = rebalance_rows
+        # weighted symbols left out for lack of price history
+        self.missing = list(missing)
+
+    @property
+    def drawdown(self) -> np.ndarray:
+        """Fraction below the running peak value, <= 0."""
+        return self.values / np.maximum.accumulate(self.values) - 1
+
+    def max_drawdown(self) -> float:
+        return float(self.drawdown.min()) if len(self.values) else 0.0
+
+    def cagr(self) -> float:
+        """Compound annual growth rate over the calendar span of `dates`."""
+        if len(self.values) < 2:
+            return 0.0
+        years = (self.dates[-1] - self.dates[0]) / np.timedelta64(1, "D") / 365.25
+        return float((self.values[-1] / self.values[0]) ** (1 / years) - 1)
+
+    def volatility(self) -> float:
+        """Annualized standard deviation of daily log returns."""
+        if len(self.values) < 3:
+            return 0.0
+        return float(np.diff(np.log(self.values)).std(ddof=1) * np.sqrt(TRADING_DAYS))
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "final_value": float(self.values[-1]) if len(self.values) else 0.0,
+            "cagr": self.cagr(),
+            "max_drawdown": self.max_drawdown(),
+            "volatility": self.volatility(),
+            "rebalances": len(self.rebalance_rows) - 1,
+        }
+
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"Value": self.values, "Drawdown": self.drawdown},
+            index=pd.DatetimeIndex(self.dates, name="Date"),
+        )
+
+
+def holdings_weights(portfolio: Portfolio) -> Dict[str, float]:
+    """Market value weights of the portfolio's holdings."""
+    values = np.nan_to_num(portfolio.holdings.market_values())
+    total = values[values > 0].sum()
+    return {
+        symbol: value / total
+        for symbol, value in zip(portfolio.holdings.symbols, values.tolist())
+        if value > 0
+    }
+
+
+def prepare(
+    weights: Mapping[str, float], prices: pd.DataFrame
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str], List[str]]:
+    """
+    Dates, dates x symbols prices and normalized weights for the weighted
+    symbols that have prices, plus the symbols and the weighted symbols
+    without any price. Days no symbol traded (holidays) are dropped, gaps are
+    carried forward and the history starts once every symbol has a price.
+    """
+    priced = set(prices.columns[prices.notna().any()])
+    symbols = [s for s, w in weights.items() if w > 0 and s in priced]
+    missing = [s for s, w in weights.items() if w > 0 and s not in priced]
+    frame = prices[symbols].dropna(how="all").ffill().dropna()
+    w = np.array([weights[symbol] for symbol in symbols], dtype=np.float64)
+    if w.sum() > 0:
+        w /= w.sum()
+    return (
+        frame.index.to_numpy().astype("datetime64[D]"),
+        np.ascontiguousarray(frame.to_numpy(dtype=np.float64)),
+        w,
+        symbols,
+        missing,
+    )
+
+
+def period_starts(dates: np.ndarray, frequency: str) -> np.ndarray:
+    """Rows that open a new `frequency` period, row 0 excluded."""
+    unit = FREQUENCIES[frequency]
+    if unit is None or len(dates) < 2:
+        return np.zeros(0, dtype=np.intp)
+    if unit == "D":
+        return np.arange(1, len(dates))
+    if unit == "W":
+        # datetime64[W] counts weeks from 1970-01-01, a Thursday
+        periods = (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    elif unit == "Q":
+        periods = dates.astype("datetime64[M]").astype(np.int64) // 3
+    else:
+        periods = dates.astype(f"datetime64[{unit}]").astype(np.int64)
+    return np.flatnonzero(periods[1:] != periods[:-1]) + 1
+
+
+def _threshold_rows(
+    prices: np.ndarray, weights: np.ndarray, candidates: np.ndarray, threshold: float
+) -> np.ndarray:
+    """
+    Rebalance rows when, among `candidates`, the first day whose drifted
+    weights are more than `threshold` from `weights` triggers a rebalance.
+    """
+    rows = [0]
+    position = 0  # candidates before this index are at or before rows[-1]
+    block = _SEARCH_BLOCK
+    while position < len(candidates):
+        window = candidates[position : position + block]
+        held = prices[window] * (weights / prices[rows[-1]])
+        drift = np.abs(held / held.sum(axis=1, keepdims=True) - weights).max(axis=1)
+        crossed = np.flatnonzero(drift > threshold)
+        if len(crossed):
+            rows.append(int(window[crossed[0]]))
+            position += int(crossed[0]) + 1
+            block = _SEARCH_BLOCK
+        else:
+            position += len(window)
+            block *= 2
+    return np.array(rows, dtype=np.intp)
+
+
+def rebalance_rows(
+    dates: np.ndarray,
+    prices: np.ndarray,
+    weights: np.ndarray,
+    frequency: str = "never",
+    threshold: Optional[float] = None,
+) -> np.ndarray:
+    """Row 0 followed by every row the rule rebalances at."""
+    if threshold is None:
+        return np.concatenate([[0], period_starts(dates, frequency)]).astype(np.intp)
+    candidates = (
+        np.arange(1, len(dates))
+        if frequency == "never"
+        else period_starts(dates, frequency)
+    )
+    return _threshold_rows(prices, weights, candidates, threshold)
+
+
+def portfolio_values(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    rows: np.ndarray,
+    initial_value: float = 1.0,
+) -> np.ndarray:
+    """Daily value when rebalancing to `weights` at the close of `rows`."""
+    if not len(prices):
+        return np.zeros(0)
+    days = np.arange(len(prices))
+    # the rebalance each day's holdings were bought at: the last one before it
+    last = np.maximum(np.searchsorted(rows, days, side="left") - 1, 0)
+    # sum_i P_i(t) * (w_i / P_i(r)) per day, without a dates x symbols product
+    growth = np.einsum("ij,ij->i", prices, (weights / prices[rows])[last])
+    growth[0] = 1.0
+    rebalance_values = initial_value * np.cumprod(growth[rows])
+    return rebalance_values[last] * growth
+
+
+def backtest(
+    weights: Mapping[str, float],
+    prices: pd.DataFrame,
+    frequency: str = "never",
+    threshold: Optional[float] = None,
+    initial_value: float = 1.0,
+) -> BacktestResult:
+    """
+    Backtest `weights` (any positive scale) over a dates x symbols price
+    frame such as `PriceStore.frame`. `frequency` is one of FREQUENCIES;
+    `threshold` is the largest drift of any weight, as a fraction, that is
+    left alone.
+    """
+    dates, matrix, w, _, missing = prepare(weights, prices)
+    rows = rebalance_rows(dates, matrix, w, frequency, threshold)
+    return BacktestResult(
+        dates, portfolio_values(matrix, w, rows, initial_value), rows, missing
+    )
+
+
+def sweep(
+    weights: Mapping[str, float],
+    prices: pd.DataFrame,
+    frequencies: Sequence[str] = tuple(FREQUENCIES),
+    thresholds: Sequence[Optional[float]] = (None,),
+) -> pd.DataFrame:
+    """
+    Summary statistics for every frequency x threshold combination, one
+    row each. Prices are prepared once and shared by all variants.
+    """
+    dates, matrix, w, _, _ = prepare(weights, prices)
+    records = []
+    for frequency, threshold in itertools.product(frequencies, thresholds):
+        rows = rebalance_rows(dates, matrix, w, frequency, threshold)
+        result = BacktestResult(dates, portfolio_values(matrix, w, rows), rows)
+        records.append(
+            {"frequency": frequency, "threshold": threshold, **result.summary()}
+        )
+    return pd.DataFrame(records)
@@ -0,0 +1,114 @@
+"""
+What a portfolio owns once its funds are replaced by their constituents.
+
+With H the holdings x stocks matrix of what a dollar of each holding owns
+(ConstituentIndex.exposure_matrix) and v the holdings' market values, the
+dollars in each stock are H^T v: one sparse matrix-vector product however
+many names the funds hold. Holding SPY, VTI and QQQ shows up as a large
+stake in the same few mega caps.
+
+Overlap between two funds a and b is the weight they have in common,
+sum_i min(a_i, b_i). The pairs of funds that share any name come from the
+sparse product B B^T of the 0/1 holdings pattern; the minimum is then
+taken only for those pairs, over their stored weights.
+"""
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from portfolio_app.portfolio.portfolio import Portfolio
+from portfolio_app.repository.constituents import ConstituentIndex
+
+
+class LookThrough:
+    """Dollar exposure to every underlying stock of a set of holdings."""
+
+    def __init__(
+        self,
+        symbols: List[str],
+        values: np.ndarray,
+        exposures: sparse.csr_matrix,
+        stocks: List[str],
+    ):
+        self.symbols = symbols
+        self.values = values
+        # holdings x stocks fractions of each holding's value
+        self.exposures = exposures
+        self.stocks = stocks
+        self.stock_values = exposures.T @ values
+
+    @property
+    def total_value(self) -> float:
+        return float(self.values.sum())
+
+    def stock_weights(self) -> np.ndarray:
+        """Fraction of the total value in each stock."""
+        total = self.total_value
+        return self.stock_values / total if total > 0 else 0 * self.stock_values
+
+    def herfindahl(self) -> float:
+        """Sum of squared stock weights; 1 is a single stock."""
+        return float(np.square(self.stock_weights()).sum())
+
+    def effective_names(self) -> float:
+        """Number of equally weighted stocks with the same concentration."""
+        herfindahl = self.herfindahl()
+        return 1 / herfindahl if herfindahl > 0 else 0.0
+
+    def concentration_df(self, top: int = 25) -> pd.DataFrame:
+        """
+        The `top` largest underlying stakes: value, percent of the portfolio
+        and how many holdings contribute to each.
+        """
+        holders = (self.exposures != 0).T @ (self.values > 0).astype(np.int64)
+        largest = np.argsort(-self.stock_values, kind="stable")[:top]
+        return pd.DataFrame(
+            {
+                "symbol": [self.stocks[i] for i in largest],
+                "value": self.stock_values[largest].round(2),
+                "percent": (self.stock_weights()[largest] * 100).round(2),
+                "holdings": holders[largest],
+            }
+        )
+
+    def overlap_df(self) -> pd.DataFrame:
+        """Pairwise overlap of the holdings, in percent of weight shared."""
+        overlap = fund_overlap(self.exposures)
+        return pd.DataFrame(
+            (overlap.toarray() * 100).round(2), index=self.symbols, columns=self.symbols
+        )
+
+
+def fund_overlap(weights: sparse.csr_matrix) -> sparse.csr_matrix:
+    """
+    Symmetric funds x funds matrix of sum_i min(a_i, b_i), with each fund's
+    own total weight on the diagonal. Only pairs sharing a name are stored.
+    """
+    weights = sparse.csr_matrix(weights)
+    pattern = weights.copy()
+    pattern.data = np.ones_like(pattern.data)
+    shared = sparse.triu(pattern @ pattern.T, k=1).tocoo()
+    left, right = shared.row, shared.col
+    common = np.asarray(
+        weights[left].minimum(weights[right]).sum(axis=1), dtype=np.float64
+    ).ravel()
+    size = weights.shape[0]
+    upper = sparse.coo_matrix((common, (left, right)), shape=(size, size))
+    diagonal = sparse.diags(np.asarray(weights.sum(axis=1)).ravel())
+    return (upper + upper.T + diagonal).tocsr()
+
+
+def look_through(portfolio: Portfolio, index: ConstituentIndex) -> LookThrough:
+    """Look through the portfolio's holdings with positive market value."""
+    values = np.nan_to_num(portfolio.holdings.market_values())
+    held = values > 0
+    symbols = [
+        symbol
+        for symbol, is_held in zip(portfolio.holdings.symbols, held.tolist())
+        if is_held
+    ]
+    exposures, stocks = index.exposure_matrix(symbols)
+    return LookThrough(symbols, values[held], exposures, stocks)
@@ -0,0 +1,216 @@
+"""
+Trades that move a portfolio towards target allocations.
+
+Targets are BaseAllocationModel instances, e.g. `FundAssetAllocation(
+stocks=60, bonds=40)` and `RegionAllocation(north_america=70, emea=30)`,
+any number of dimensions at once. Each holding's exposure vector is its row
+of the portfolio's allocation matrix, so the portfolio's exposure after a
+rebalance is linear in the new holding values. Writing the new values as
+fractions `y` of the money being invested, the engine solves one linear
+program over all holdings
+
+    minimize  sum |E y - t| + turnover_penalty * sum |y - y0| / 2
+    subject to y >= 0, sum(y) = 1
+
+where E holds the targeted allocation columns for every tradable holding,
+t the target percentages and y0 the current fractions. Absolute deviations
+keep the plan to the few trades that actually move the exposure.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from portfolio_app.portfolio.exposure import column_indexes
+from portfolio_app.portfolio.models import BaseAllocationModel
+from portfolio_app.portfolio.portfolio import Portfolio
+
+# cost of one unit of turnover relative to one unit of exposure gap; value
+# is moved only if it closes more than this much gap per unit moved
+TURNOVER_PENALTY = 0.5
+
+
+def target_keys_values(
+    targets: Sequence[BaseAllocationModel],
+) -> Tuple[List[str], np.ndarray]:
+    """Allocation columns and target percentages for every target dimension."""
+    keys, values = [], []
+    for target in targets:
+        keys.extend(target.keys_labels()[0])
+        values.extend(getattr(target, field) for field in target.model_fields)
+    return keys, np.array(values, dtype=np.float64)
+
+
+def solve_weights(
+    exposures: np.ndarray,
+    targets: np.ndarray,
+    current: np.ndarray,
+    turnover_penalty: float = TURNOVER_PENALTY,
+) -> np.ndarray:
+    """
+    Minimize sum|exposures @ y - targets| + turnover_penalty * turnover over
+    {y >= 0, sum(y) = 1}, turnover being sum|y - current| / 2. `exposures`
+    is keys x holdings, everything in fractions.
+
+    Variables are [y, buys, sells, over, under] with y = current + buys -
+    sells and exposures @ y = targets + over - under, all non-negative.
+    """
+    keys, holdings = exposures.shape
+    if not holdings:
+        return np.zeros(0)
+    identity_n = sparse.identity(holdings, format="csr")
+    identity_k = sparse.identity(keys, format="csr")
+    a_eq = sparse.bmat(
+        [
+            [exposures, None, None, -identity_k, identity_k],
+            [identity_n, -identity_n, identity_n, None, None],
+            [np.ones((1, holdings)), None, None, None, None],
+        ],
+        format="csr",
+    )
+    b_eq = np.concatenate([targets, current, [1.0]])
+    cost = np.concatenate(
+        [
+            np.zeros(holdings),
+            np.full(2 * holdings, turnover_penalty / 2),
+            np.ones(2 * keys),
+        ]
+    )
+    result = linprog(cost, A_eq=a_eq, b_eq=b_eq, bounds=(0, None), method="highs")
+    if result.status != 0:
+        raise ValueError(f"Rebalance failed: {result.message}")
+    return np.maximum(result.x[:holdings], 0)
+
+
+class RebalancePlan:
+    """New value of every holding and the trades that get there."""
+
+    def __init__(
+        self,
+        symbols: List[str],
+        last_prices: np.ndarray,
+        current_values: np.ndarray,
+        target_values: np.ndarray,
+        keys: List[str],
+        targets: np.ndarray,
+        current_exposure: np.ndarray,
+        target_exposure: np.ndarray,
+    ):
+        self.symbols = symbols
+        self.last_prices = last_prices
+        self.current_values = current_values
+        self.target_values = target_values
+        self.keys = keys
+        self.targets = targets
+        self.current_exposure = current_exposure
+        self.target_exposure = target_exposure
+
+    @property
+    def trade_values(self) -> np.ndarray:
+        return self.target_values - self.current_values
+
+    @property
+    def trade_quantities(self) -> np.ndarray:
+        return self.trade_values / self.last_prices
+
+    def tracking_error(self) -> float:
+        """Mean absolute gap to the targets after trading, in % points."""
+        return float(np.mean(np.abs(self.target_exposure - self.targets)))
+
+    def turnover(self) -> float:
+        """Value sold, as a fraction of the value invested afterwards."""
+        sold = -self.trade_values[self.trade_values < 0].sum()
+        invested = self.target_values.sum()
+        return float(sold / invested) if invested > 0 else 0.0
+
+    def trades_df(self) -> pd.DataFrame:
+        trades = self.trade_values
+        return pd.DataFrame(
+            {
+                "symbol": self.symbols,
+                "action": np.where(
+                    np.abs(trades) < 0.005, "Hold", np.where(trades > 0, "Buy", "Sell")
+                ),
+                "quantity": np.abs(self.trade_quantities).round(4),
+                "trade_value": trades.round(2),
+                "current_value": self.current_values.round(2),
+                "target_value": self.target_values.round(2),
+            }
+        )
+
+    def exposure_df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Target": self.targets,
+                "Current": self.current_exposure.round(2),
+                "After Rebalance": self.target_exposure.round(2),
+            },
+            index=self.keys,
+        )
+
+
+def rebalance(
+    portfolio: Portfolio,
+    targets: Sequence[BaseAllocationModel],
+    turnover_penalty: float = TURNOVER_PENALTY,
+    invest_cash: bool = True,
+) -> RebalancePlan:
+    """
+    Plan trades bringing `portfolio` closest to `targets`. Holdings with a
+    price and allocation data are traded; anything else is left as is. Those
+    without allocation data still count towards the total but add nothing to
+    any targeted key, and those without a price are valued at 0, so neither
+    contributes exposure. With `invest_cash` the account's cash is invested
+    too.
+    """
+    keys, target_pcts = target_keys_values(targets)
+    portfolio.fetch_security_data()
+    holdings = portfolio.holdings
+    allocations = portfolio.security_allocation_data
+
+    rows = allocations.rows(holdings.symbols)
+    values = holdings.market_values()
+    last_prices = holdings.column("last_price")
+    tradable = (rows >= 0) & (np.nan_to_num(last_prices) > 0)
+    # targeted allocation percentages, keys x tradable holdings
+    exposures = allocations.matrix[rows[tradable]][:, column_indexes(keys)].T
+    exposures = exposures.astype(np.float64)
+
+    current_values = values[tradable]
+    fixed_value = values[~tradable].sum()
+    budget = current_values.sum() + (portfolio.cash if invest_cash else 0.0)
+    invested = budget + fixed_value
+    if budget > 0:
+        # exposure fractions of everything invested once the trades are done
+        weights = solve_weights(
+            exposures * (budget / invested / 100),
+            target_pcts / 100,
+            current_values / budget,
+            turnover_penalty=turnover_penalty,
+        )
+    else:
+        weights = np.zeros(len(current_values))
+    target_values = weights * budget
+
+    def exposure_pct(holding_values: np.ndarray, total: float) -> np.ndarray:
+        return exposures @ holding_values / total if total > 0 else 0 * target_pcts
+
+    return RebalancePlan(
+        symbols=[
+            symbol
+            for symbol, is_tradable in zip(holdings.symbols, tradable.tolist())
+            if is_tradable
+        ],
+        last_prices=last_prices[tradable],
+        current_values=current_values,
+        target_values=target_values,
+        keys=keys,
+        targets=target_pcts,
+        current_exposure=exposure_pct(
+            current_values, current_values.sum() + fixed_value
+        ),
+        target_exposure=exposure_pct(target_values, invested),
+    )
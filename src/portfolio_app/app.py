@@ -1,11 +1,26 @@
 import os
 import sys
+import time
+from typing import Union
 from pandas import DataFrame
 import streamlit as st
 
 sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
 )
+from portfolio_app.analysis.backtest import (  # noqa: E402
+    FREQUENCIES,
+    backtest,
+    holdings_weights,
+)
+from portfolio_app.analysis.lookthrough import look_through  # noqa: E402
+from portfolio_app.analysis.projection import (  # noqa: E402
+    asset_class_weights,
+    project,
+    risk_profile_allocation,
+    risk_profile_weights,
+)
+from portfolio_app.analysis.rebalance import RebalancePlan, rebalance  # noqa: E402
 from portfolio_app.charts import ChartManager  # noqa: E402
 from portfolio_app.provider.openai import OpenAIClient  # noqa: E402
 from portfolio_app.datasource.base import DataSource  # noqa: E402
@@ -14,7 +29,16 @@ from portfolio_app.datasource.factory import (  # noqa: E402
     data_source_options,
     data_source_display_name,
 )  # noqa: E402
+from portfolio_app.portfolio.exposure import DimensionFramesMixin  # noqa: E402
+from portfolio_app.portfolio.household import Household  # noqa: E402
+from portfolio_app.portfolio.models import SecurityAllocation  # noqa: E402
 from portfolio_app.portfolio.portfolio import Portfolio, PortfolioType  # noqa: E402
+from portfolio_app.portfolio.snapshot import (  # noqa: E402
+    SNAPSHOT_EXTENSION,
+    snapshot_bytes,
+)
+from portfolio_app.repository.constituents import ConstituentIndex  # noqa: E402
+from portfolio_app.repository.prices import PriceStore  # noqa: E402
 
 
 def setup_portfolio(
@@ -27,6 +51,28 @@ def setup_portfolio(
         return portfolio
 
 
+def setup_household(
+    portfolio_type: PortfolioType, source: str, input_files
+) -> Household:
+    """
+    Keep one household per session and only add or remove the accounts whose
+    uploads changed since the last run.
+    """
+    household: Household = st.session_state.setdefault("household", Household())
+    uploads = {f"{f.name}:{f.size}": f for f in input_files}
+    for key in list(household.accounts):
+        if key not in uploads:
+            household.remove_portfolio(key)
+    for key, input_file in uploads.items():
+        if key not in household.accounts:
+            portfolio = setup_portfolio(portfolio_type, source, input_file)
+            if not portfolio:
+                continue
+            household.add_portfolio(portfolio, key=key)
+        household.accounts[key].set_portfolio_type(portfolio_type)
+    return household
+
+
 def render_sidebar():
     st.sidebar.title("Configure")
     openai_api_key = st.sidebar.text_input("OpenAI API Key", type="password")
@@ -36,57 +82,204 @@ def render_sidebar():
         st.sidebar.success("OpenAI API Key is valid")
 
     st.sidebar.title("Personalize")
-    st.sidebar.number_input("Age", min_value=0, max_value=100, value=30)
-    st.sidebar.number_input("Retirement Age", min_value=0, max_value=100, value=65)
+    st.sidebar.number_input("Age", min_value=0, max_value=100, value=30, key="age")
+    st.sidebar.number_input(
+        "Retirement Age", min_value=0, max_value=100, value=65, key="retirement_age"
+    )
     st.sidebar.select_slider(
         "Risk Tolerance",
         options=["Very Low", "Low", "Medium", "High", "Very High"],
         value="Medium",
+        key="risk_tolerance",
     )
+    st.sidebar.checkbox(
+        "Show charts as data arrives", value=True, key="progressive_render"
+    )
+
+
+DIMENSIONS = [
+    ("Asset Allocation", "get_fund_asset_df"),
+    ("US / International", "get_us_international_df"),
+    ("Economic Status", "get_economic_status_df"),
+    ("Growth / Value", "get_growth_value_df"),
+    ("Market Cap", "get_market_cap_df"),
+    ("Sector", "get_sector_df"),
+]
+# minimum seconds between chart redraws while lookups are streaming in
+PROGRESSIVE_RENDER_INTERVAL = 0.5
+# fixed so moving a slider only changes the projection through its inputs
+PROJECTION_SEED = 42
+
+
+def render_dimension(placeholder, title: str, df: DataFrame):
+    with placeholder.container():
+        st.write(title)
+        st.bar_chart(df, y="Total Value")
+        st.altair_chart(ChartManager.get_pie_chart(df), use_container_width=True)
+        st.write(df)
+
+
+def render_dimensions(placeholders, source: DimensionFramesMixin):
+    for (title, method), placeholder in zip(DIMENSIONS, placeholders):
+        render_dimension(placeholder, title, getattr(source, method)())
+
+
+def render_summary(placeholder, portfolio: Union[Portfolio, Household]):
+    with placeholder.container():
+        st.write(f"Total Expense Ratio: {portfolio.get_total_expense_ratio()}")
+        st.write(f"Total Portfolio Value: {portfolio.total_value()}")
 
 
-def render_data(portfolio: Portfolio):
+def render_projection(portfolio: Union[Portfolio, Household]):
+    """
+    Value bands at retirement for the current asset mix, next to the model
+    mix for the chosen risk tolerance.
+    """
+    age = st.session_state.get("age", 30)
+    retirement_age = st.session_state.get("retirement_age", 65)
+    risk_tolerance = st.session_state.get("risk_tolerance", "Medium")
+    total_value = portfolio.total_value()
+    current = project(
+        asset_class_weights(portfolio, total_value),
+        total_value,
+        age,
+        retirement_age,
+        seed=PROJECTION_SEED,
+    )
+    target = project(
+        risk_profile_weights(risk_tolerance),
+        total_value,
+        age,
+        retirement_age,
+        seed=PROJECTION_SEED,
+    )
+    st.write(f"Projected value to age {retirement_age}, in today's dollars")
+    st.line_chart(current.df())
+    st.write(
+        DataFrame(
+            {
+                "Current allocation": current.at_retirement(),
+                f"{risk_tolerance} risk allocation": target.at_retirement(),
+            }
+        ).rename(index=lambda p: f"{p}th percentile")
+    )
+
+
+def render_data(portfolio: Union[Portfolio, Household]):
     st.write(portfolio.df())
     st.write(portfolio.allocation_df())
+    render_dimensions([st.empty() for _ in DIMENSIONS], portfolio)
+    render_summary(st.empty(), portfolio)
+    render_projection(portfolio)
+
+
+def render_rebalance(portfolio: Portfolio) -> RebalancePlan:
+    """Trades towards the asset mix for the chosen risk tolerance."""
+    risk_tolerance = st.session_state.get("risk_tolerance", "Medium")
+    plan = rebalance(portfolio, [risk_profile_allocation(risk_tolerance)])
+    st.write(f"Rebalance towards a {risk_tolerance} risk allocation")
+    st.write(plan.exposure_df())
+    trades = plan.trades_df()
+    st.write(trades[trades["action"] != "Hold"])
+    st.write(
+        f"Turnover: {plan.turnover():.1%}, "
+        f"remaining gap: {plan.tracking_error():.2f} percentage points"
+    )
+    return plan
+
 
-    st.write("Region Allocation")
-    us_intl_allocation: DataFrame = portfolio.get_us_international_df()
-    st.bar_chart(us_intl_allocation, y="Total Value")
-    st.altair_chart(
-        ChartManager.get_pie_chart(us_intl_allocation), use_container_width=True
+def render_backtest(portfolio: Portfolio, plan: RebalancePlan):
+    """
+    Past growth of $1 in the current holdings and in the rebalanced mix, from
+    the local price history. Skipped when no holding has any.
+    """
+    store = PriceStore.from_env()
+    if store is None:
+        return
+    current = holdings_weights(portfolio)
+    proposed = dict(zip(plan.symbols, plan.target_values.tolist()))
+    prices = store.frame(dict.fromkeys([*current, *proposed]))
+    if prices.dropna(how="all").empty:
+        return
+    frequency = st.selectbox(
+        "Backtest rebalancing", list(FREQUENCIES), index=4, key="backtest_frequency"
     )
-    st.write(us_intl_allocation)
+    results = {
+        "Current holdings": backtest(current, prices, frequency),
+        "After rebalance": backtest(proposed, prices, frequency),
+    }
+    st.write("Growth of $1 over the stored price history")
+    st.line_chart(
+        DataFrame({name: result.df()["Value"] for name, result in results.items()})
+    )
+    st.write(DataFrame({name: result.summary() for name, result in results.items()}))
+    missing = sorted({s for result in results.values() for s in result.missing})
+    if missing:
+        st.caption(f"No price history for {', '.join(missing)}")
 
-    # region_allocation: DataFrame = portfolio.get_region_df()
-    # st.bar_chart(region_allocation, y="Total Value")
-    # st.write(region_allocation)
 
-    economic_allocation: DataFrame = portfolio.get_economic_status_df()
-    st.bar_chart(economic_allocation, y="Total Value")
-    st.altair_chart(
-        ChartManager.get_pie_chart(economic_allocation), use_container_width=True
+def render_lookthrough(portfolio: Portfolio):
+    """
+    Largest underlying stock positions once funds are replaced by their
+    constituents, and how much the held funds overlap. Skipped without a
+    constituents file.
+    """
+    index = ConstituentIndex.from_env()
+    if index is None or not any(symbol in index for symbol in portfolio.holdings):
+        return
+    result = look_through(portfolio, index)
+    st.write("Largest underlying positions")
+    st.write(result.concentration_df(top=15))
+    st.write(
+        f"Concentration equals {result.effective_names():.0f} equally weighted stocks"
     )
-    st.write(economic_allocation)
+    funds = [i for i, symbol in enumerate(result.symbols) if symbol in index]
+    if len(funds) > 1:
+        st.write("Fund overlap (% of weight in common)")
+        st.write(result.overlap_df().iloc[funds, funds])
+
 
-    growth_value_df: DataFrame = portfolio.get_growth_value_df()
-    st.bar_chart(us_intl_allocation, y="Total Value")
-    st.altair_chart(
-        ChartManager.get_pie_chart(growth_value_df), use_container_width=True
+def render_snapshot_download(portfolio: Portfolio):
+    """Offer the resolved portfolio for reloading without any lookups."""
+    st.download_button(
+        "Save portfolio snapshot",
+        data=snapshot_bytes(portfolio),
+        file_name=f"{portfolio.account_name or 'portfolio'}.{SNAPSHOT_EXTENSION}",
+        mime="application/vnd.apache.arrow.file",
     )
-    st.write(growth_value_df)
 
-    market_cap_df: DataFrame = portfolio.get_market_cap_df()
-    st.bar_chart(market_cap_df, y="Total Value")
-    st.altair_chart(ChartManager.get_pie_chart(market_cap_df), use_container_width=True)
-    st.write(market_cap_df)
 
-    sector_df: DataFrame = portfolio.get_sector_df()
-    st.bar_chart(sector_df, y="Total Value")
-    st.altair_chart(ChartManager.get_pie_chart(sector_df), use_container_width=True)
-    st.write(sector_df)
+def render_progressive(portfolio: Portfolio):
+    """
+    Show the holdings straight away, then redraw the exposure charts from
+    the allocation data fetched so far as lookups complete.
+    """
+    st.write(portfolio.holdings_df())
+    progress = st.progress(0.0, text="Looking up security data...")
+    allocation_placeholder = st.empty()
+    placeholders = [st.empty() for _ in DIMENSIONS]
+    summary_placeholder = st.empty()
 
-    st.write(f"Total Expense Ratio: {portfolio.get_total_expense_ratio()}")
-    st.write(f"Total Portfolio Value: {portfolio.total_value()}")
+    total = max(len(portfolio.holdings), 1)
+    done = 0
+    last_render = 0.0
+
+    def on_result(symbol: str, allocation: SecurityAllocation):
+        nonlocal done, last_render
+        done += 1
+        progress.progress(
+            min(done / total, 1.0), text=f"Looked up {done} of {total} securities"
+        )
+        if time.monotonic() - last_render >= PROGRESSIVE_RENDER_INTERVAL:
+            render_dimensions(placeholders, portfolio.current_exposure())
+            last_render = time.monotonic()
+
+    portfolio.fetch_security_data(on_result=on_result)
+    progress.empty()
+    allocation_placeholder.write(portfolio.allocation_df())
+    render_dimensions(placeholders, portfolio)
+    render_summary(summary_placeholder, portfolio)
+    render_projection(portfolio)
 
 
 def render_page():
@@ -100,12 +293,31 @@ def render_page():
         data_source_options(),
         format_func=data_source_display_name,
     )
-    uploaded_file = st.file_uploader("Upload your portfolio", type="csv")
+    uploaded_files = st.file_uploader(
+        "Upload your portfolios",
+        type=["csv", SNAPSHOT_EXTENSION],
+        accept_multiple_files=True,
+    )
 
-    if uploaded_file is not None:
-        portfolio: Portfolio = setup_portfolio(portfolio_type, source, uploaded_file)
-        with st.spinner("File received. Looking up security data..."):
-            render_data(portfolio)
+    if len(uploaded_files or []) == 1:
+        portfolio: Portfolio = setup_portfolio(
+            portfolio_type, source, uploaded_files[0]
+        )
+        if portfolio and st.session_state.get("progressive_render", True):
+            render_progressive(portfolio)
+        elif portfolio:
+            with st.spinner("File received. Looking up security data..."):
+                render_data(portfolio)
+        if portfolio:
+            plan = render_rebalance(portfolio)
+            render_backtest(portfolio, plan)
+            render_lookthrough(portfolio)
+            render_snapshot_download(portfolio)
+    elif uploaded_files:
+        with st.spinner("Files received. Looking up security data..."):
+            household = setup_household(portfolio_type, source, uploaded_files)
+            st.write(f"Consolidated view of {len(household.accounts)} accounts")
+            render_data(household)
 
 
 if __name__ == "__main__":
@@ -1,57 +1,78 @@
 import csv
-from io import StringIO
+from io import BytesIO
+from typing import List, Optional
 import pandas as pd
-from portfolio_app.portfolio.portfolio import Portfolio, SecurityHolding
+from portfolio_app.portfolio.portfolio import Portfolio
 from portfolio_app.datasource.base import DataSource
 
 
 class ETradeCSVDataSource(DataSource):
+    SUMMARY_HEADER = "Account Summary"
+    POSITIONS_HEADER = b"Symbol,Last Price $"
+    ACCOUNT_VALUES_LINE = 2
+
     def __init__(self, csv_file):
         self.csv_file = csv_file
         self.temp_cash = 0.0
+        self._account_name: Optional[str] = None
+        self._positions: Optional[bytes] = None
 
     def validate(self) -> bool:
-        with StringIO(self.csv_file.getvalue().decode("utf-8")) as sio:
-            first_line = sio.readline()
-            return first_line.startswith("Account Summary")
-
-    def _handle_cash(self, bad_line: list[str]) -> None:
-        if bad_line[0] == "CASH":
-            self.temp_cash = float(next(s for s in bad_line[1:] if s))
-        return None
-
-    def get_data_df(self):
-        return pd.read_csv(
-            self.csv_file,
-            skiprows=10,
-            skipfooter=4,
-            engine="python",
-            on_bad_lines=self._handle_cash,
-        )
+        self.csv_file.seek(0)
+        first_line = self.csv_file.readline().decode("utf-8")
+        self.csv_file.seek(0)
+        return first_line.startswith(self.SUMMARY_HEADER)
+
+    def _handle_cash(self, row: List[str]) -> None:
+        self.temp_cash = float(next(s for s in row[1:] if s))
+
+    def _scan(self) -> None:
+        """
+        Single pass over the export: pick up the account name from the
+        summary block, slice out the positions table and read the CASH row,
+        then stop before the footer.
+        """
+        self.csv_file.seek(0)
+        positions: List[bytes] = []
+        in_positions = False
+        for line_number, line in enumerate(self.csv_file):
+            if line_number == self.ACCOUNT_VALUES_LINE:
+                self._account_name = next(csv.reader([line.decode("utf-8")]))[0]
+            elif not in_positions:
+                in_positions = line.startswith(self.POSITIONS_HEADER)
+                if in_positions:
+                    positions.append(line)
+            elif not line.strip():
+                break
+            elif line.startswith(b"CASH,"):
+                self._handle_cash(next(csv.reader([line.decode("utf-8")])))
+            elif line.startswith(b"TOTAL,"):
+                break
+            else:
+                positions.append(line)
+        self.csv_file.seek(0)
+        self._positions = b"".join(positions)
+
+    def get_data_df(self) -> pd.DataFrame:
+        if self._positions is None:
+            self._scan()
+        return pd.read_csv(BytesIO(self._positions), engine="c")
 
     def get_portfolio_name(self):
-        with StringIO(self.csv_file.getvalue().decode("utf-8")) as sio:
-            reader = csv.reader(sio)
-            next(reader)
-            next(reader)  # total headers
-            total_values = next(reader)
-            self.csv_file.seek(0)
-            return total_values[0]
+        if self._positions is None:
+            self._scan()
+        return self._account_name
 
     def get_portfolio(self) -> Portfolio:
         portfolio = Portfolio(portfolio_source="E*Trade CSV")
         df = self.get_data_df()
-        for index, row in df.iterrows():
-            if row["Symbol"] == "CASH":
-                continue
-            security = SecurityHolding()
-            security.symbol = row["Symbol"]
-            security.name = None
-            security.quantity = float(row["Quantity"])
-            security.last_price = float(row["Last Price $"])
-            security.avg_price_paid = float(row["Price Paid $"])
-            security.total_value = float(row["Value $"])
-            portfolio.add_security(security)
+        portfolio.add_securities(
+            df["Symbol"].astype(str).tolist(),
+            quantity=df["Quantity"].to_numpy(dtype=float),
+            last_price=df["Last Price $"].to_numpy(dtype=float),
+            avg_price_paid=df["Price Paid $"].to_numpy(dtype=float),
+            total_value=df["Value $"].to_numpy(dtype=float),
+        )
 
         portfolio.set_cash(self.temp_cash)
         portfolio.set_account_name(self.get_portfolio_name())
@@ -2,18 +2,23 @@ from enum import Enum
 from typing import List, Optional
 from portfolio_app.datasource.base import DataSource
 from portfolio_app.datasource.etrade import ETradeCSVDataSource
+from portfolio_app.datasource.snapshot import PortfolioSnapshotDataSource
 
 
 class DataSourceType(Enum):
     ETRADE_CSV = "etrade-csv"
+    PORTFOLIO_SNAPSHOT = "portfolio-snapshot"
 
     def display_name(self):
         if self == DataSourceType.ETRADE_CSV:
             return "E*Trade Account: CSV File"
+        if self == DataSourceType.PORTFOLIO_SNAPSHOT:
+            return "Saved Portfolio Snapshot"
 
 
 DATA_SOURCES = {
     DataSourceType.ETRADE_CSV: ETradeCSVDataSource,
+    DataSourceType.PORTFOLIO_SNAPSHOT: PortfolioSnapshotDataSource,
 }
 
 
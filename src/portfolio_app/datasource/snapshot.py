@@ -0,0 +1,16 @@
+from portfolio_app.portfolio.portfolio import Portfolio
+from portfolio_app.portfolio.snapshot import is_snapshot, load_portfolio
+from portfolio_app.datasource.base import DataSource
+
+
+class PortfolioSnapshotDataSource(DataSource):
+    """A portfolio saved earlier with `snapshot.save_portfolio`."""
+
+    def __init__(self, snapshot_file):
+        self.snapshot_file = snapshot_file
+
+    def validate(self) -> bool:
+        return is_snapshot(self.snapshot_file)
+
+    def get_portfolio(self) -> Portfolio:
+        return load_portfolio(self.snapshot_file)
@@ -0,0 +1,209 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from portfolio_app.portfolio.bulk import allocation_from_row
+from portfolio_app.portfolio.exposure import (
+    ALLOCATION_COLUMNS,
+    ExposureEngine,
+    allocation_row,
+)
+from portfolio_app.portfolio.models import SecurityAllocation
+
+# SecurityInfo fields shown ahead of the allocation columns in allocation_df
+INFO_COLUMNS = ("symbol", "security_name", "security_type", "homepage_url")
+
+
+class AllocationMatrix(MutableMapping):
+    """
+    Allocation data for a set of securities, stored as one uint8 row of
+    percentages per symbol in ALLOCATION_COLUMNS order plus a float64
+    expense ratio column and the SecurityInfo fields as columns. Behaves as
+    a mapping of symbol to SecurityAllocation; frames and exposure are
+    computed from the columns without touching the models. Rows loaded in
+    bulk with `extend_rows` only build their model when first read.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self._index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._allocations: List[Optional[SecurityAllocation]] = []
+        self.info: Dict[str, List] = {column: [] for column in INFO_COLUMNS[1:]}
+        self._matrix = np.zeros((capacity, len(ALLOCATION_COLUMNS)), dtype=np.uint8)
+        self._expense_ratios = np.zeros(capacity, dtype=np.float64)
+        # bumped on every mutation so owners can detect changes
+        self.version = 0
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._matrix)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        matrix = np.zeros((capacity, len(ALLOCATION_COLUMNS)), dtype=np.uint8)
+        matrix[: len(self)] = self.matrix
+        expense_ratios = np.zeros(capacity, dtype=np.float64)
+        expense_ratios[: len(self)] = self.expense_ratios
+        self._matrix, self._expense_ratios = matrix, expense_ratios
+
+    def _row_for(self, symbol: str) -> int:
+        row = self._index.get(symbol)
+        if row is None:
+            row = self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self._allocations.append(None)
+            for values in self.info.values():
+                values.append(None)
+        return row
+
+    def __setitem__(self, symbol: str, allocation: SecurityAllocation) -> None:
+        self._reserve(len(self) + 1)
+        row = self._row_for(symbol)
+        self._allocations[row] = allocation
+        for column, values in self.info.items():
+            values[row] = getattr(allocation.security_info, column)
+        self._matrix[row] = allocation_row(allocation)
+        self._expense_ratios[row] = allocation.security_info.expense_ratio
+        self.version += 1
+
+    def __delitem__(self, symbol: str) -> None:
+        # move the last row into the freed slot to keep rows contiguous
+        row = self._index.pop(symbol)
+        last = len(self.symbols) - 1
+        if row != last:
+            moved = self.symbols[last]
+            self.symbols[row] = moved
+            self._allocations[row] = self._allocations[last]
+            for values in self.info.values():
+                values[row] = values[last]
+            self._matrix[row] = self._matrix[last]
+            self._expense_ratios[row] = self._expense_ratios[last]
+            self._index[moved] = row
+        self.symbols.pop()
+        self._allocations.pop()
+        for values in self.info.values():
+            values.pop()
+        self.version += 1
+
+    def clear(self) -> None:
+        self._index.clear()
+        self.symbols.clear()
+        self._allocations.clear()
+        for values in self.info.values():
+            values.clear()
+        self.version += 1
+
+    def extend_rows(
+        self,
+        symbols: Sequence[str],
+        info: Mapping[str, Sequence],
+        matrix: np.ndarray,
+        expense_ratios: np.ndarray,
+    ) -> None:
+        """
+        Insert many already-validated rows at once; existing symbols are
+        overwritten in place. `info` holds one sequence per SecurityInfo
+        column in INFO_COLUMNS[1:], `matrix` one row per symbol in
+        ALLOCATION_COLUMNS order.
+        """
+        self._reserve(len(self) + len(symbols))
+        if self._index.keys().isdisjoint(symbols) and len(set(symbols)) == len(symbols):
+            # all new and distinct: append the columns wholesale
+            rows = np.arange(len(self), len(self) + len(symbols))
+            self._index.update(zip(symbols, rows.tolist()))
+            self.symbols.extend(symbols)
+            self._allocations.extend([None] * len(symbols))
+            for column, values in self.info.items():
+                values.extend(info[column])
+        else:
+            rows = np.fromiter(
+                (self._row_for(symbol) for symbol in symbols),
+                dtype=np.intp,
+                count=len(symbols),
+            )
+            for column, values in self.info.items():
+                for row, value in zip(rows.tolist(), info[column]):
+                    values[row] = value
+            for row in rows.tolist():
+                self._allocations[row] = None
+        self._matrix[rows] = matrix
+        self._expense_ratios[rows] = expense_ratios
+        self.version += 1
+
+    def __getitem__(self, symbol: str) -> SecurityAllocation:
+        row = self._index[symbol]
+        allocation = self._allocations[row]
+        if allocation is None:
+            allocation = self._allocations[row] = allocation_from_row(
+                symbol,
+                {
+                    "symbol": symbol,
+                    **{column: values[row] for column, values in self.info.items()},
+                    "expense_ratio": float(self._expense_ratios[row]),
+                },
+                self._matrix[row].tolist(),
+            )
+        return allocation
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Zero-copy view of the symbols x ALLOCATION_COLUMNS percentages."""
+        return self._matrix[: len(self)]
+
+    @property
+    def expense_ratios(self) -> np.ndarray:
+        return self._expense_ratios[: len(self)]
+
+    def rows(self, symbols: Iterable[str]) -> np.ndarray:
+        """Row of each symbol, -1 where there is no allocation data."""
+        return np.fromiter(
+            (self._index.get(symbol, -1) for symbol in symbols), dtype=np.intp
+        )
+
+    def update_hash(self, digest) -> None:
+        """Feed the stored content into `digest` without serializing models."""
+        digest.update("\0".join(self.symbols).encode())
+        digest.update(self.matrix.tobytes())
+        digest.update(self.expense_ratios.tobytes())
+        digest.update(repr(list(self.info.values())).encode())
+
+    def exposure(
+        self,
+        symbols: Iterable[str],
+        values: np.ndarray,
+    ) -> ExposureEngine:
+        """
+        Exposure of holdings with the given market values. Holdings without
+        allocation data carry no exposure.
+        """
+        rows = self.rows(symbols)
+        held = rows >= 0
+        return ExposureEngine(
+            np.nan_to_num(np.asarray(values, dtype=np.float64)[held]),
+            self.matrix[rows[held]],
+            self.expense_ratios[rows[held]],
+        )
+
+    def df(self) -> pd.DataFrame:
+        """One row per security: info columns, then the allocation columns."""
+        info_df = pd.DataFrame(
+            {
+                "symbol": self.symbols,
+                **self.info,
+                "expense_ratio": self.expense_ratios.copy(),
+            }
+        )
+        return pd.concat(
+            [info_df, pd.DataFrame(self.matrix, columns=ALLOCATION_COLUMNS)], axis=1
+        )
@@ -0,0 +1,227 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+from portfolio_app.portfolio.exposure import ALLOCATION_DIMENSIONS
+from portfolio_app.portfolio.models import (
+    SecurityAllocation,
+    SecurityInfo,
+    SecurityType,
+)
+
+# (attribute, model, field names, stored column names, defaults) per dimension;
+# stored columns are `<prefix>_<field>`, as written by SecurityDataRepository
+_DIMENSIONS = [
+    (
+        attr,
+        model,
+        list(model.model_fields),
+        [f"{model.prefix()}_{f}" for f in model.model_fields],
+        [
+            0 if field.is_required() else field.default
+            for field in model.model_fields.values()
+        ],
+    )
+    for attr, model in ALLOCATION_DIMENSIONS
+]
+# start of each dimension's block of columns in a flattened row
+_OFFSETS = np.cumsum([0] + [len(fields) for _, _, fields, _, _ in _DIMENSIONS[:-1]])
+_OFFSET_LIST = _OFFSETS.tolist()
+_ROW_WIDTH = sum(len(fields) for _, _, fields, _, _ in _DIMENSIONS)
+_object_setattr = object.__setattr__
+
+
+def _int_fields(model) -> Dict[str, Any]:
+    """Field types carrying the model's bounds (0..100), so bulk checks them."""
+    types = {}
+    for name, field in model.model_fields.items():
+        percentage = Annotated[(int, *field.metadata)]
+        types[name] = percentage if field.is_required() else NotRequired[percentage]
+    return types
+
+
+# Shapes validated in bulk. These check types only; the sum-to-100 rule is
+# checked across the whole batch afterwards instead of once per model.
+AllocationPayload = TypedDict(
+    "AllocationPayload",
+    {
+        "symbol": str,
+        "security_info": SecurityInfo,
+        **{
+            attr: TypedDict(f"{model.__name__}Payload", _int_fields(model))
+            for attr, model, _, _, _ in _DIMENSIONS
+        },
+    },
+)
+StoredSecurityRecord = TypedDict(
+    "StoredSecurityRecord",
+    {
+        "symbol": str,
+        "name": str,
+        "security_type": SecurityType,
+        "homepage_url": NotRequired[str],
+        "expense_ratio": NotRequired[float],
+        **{
+            column: _int_fields(model)[field]
+            for _, model, fields, columns, _ in _DIMENSIONS
+            for field, column in zip(fields, columns)
+        },
+    },
+)
+_PAYLOADS = TypeAdapter(List[AllocationPayload])
+_STORED_RECORDS = TypeAdapter(List[StoredSecurityRecord])
+
+
+def _validate_list(
+    adapter: TypeAdapter, items: Sequence[Any]
+) -> Tuple[List[Any], List[int]]:
+    """
+    Validate every item in one call. Items that fail are dropped and the
+    rest validated again, so one bad item does not discard the batch.
+    Returns the validated items and the input positions they came from.
+    """
+    positions = list(range(len(items)))
+    while positions:
+        try:
+            return adapter.validate_python([items[i] for i in positions]), positions
+        except ValidationError as e:
+            bad = {error["loc"][0] for error in e.errors() if error["loc"]}
+            if not bad:
+                raise
+            for i in sorted(bad):
+                item = items[positions[i]]
+                symbol = item.get("symbol") if isinstance(item, dict) else item
+                print(f"Skipping invalid allocation for {symbol}")
+            positions = [p for i, p in enumerate(positions) if i not in bad]
+    return [], []
+
+
+def _sums_to_100(rows: np.ndarray) -> np.ndarray:
+    """Row mask: every dimension's percentages sum to 100 (+/- 1)."""
+    if not len(rows):
+        return np.ones(0, dtype=bool)
+    sums = np.add.reduceat(rows, _OFFSETS, axis=1)
+    return ((sums >= 99) & (sums <= 101)).all(axis=1)
+
+
+def _construct(model, values: Dict[str, Any]):
+    """
+    `model.model_construct(**values)` without its per-call field
+    introspection, several times faster. `values` must hold every field,
+    already validated. This sets pydantic's private attributes directly;
+    tests/test_bulk.py checks the result against `model_construct`.
+    """
+    instance = model.__new__(model)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__pydantic_fields_set__", set(values))
+    _object_setattr(instance, "__pydantic_extra__", None)
+    _object_setattr(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _build(
+    symbol: str, security_info: SecurityInfo, row: List[int]
+) -> SecurityAllocation:
+    values = {"symbol": symbol, "security_info": security_info}
+    for (attr, model, fields, _, _), start in zip(_DIMENSIONS, _OFFSET_LIST):
+        values[attr] = _construct(
+            model, dict(zip(fields, row[start : start + len(fields)]))
+        )
+    return _construct(SecurityAllocation, values)
+
+
+def allocation_from_row(
+    symbol: str, security_info: Dict[str, Any], row: List[int]
+) -> SecurityAllocation:
+    """
+    Assemble a SecurityAllocation from values that were validated before
+    they were stored: SecurityInfo fields and the percentages in
+    ALLOCATION_COLUMNS order.
+    """
+    return _build(symbol, _construct(SecurityInfo, security_info), row)
+
+
+def _finish(
+    count: int,
+    positions: List[int],
+    symbols: List[str],
+    infos: List[SecurityInfo],
+    rows: List[List[int]],
+) -> List[Optional[SecurityAllocation]]:
+    matrix = np.array(rows, dtype=np.int64).reshape(len(rows), _ROW_WIDTH)
+    valid = _sums_to_100(matrix)
+    allocations: List[Optional[SecurityAllocation]] = [None] * count
+    for i, position in enumerate(positions):
+        if valid[i]:
+            allocations[position] = _build(symbols[i], infos[i], rows[i])
+        else:
+            print(f"Invalid allocation {symbols[i]}: percentages must sum to 100")
+    return allocations
+
+
+def allocations_from_payloads(
+    items: Sequence[Dict[str, Any]],
+) -> List[Optional[SecurityAllocation]]:
+    """
+    Bulk equivalent of `SecurityAllocation.model_validate` for a list of
+    nested payloads (e.g. an OpenAI batch answer). Returns one entry per
+    item, None where the item is invalid.
+    """
+    validated, positions = _validate_list(_PAYLOADS, items)
+    rows = [
+        [
+            payload[attr].get(field, default)
+            for attr, _, fields, _, defaults in _DIMENSIONS
+            for field, default in zip(fields, defaults)
+        ]
+        for payload in validated
+    ]
+    return _finish(
+        len(items),
+        positions,
+        [payload["symbol"] for payload in validated],
+        [payload["security_info"] for payload in validated],
+        rows,
+    )
+
+
+def allocations_from_records(
+    records: Sequence[Dict[str, Any]],
+) -> List[Optional[SecurityAllocation]]:
+    """
+    Bulk equivalent of `SecurityDataRepository._record_to_model` for flat
+    stored rows: the `securities` columns, `expense_ratio`, and the
+    prefixed `security_allocation_info` columns. Returns one entry per
+    record, None where the record is invalid.
+    """
+    validated, positions = _validate_list(_STORED_RECORDS, records)
+    rows = [
+        [
+            record.get(column, default)
+            for _, _, _, columns, defaults in _DIMENSIONS
+            for column, default in zip(columns, defaults)
+        ]
+        for record in validated
+    ]
+    infos = [
+        _construct(
+            SecurityInfo,
+            {
+                "symbol": record["symbol"],
+                "security_name": record["name"],
+                "security_type": record["security_type"].value,
+                "homepage_url": record.get("homepage_url", ""),
+                "expense_ratio": record.get("expense_ratio", 0.0),
+            },
+        )
+        for record in validated
+    ]
+    return _finish(
+        len(records),
+        positions,
+        [record["symbol"] for record in validated],
+        infos,
+        rows,
+    )
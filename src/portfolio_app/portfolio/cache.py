@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class PortfolioCache:
+    """
+    Process wide LRU cache for values derived from a portfolio, keyed on the
+    portfolio's content hash so identical uploads share results and any
+    change to holdings, cash or allocation data misses. Cached values are
+    shared between portfolios and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(
+        self, content_hash: str, name: Hashable, builder: Callable[[], Any]
+    ) -> Any:
+        key = (content_hash, name)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = builder()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+portfolio_cache = PortfolioCache()
@@ -0,0 +1,150 @@
+from typing import Dict, Iterable, List, Mapping, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from portfolio_app.portfolio.models import (
+    BaseAllocationModel,
+    EconomicStatusAllocation,
+    FundAssetAllocation,
+    GrowthValueAllocation,
+    MarketCapAllocation,
+    RegionAllocation,
+    SectorAllocation,
+    SecurityAllocation,
+    USInternationalAllocation,
+)
+from portfolio_app.portfolio.util import float_dollars, float_pct
+
+# SecurityAllocation attribute and model for every exposure dimension
+ALLOCATION_DIMENSIONS: List[Tuple[str, Type[BaseAllocationModel]]] = [
+    ("fund_asset_allocation", FundAssetAllocation),
+    ("market_cap_allocation", MarketCapAllocation),
+    ("us_international_allocation", USInternationalAllocation),
+    ("region_allocation", RegionAllocation),
+    ("growth_value_allocation", GrowthValueAllocation),
+    ("economic_status_allocation", EconomicStatusAllocation),
+    ("sector_allocation", SectorAllocation),
+]
+
+ALLOCATION_COLUMNS: List[str] = [
+    key for _, model in ALLOCATION_DIMENSIONS for key in model.keys_labels()[0]
+]
+_COLUMN_INDEX: Dict[str, int] = {key: i for i, key in enumerate(ALLOCATION_COLUMNS)}
+_DIMENSION_FIELDS: List[Tuple[str, List[str]]] = [
+    (attr, list(model.model_fields)) for attr, model in ALLOCATION_DIMENSIONS
+]
+
+
+def column_indexes(keys: List[str]) -> List[int]:
+    """Positions of allocation keys within ALLOCATION_COLUMNS."""
+    return [_COLUMN_INDEX[key] for key in keys]
+
+
+def allocation_row(allocation: SecurityAllocation) -> List[int]:
+    """Flatten a SecurityAllocation into ALLOCATION_COLUMNS order."""
+    row = []
+    for attr, fields in _DIMENSION_FIELDS:
+        dimension = getattr(allocation, attr)
+        row.extend(getattr(dimension, f) for f in fields)
+    return row
+
+
+def bucketed_df(totals: np.ndarray, labels: List[str]) -> pd.DataFrame:
+    """Dollar totals and percentages for one dimension, indexed by label."""
+    total_value = totals.sum()
+    return pd.DataFrame(
+        {
+            "Total Value": [float_dollars(total) for total in totals],
+            "Percentage": [float_pct((total / total_value) * 100) for total in totals],
+        },
+        index=labels,
+    )
+
+
+class DimensionFramesMixin:
+    """
+    One frame per allocation dimension, for anything that can bucket its
+    exposure by allocation keys.
+    """
+
+    def get_bucketed_df(self, keys: List[str], labels: List[str]) -> pd.DataFrame:
+        raise NotImplementedError()
+
+    def get_fund_asset_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*FundAssetAllocation.keys_labels())
+
+    def get_us_international_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*USInternationalAllocation.keys_labels())
+
+    def get_growth_value_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*GrowthValueAllocation.keys_labels())
+
+    def get_market_cap_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*MarketCapAllocation.keys_labels())
+
+    def get_region_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*RegionAllocation.keys_labels())
+
+    def get_economic_status_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*EconomicStatusAllocation.keys_labels())
+
+    def get_sector_df(self) -> pd.DataFrame:
+        return self.get_bucketed_df(*SectorAllocation.keys_labels())
+
+
+class ExposureEngine(DimensionFramesMixin):
+    """
+    Dollar exposure of a set of holdings across every allocation dimension.
+
+    The holdings x allocation-columns matrix is built once and reduced with a
+    single weights-vector product, so every dimension is served from the same
+    result.
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        matrix: np.ndarray,
+        expense_ratios: np.ndarray,
+    ):
+        self.weights = weights
+        self.matrix = matrix
+        self.expense_ratios = expense_ratios
+        self.totals: np.ndarray = weights @ matrix / 100
+        self.expense_total: float = float(weights @ expense_ratios)
+
+    @classmethod
+    def build(
+        cls,
+        values: Iterable[Tuple[str, float]],
+        allocations: Mapping[str, SecurityAllocation],
+    ) -> "ExposureEngine":
+        """
+        Build from (symbol, market value) pairs. Holdings without allocation
+        data carry no exposure.
+        """
+        weights, rows, expense_ratios = [], [], []
+        for symbol, value in values:
+            allocation = allocations.get(symbol)
+            if allocation is None:
+                continue
+            weights.append(value)
+            rows.append(allocation_row(allocation))
+            expense_ratios.append(allocation.security_info.expense_ratio)
+        return cls(
+            np.nan_to_num(np.asarray(weights, dtype=np.float64)),
+            np.asarray(rows, dtype=np.float64).reshape(
+                len(rows), len(ALLOCATION_COLUMNS)
+            ),
+            np.asarray(expense_ratios, dtype=np.float64),
+        )
+
+    def totals_for(self, keys: List[str]) -> np.ndarray:
+        return self.totals[column_indexes(keys)]
+
+    def bucketed_df(self, keys: List[str], labels: List[str]) -> pd.DataFrame:
+        return bucketed_df(self.totals_for(keys), labels)
+
+    def get_bucketed_df(self, keys: List[str], labels: List[str]) -> pd.DataFrame:
+        return self.bucketed_df(keys, labels)
@@ -0,0 +1,269 @@
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from portfolio_app.portfolio.models import SecurityType
+
+FLOAT_COLUMNS = ("quantity", "last_price", "avg_price_paid", "total_value")
+
+
+class SecurityHolding:
+    __slots__ = (
+        "symbol",
+        "name",
+        "security_type",
+        "quantity",
+        "last_price",
+        "avg_price_paid",
+        "total_value",
+    )
+
+    def __init__(self):
+        self.symbol: str = ""
+        self.name: str = ""
+        self.security_type: SecurityType = None
+        self.quantity: float = 0.0
+        self.last_price = None
+        self.avg_price_paid = None
+        self.total_value = 0.0
+
+    @classmethod
+    def build(
+        cls,
+        symbol: str,
+        name: Optional[str],
+        security_type: Optional[SecurityType],
+        quantity: float,
+        last_price,
+        avg_price_paid,
+        total_value: Optional[float] = None,
+    ) -> "SecurityHolding":
+        security = SecurityHolding()
+        security.symbol = symbol
+        security.name = name
+        security.security_type = security_type
+        security.quantity = quantity
+        security.last_price = last_price
+        security.avg_price_paid = avg_price_paid
+        security.total_value = total_value or (quantity * last_price)
+        return security
+
+    def total_return(self) -> Optional[float]:
+        if self.avg_price_paid and self.quantity:
+            return self.total_value - (self.avg_price_paid * self.quantity)
+        return None
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "quantity": self.quantity,
+            "last_price": self.last_price,
+            "avg_price_paid": self.avg_price_paid,
+            "total_value": self.total_value,
+            "total_return": self.total_return(),
+        }
+
+
+def _float_column(column: str) -> property:
+    def get(self: "HoldingView") -> Optional[float]:
+        value = self._store._columns[column][self._row]
+        return None if np.isnan(value) else float(value)
+
+    def set(self: "HoldingView", value: Optional[float]) -> None:
+        self._store._columns[column][self._row] = np.nan if value is None else value
+        self._store.version += 1
+
+    return property(get, set)
+
+
+def _list_column(column: str) -> property:
+    def get(self: "HoldingView"):
+        return getattr(self._store, column)[self._row]
+
+    def set(self: "HoldingView", value) -> None:
+        getattr(self._store, column)[self._row] = value
+        self._store.version += 1
+
+    return property(get, set)
+
+
+class HoldingView(SecurityHolding):
+    """
+    SecurityHolding backed by one row of a HoldingsStore. Reads and writes
+    go straight to the store's columns.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "HoldingsStore", row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def symbol(self) -> str:
+        return self._store.symbols[self._row]
+
+    name = _list_column("names")
+    security_type = _list_column("security_types")
+    quantity = _float_column("quantity")
+    last_price = _float_column("last_price")
+    avg_price_paid = _float_column("avg_price_paid")
+    total_value = _float_column("total_value")
+
+
+class HoldingsStore(Mapping):
+    """
+    Columnar store of holdings: a symbol index plus contiguous float64
+    arrays for quantity, last_price, avg_price_paid and total_value. Missing
+    prices are stored as NaN. Behaves as a read-only mapping of symbol to
+    SecurityHolding view; use `add`/`extend` to insert.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self._index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.names: List[Optional[str]] = []
+        self.security_types: List[Optional[SecurityType]] = []
+        self._columns: Dict[str, np.ndarray] = {
+            column: np.empty(capacity, dtype=np.float64) for column in FLOAT_COLUMNS
+        }
+        self._size = 0
+        # bumped on every mutation so owners can detect writes through views
+        self.version = 0
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._columns["quantity"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for column, values in self._columns.items():
+            grown = np.empty(capacity, dtype=np.float64)
+            grown[: self._size] = values[: self._size]
+            self._columns[column] = grown
+
+    def add(self, holding: SecurityHolding) -> None:
+        self.extend(
+            [holding.symbol],
+            [holding.quantity],
+            [holding.last_price],
+            [holding.avg_price_paid],
+            [holding.total_value],
+            names=[holding.name],
+            security_types=[holding.security_type],
+        )
+
+    def extend(
+        self,
+        symbols: Sequence[str],
+        quantity: Iterable[Optional[float]],
+        last_price: Iterable[Optional[float]],
+        avg_price_paid: Iterable[Optional[float]],
+        total_value: Iterable[Optional[float]],
+        names: Optional[Sequence[Optional[str]]] = None,
+        security_types: Optional[Sequence[Optional[SecurityType]]] = None,
+    ) -> None:
+        """
+        Insert many holdings at once; existing symbols are overwritten in
+        place. `None` values are stored as NaN.
+        """
+        names = names if names is not None else [None] * len(symbols)
+        security_types = (
+            security_types if security_types is not None else [None] * len(symbols)
+        )
+        new_symbols = [symbol for symbol in symbols if symbol not in self._index]
+        self._reserve(self._size + len(new_symbols))
+        if len(new_symbols) == len(symbols) == len(set(symbols)):
+            # all new and distinct: append the columns wholesale
+            rows = np.arange(self._size, self._size + len(symbols))
+            self._index.update(zip(symbols, rows.tolist()))
+            self.symbols.extend(symbols)
+            self.names.extend(names)
+            self.security_types.extend(security_types)
+        else:
+            rows = np.empty(len(symbols), dtype=np.intp)
+            for i, (symbol, name, security_type) in enumerate(
+                zip(symbols, names, security_types)
+            ):
+                row = self._index.get(symbol)
+                if row is None:
+                    row = self._index[symbol] = len(self.symbols)
+                    self.symbols.append(symbol)
+                    self.names.append(name)
+                    self.security_types.append(security_type)
+                else:
+                    self.names[row] = name
+                    self.security_types[row] = security_type
+                rows[i] = row
+        self._size = len(self.symbols)
+        for column, values in zip(
+            FLOAT_COLUMNS, (quantity, last_price, avg_price_paid, total_value)
+        ):
+            self._columns[column][rows] = np.array(values, dtype=np.float64)
+        self.version += 1
+
+    def column(self, column: str) -> np.ndarray:
+        """Zero-copy view of one float column, in insertion order."""
+        return self._columns[column][: self._size]
+
+    def rows(self, symbols: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self._index[symbol] for symbol in symbols), dtype=np.intp)
+
+    def set_column(self, column: str, rows: np.ndarray, values: np.ndarray) -> None:
+        self._columns[column][rows] = values
+        self.version += 1
+
+    def __getitem__(self, symbol: str) -> HoldingView:
+        return HoldingView(self, self._index[symbol])
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def market_values(self) -> np.ndarray:
+        """quantity * last_price, with unpriced holdings valued at 0"""
+        return self.column("quantity") * np.nan_to_num(self.column("last_price"))
+
+    def returns(self) -> np.ndarray:
+        """Per-holding total return; NaN where there is no cost basis."""
+        quantity = self.column("quantity")
+        avg_price_paid = self.column("avg_price_paid")
+        has_basis = (np.nan_to_num(quantity) != 0) & (
+            np.nan_to_num(avg_price_paid) != 0
+        )
+        with np.errstate(invalid="ignore"):
+            returns = self.column("total_value") - avg_price_paid * quantity
+        return np.where(has_basis, returns, np.nan)
+
+    def total_value(self) -> float:
+        return float(np.nansum(self.column("total_value")))
+
+    def total_return(self) -> float:
+        return float(np.nansum(self.returns()))
+
+    def df(self, copy: bool = False) -> pd.DataFrame:
+        """
+        Holdings frame wrapping the store's arrays without copying them, so
+        later writes to the store show through. Pass `copy=True` for a frame
+        that outlives the current contents, e.g. one that is cached.
+        """
+        return pd.DataFrame(
+            {
+                "symbol": list(self.symbols) if copy else self.symbols,
+                "name": list(self.names) if copy else self.names,
+                "quantity": self.column("quantity"),
+                "last_price": self.column("last_price"),
+                "avg_price_paid": self.column("avg_price_paid"),
+                "total_value": self.column("total_value"),
+                "total_return": self.returns(),
+            },
+            copy=copy,
+        )
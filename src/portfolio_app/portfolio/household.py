@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from portfolio_app.portfolio import portfolio as portfolio_module
+from portfolio_app.portfolio.allocation_matrix import AllocationMatrix
+from portfolio_app.portfolio.exposure import (
+    ALLOCATION_COLUMNS,
+    DimensionFramesMixin,
+    bucketed_df,
+    column_indexes,
+)
+from portfolio_app.portfolio.portfolio import Portfolio
+from portfolio_app.portfolio.util import run_coroutine
+from portfolio_app.provider.base import LastPriceProviderClient
+from portfolio_app.repository.allocation import AllocationLookupService
+
+
+class AccountContribution:
+    """What one account adds to the household's running sums."""
+
+    def __init__(self, portfolio: Portfolio):
+        exposure = portfolio.exposure()
+        self.totals: np.ndarray = exposure.totals.copy()
+        self.expense_total: float = exposure.expense_total
+        self.total_value: float = portfolio.total_value()
+
+
+class Household(DimensionFramesMixin):
+    """
+    Consolidated view over several account portfolios (Roth, taxable,
+    401k, ...).
+
+    Allocation data is looked up once per symbol for the whole household,
+    and per-dimension exposure is kept as running sums: adding, removing or
+    repricing one account adjusts the totals by that account's contribution
+    instead of re-aggregating every account.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        allocation_service: Optional[AllocationLookupService] = None,
+    ):
+        self.name = name
+        self.allocation_service = allocation_service
+        self.accounts: Dict[str, Portfolio] = {}
+        self.security_allocation_data: AllocationMatrix = AllocationMatrix()
+        self._contributions: Dict[str, AccountContribution] = {}
+        self._totals = np.zeros(len(ALLOCATION_COLUMNS), dtype=np.float64)
+        self._expense_total = 0.0
+        self._total_value = 0.0
+
+    def _lookup_missing(self, portfolio: Portfolio) -> None:
+        for symbol, allocation in portfolio.security_allocation_data.items():
+            self.security_allocation_data.setdefault(symbol, allocation)
+        missing = [
+            symbol
+            for symbol in portfolio.holdings
+            if symbol not in self.security_allocation_data
+        ]
+        if missing:
+            service = self.allocation_service or portfolio_module.allocation_service
+            self.security_allocation_data.update(
+                run_coroutine(service.get_many_allocations_async(missing))
+            )
+        portfolio.set_security_allocation_data(self.security_allocation_data)
+
+    def _apply(self, contribution: AccountContribution, sign: int) -> None:
+        self._totals += sign * contribution.totals
+        self._expense_total += sign * contribution.expense_total
+        self._total_value += sign * contribution.total_value
+
+    def add_portfolio(self, portfolio: Portfolio, key: Optional[str] = None) -> str:
+        """
+        Add an account, replacing any account already stored under `key`.
+        Returns the key the account is stored under.
+        """
+        key = key or portfolio.account_name or f"Account {len(self.accounts) + 1}"
+        if key in self.accounts:
+            self.remove_portfolio(key)
+        self._lookup_missing(portfolio)
+        contribution = AccountContribution(portfolio)
+        self.accounts[key] = portfolio
+        self._contributions[key] = contribution
+        self._apply(contribution, 1)
+        return key
+
+    def remove_portfolio(self, key: str) -> Portfolio:
+        """Remove an account and the allocation data only it needed."""
+        self._apply(self._contributions.pop(key), -1)
+        portfolio = self.accounts.pop(key)
+        held = set()
+        for account in self.accounts.values():
+            held.update(account.holdings.symbols)
+        for symbol in [s for s in self.security_allocation_data if s not in held]:
+            del self.security_allocation_data[symbol]
+        return portfolio
+
+    def update_portfolio(self, key: str) -> None:
+        """Re-apply one account after it was changed in place."""
+        self._apply(self._contributions[key], -1)
+        self._lookup_missing(self.accounts[key])
+        self._contributions[key] = AccountContribution(self.accounts[key])
+        self._apply(self._contributions[key], 1)
+
+    def reprice(self, key: str, price_client: LastPriceProviderClient) -> None:
+        self.accounts[key].reprice(price_client)
+        self.update_portfolio(key)
+
+    def total_value(self) -> float:
+        return self._total_value
+
+    def total_return(self) -> float:
+        return sum(portfolio.total_return() for portfolio in self.accounts.values())
+
+    def get_total_expense_ratio(self) -> float:
+        """NaN while the household holds no value, as for a Portfolio."""
+        if not self._total_value:
+            return float("nan")
+        return round(self._expense_total / self._total_value, 4)
+
+    def get_bucketed_df(self, keys: List[str], labels: List[str]) -> pd.DataFrame:
+        return bucketed_df(self._totals[column_indexes(keys)], labels)
+
+    def df(self) -> pd.DataFrame:
+        """Holdings of every account, with an `account` column."""
+        return pd.concat(
+            [
+                portfolio.df().assign(account=key)
+                for key, portfolio in self.accounts.items()
+            ],
+            ignore_index=True,
+        )
+
+    def allocation_df(self) -> pd.DataFrame:
+        return self.security_allocation_data.df()
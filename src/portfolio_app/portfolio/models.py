@@ -42,8 +42,10 @@ class BaseAllocationModel(BaseModel):
 class USInternationalAllocation(BaseAllocationModel):
     """US and international allocation in percentages."""
 
-    us: int = Field(title="US", default=0, strict=False)
-    international: int = Field(title="International", default=0, strict=False)
+    us: int = Field(title="US", default=0, ge=0, le=100, strict=False)
+    international: int = Field(
+        title="International", default=0, ge=0, le=100, strict=False
+    )
 
     @classmethod
     def prefix(cls):
@@ -53,11 +55,17 @@ class USInternationalAllocation(BaseAllocationModel):
 class RegionAllocation(BaseAllocationModel):
     """Region allocation in percentages."""
 
-    north_america: int = Field(title="North America", default=0, strict=False)
-    emea: int = Field(title="Europe, Middle East, Africa", default=0, strict=False)
-    latam: int = Field(title="Latin America", default=0, strict=False)
-    apac: int = Field(title="Asia/Pacific", default=0, strict=False)
-    global_: int = Field(title="Global", alias="global_", default=0, strict=False)
+    north_america: int = Field(
+        title="North America", default=0, ge=0, le=100, strict=False
+    )
+    emea: int = Field(
+        title="Europe, Middle East, Africa", default=0, ge=0, le=100, strict=False
+    )
+    latam: int = Field(title="Latin America", default=0, ge=0, le=100, strict=False)
+    apac: int = Field(title="Asia/Pacific", default=0, ge=0, le=100, strict=False)
+    global_: int = Field(
+        title="Global", alias="global_", default=0, ge=0, le=100, strict=False
+    )
 
     @classmethod
     def prefix(cls):
@@ -67,10 +75,10 @@ class RegionAllocation(BaseAllocationModel):
 class FundAssetAllocation(BaseAllocationModel):
     """Fund asset allocation in percentages."""
 
-    stocks: int = Field(title="Stocks", default=0, strict=False)
-    bonds: int = Field(title="Bonds", default=0, strict=False)
-    real_estate: int = Field(title="Real Estate", default=0, strict=False)
-    cash: int = Field(title="Cash", default=0, strict=False)
+    stocks: int = Field(title="Stocks", default=0, ge=0, le=100, strict=False)
+    bonds: int = Field(title="Bonds", default=0, ge=0, le=100, strict=False)
+    real_estate: int = Field(title="Real Estate", default=0, ge=0, le=100, strict=False)
+    cash: int = Field(title="Cash", default=0, ge=0, le=100, strict=False)
 
     @classmethod
     def prefix(cls):
@@ -80,9 +88,9 @@ class FundAssetAllocation(BaseAllocationModel):
 class MarketCapAllocation(BaseAllocationModel):
     """Market cap allocation in percentages."""
 
-    large_cap: int = Field(title="Large Cap", strict=False)
-    mid_cap: int = Field(title="Mid Cap", strict=False)
-    small_cap: int = Field(title="Small Cap", strict=False)
+    large_cap: int = Field(title="Large Cap", ge=0, le=100, strict=False)
+    mid_cap: int = Field(title="Mid Cap", ge=0, le=100, strict=False)
+    small_cap: int = Field(title="Small Cap", ge=0, le=100, strict=False)
 
     @classmethod
     def prefix(cls):
@@ -92,8 +100,8 @@ class MarketCapAllocation(BaseAllocationModel):
 class GrowthValueAllocation(BaseAllocationModel):
     """Growth value allocation in percentages."""
 
-    growth: int = Field(title="Growth", default=0, strict=False)
-    value: int = Field(title="Value", default=0, strict=False)
+    growth: int = Field(title="Growth", default=0, ge=0, le=100, strict=False)
+    value: int = Field(title="Value", default=0, ge=0, le=100, strict=False)
 
     @classmethod
     def prefix(cls):
@@ -103,9 +111,15 @@ class GrowthValueAllocation(BaseAllocationModel):
 class EconomicStatusAllocation(BaseAllocationModel):
     """Economic status allocation in percentages."""
 
-    developed: int = Field(title="Developed Markets", default=0, strict=False)
-    emerging: int = Field(title="Emerging Markets", default=0, strict=False)
-    frontier: int = Field(title="Frontier Markets", default=0, strict=False)
+    developed: int = Field(
+        title="Developed Markets", default=0, ge=0, le=100, strict=False
+    )
+    emerging: int = Field(
+        title="Emerging Markets", default=0, ge=0, le=100, strict=False
+    )
+    frontier: int = Field(
+        title="Frontier Markets", default=0, ge=0, le=100, strict=False
+    )
 
     @classmethod
     def prefix(cls):
@@ -116,22 +130,24 @@ class SectorAllocation(BaseAllocationModel):
     """Sector allocation in percentages."""
 
     information_technology: int = Field(
-        title="Information Technology", default=0, strict=False
+        title="Information Technology", default=0, ge=0, le=100, strict=False
     )
-    health_care: int = Field(title="Health Care", default=0, strict=False)
-    financials: int = Field(title="Financials", default=0, strict=False)
+    health_care: int = Field(title="Health Care", default=0, ge=0, le=100, strict=False)
+    financials: int = Field(title="Financials", default=0, ge=0, le=100, strict=False)
     consumer_discretionary: int = Field(
-        title="Consumer Discretionary", default=0, strict=False
+        title="Consumer Discretionary", default=0, ge=0, le=100, strict=False
     )
     communication_services: int = Field(
-        title="Communication Services", default=0, strict=False
-    )
-    industrials: int = Field(title="Industrials", default=0, strict=False)
-    consumer_staples: int = Field(title="Consumer Staples", default=0, strict=False)
-    energy: int = Field(title="Energy", default=0, strict=False)
-    utilities: int = Field(title="Utilities", default=0, strict=False)
-    real_estate: int = Field(title="Real Estate", default=0, strict=False)
-    materials: int = Field(title="Materials", default=0, strict=False)
+        title="Communication Services", default=0, ge=0, le=100, strict=False
+    )
+    industrials: int = Field(title="Industrials", default=0, ge=0, le=100, strict=False)
+    consumer_staples: int = Field(
+        title="Consumer Staples", default=0, ge=0, le=100, strict=False
+    )
+    energy: int = Field(title="Energy", default=0, ge=0, le=100, strict=False)
+    utilities: int = Field(title="Utilities", default=0, ge=0, le=100, strict=False)
+    real_estate: int = Field(title="Real Estate", default=0, ge=0, le=100, strict=False)
+    materials: int = Field(title="Materials", default=0, ge=0, le=100, strict=False)
 
     @classmethod
     def prefix(cls):
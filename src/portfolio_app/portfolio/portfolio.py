@@ -1,20 +1,24 @@
 from enum import Enum
-from typing import Dict, List, Optional
-import streamlit as st
+import hashlib
+from typing import Any, Callable, Hashable, List, Mapping, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 from portfolio_app.repository.allocation import AllocationLookupService
+from portfolio_app.portfolio.allocation_matrix import AllocationMatrix
+from portfolio_app.portfolio.cache import portfolio_cache
+from portfolio_app.portfolio.exposure import DimensionFramesMixin, ExposureEngine
+from portfolio_app.portfolio.holdings import (  # noqa: F401
+    FLOAT_COLUMNS,
+    HoldingsStore,
+    SecurityHolding,
+)
 from portfolio_app.portfolio.models import (
-    EconomicStatusAllocation,
-    GrowthValueAllocation,
-    MarketCapAllocation,
-    RegionAllocation,
-    SectorAllocation,
     SecurityAllocation,
-    SecurityType,
-    USInternationalAllocation,
+    SecurityType,  # noqa: F401
 )
-from portfolio_app.portfolio.util import float_dollars, float_pct
+from portfolio_app.portfolio.util import run_coroutine
+from portfolio_app.provider.base import LastPriceProviderClient
 
 allocation_service = AllocationLookupService()
 
@@ -40,31 +44,47 @@ class PortfolioType(Enum):
     OTHER = "Other"
 
 
-class Portfolio:
+class Portfolio(DimensionFramesMixin):
     def __init__(
         self,
         account_name: str = None,
         portfolio_source: str = None,
         portfolio_type: PortfolioType = None,
     ):
-        self.holdings: Dict[str, SecurityHolding] = {}
+        self.holdings: HoldingsStore = HoldingsStore()
         self.cash: float = 0.0
         self.account_name: str = account_name
         self.portfolio_source: str = portfolio_source
         self.portfolio_type: PortfolioType = portfolio_type
-        self.security_allocation_data: Dict[str, SecurityAllocation] = {}
+        self.security_allocation_data: AllocationMatrix = AllocationMatrix()
         self._data_complete: bool = False
+        self._content_hash: Optional[str] = None
+        self._hashed_version: Optional[Tuple[int, int]] = None
 
     def total_value(self) -> float:
-        return self.cash + sum(
-            (holding.total_value for holding in self.holdings.values())
-        )
+        return self.cash + self.holdings.total_value()
 
     def total_return(self) -> float:
-        return sum((holding.total_return() for holding in self.holdings.values()))
+        return self.holdings.total_return()
 
     def add_security(self, security):
-        self.holdings[security.symbol] = security
+        self.holdings.add(security)
+        self._invalidate()
+
+    def add_securities(
+        self,
+        symbols: List[str],
+        quantity,
+        last_price,
+        avg_price_paid,
+        total_value,
+        names: Optional[List[Optional[str]]] = None,
+    ) -> None:
+        """Add many holdings from column arrays in one call."""
+        self.holdings.extend(
+            symbols, quantity, last_price, avg_price_paid, total_value, names=names
+        )
+        self._invalidate()
 
     def add_security_allocation_data(
         self, security_allocation_data: SecurityAllocation
@@ -72,9 +92,38 @@ class Portfolio:
         self.security_allocation_data[
             security_allocation_data.symbol
         ] = security_allocation_data
+        self._invalidate()
+
+    def set_security_allocation_data(
+        self, allocations: Mapping[str, SecurityAllocation]
+    ) -> None:
+        """
+        Attach allocations resolved elsewhere (e.g. shared across accounts)
+        for every held symbol and mark the portfolio data complete.
+        """
+        for symbol in self.holdings:
+            if symbol in allocations:
+                self.security_allocation_data[symbol] = allocations[symbol]
+        self._populate_security_names()
+        self._data_complete = True
+        self._invalidate()
 
     def set_cash(self, cash) -> None:
         self.cash = cash
+        self._invalidate()
+
+    def reprice(self, price_client: LastPriceProviderClient) -> None:
+        """Update every holding to the provider's last price in one bulk call."""
+        prices = price_client.last_prices(self.holdings.keys())
+        rows = self.holdings.rows(prices.keys())
+        last_prices = np.fromiter(
+            (last_price for _, last_price in prices.values()), dtype=np.float64
+        )
+        self.holdings.set_column("last_price", rows, last_prices)
+        self.holdings.set_column(
+            "total_value", rows, self.holdings.column("quantity")[rows] * last_prices
+        )
+        self._invalidate()
 
     def set_account_name(self, account_name) -> None:
         self.account_name = account_name
@@ -82,135 +131,139 @@ class Portfolio:
     def set_portfolio_type(self, portfolio_type: PortfolioType) -> None:
         self.portfolio_type = portfolio_type
 
+    def _invalidate(self) -> None:
+        self._content_hash = None
+
+    def content_hash(self) -> str:
+        """
+        Stable hash of holdings, cash and allocation data. Cached until one
+        of the mutating methods is called or the holdings or allocation
+        data are written to directly.
+        """
+        version = (self.holdings.version, self.security_allocation_data.version)
+        if self._content_hash is None or self._hashed_version != version:
+            digest = hashlib.sha256(repr(self.cash).encode())
+            digest.update("\0".join(self.holdings.symbols).encode())
+            digest.update(repr(self.holdings.names).encode())
+            for column in FLOAT_COLUMNS:
+                digest.update(self.holdings.column(column).tobytes())
+            self.security_allocation_data.update_hash(digest)
+            self._content_hash = digest.hexdigest()
+            self._hashed_version = version
+        return self._content_hash
+
+    def _memoized(self, name: Hashable, builder: Callable[[], Any]) -> Any:
+        return portfolio_cache.get_or_build(self.content_hash(), name, builder)
+
     def _populate_security_names(self):
-        for symbol, security in self.holdings.items():
-            if symbol in self.security_allocation_data:
-                if not security.name:
-                    security.name = self.security_allocation_data[
-                        symbol
-                    ].security_info.security_name
-
-    def _fetch_security_data(self):
-        for symbol in self.holdings.keys():
-            self.security_allocation_data[
-                symbol
-            ] = allocation_service.get_allocations_by_symbol(symbol)
-
-    def _complete_portfolio_data(self):
+        names = self.holdings.names
+        for row, symbol in enumerate(self.holdings.symbols):
+            if symbol in self.security_allocation_data and not names[row]:
+                names[row] = self.security_allocation_data[
+                    symbol
+                ].security_info.security_name
+
+    async def _fetch_security_data_async(
+        self,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, SecurityAllocation], None]] = None,
+    ) -> None:
+        def add_result(symbol: str, allocation: SecurityAllocation) -> None:
+            self.security_allocation_data[symbol] = allocation
+            self._invalidate()
+            if on_result:
+                on_result(symbol, allocation)
+
+        await allocation_service.get_many_allocations_async(
+            self.holdings.keys(),
+            max_concurrency=max_concurrency,
+            on_result=add_result,
+        )
+
+    def _fetch_security_data(
+        self,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, SecurityAllocation], None]] = None,
+    ):
+        run_coroutine(
+            self._fetch_security_data_async(
+                max_concurrency=max_concurrency, on_result=on_result
+            )
+        )
+
+    def _complete_portfolio_data(
+        self,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, SecurityAllocation], None]] = None,
+    ):
         if not self.security_allocation_data or not self._data_complete:
-            self._fetch_security_data()
+            self._fetch_security_data(
+                max_concurrency=max_concurrency, on_result=on_result
+            )
             self._populate_security_names()
             self._data_complete = True
+            self._invalidate()
 
-    @st.cache_data()
-    def allocation_df(_self) -> pd.DataFrame:
-        if not _self._data_complete:
-            _self._complete_portfolio_data()
-        return pd.DataFrame(
-            (
-                security_allocation.to_dict()
-                for security_allocation in _self.security_allocation_data.values()
-            )
+    def allocation_df(self) -> pd.DataFrame:
+        if not self._data_complete:
+            self._complete_portfolio_data()
+        return self._memoized("allocation_df", self.security_allocation_data.df)
+
+    def fetch_security_data(
+        self,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, SecurityAllocation], None]] = None,
+    ) -> None:
+        """
+        Resolve allocation data for every holding, calling `on_result` as
+        each symbol arrives so callers can render partial results.
+        """
+        self._complete_portfolio_data(
+            max_concurrency=max_concurrency, on_result=on_result
         )
 
-    @st.cache_data()
-    def df(_self) -> pd.DataFrame:
-        if not _self._data_complete:
-            _self._complete_portfolio_data()
-        return pd.DataFrame((holding.to_dict() for holding in _self.holdings.values()))
+    def holdings_df(self) -> pd.DataFrame:
+        """
+        Holdings as uploaded, without waiting for allocation data. The frame
+        is shared through portfolio_cache, so it copies the store's columns.
+        """
+        return self._memoized("df", lambda: self.holdings.df(copy=True))
+
+    def df(self) -> pd.DataFrame:
+        if not self._data_complete:
+            self._complete_portfolio_data()
+        return self.holdings_df()
+
+    def exposure(self) -> ExposureEngine:
+        if not self._data_complete:
+            self._complete_portfolio_data()
+        return self.current_exposure()
+
+    def current_exposure(self) -> ExposureEngine:
+        """
+        Exposure over the allocation data fetched so far. Partial results
+        change with every lookup, so only complete ones go to portfolio_cache.
+        """
+
+        def build() -> ExposureEngine:
+            return self.security_allocation_data.exposure(
+                self.holdings.symbols, self.holdings.market_values()
+            )
 
-    def _merged_df(self) -> pd.DataFrame:
-        securities_df = self.df()
-        allocation_df = self.allocation_df()
-        return pd.merge(securities_df, allocation_df, on="symbol")
+        if not self._data_complete:
+            return build()
+        return self._memoized("exposure", build)
 
     def get_total_expense_ratio(self) -> float:
-        df = self._merged_df()
-        expense_ration: float = (
-            df["quantity"] * df["last_price"] * df["expense_ratio"]
-        ).sum() / self.total_value()
+        """NaN for a portfolio without value."""
+        total_value = self.total_value()
+        if not total_value:
+            return float("nan")
+        expense_ration: float = self.exposure().expense_total / total_value
         return round(expense_ration, 4)
 
     def get_bucketed_df(self, keys: List[str], labels: List[str]) -> pd.DataFrame:
-        merged_df = self._merged_df()
-        totals = [
-            (
-                merged_df["quantity"] * merged_df["last_price"] * merged_df[key] / 100
-            ).sum()
-            for key in keys
-        ]
-        total_value = sum(totals)
-        percentages = (float_pct((total / total_value) * 100) for total in totals)
-        return pd.DataFrame(
-            {
-                "Total Value": (float_dollars(total) for total in totals),
-                "Percentage": percentages,
-            },
-            index=labels,
+        return self._memoized(
+            ("bucketed_df", tuple(keys), tuple(labels)),
+            lambda: self.exposure().bucketed_df(keys, labels),
         )
-
-    def get_us_international_df(self) -> pd.DataFrame:
-        return self.get_bucketed_df(*USInternationalAllocation.keys_labels())
-
-    def get_growth_value_df(self) -> pd.DataFrame:
-        return self.get_bucketed_df(*GrowthValueAllocation.keys_labels())
-
-    def get_market_cap_df(self) -> pd.DataFrame:
-        return self.get_bucketed_df(*MarketCapAllocation.keys_labels())
-
-    def get_region_df(self) -> pd.DataFrame:
-        return self.get_bucketed_df(*RegionAllocation.keys_labels())
-
-    def get_economic_status_df(self) -> pd.DataFrame:
-        return self.get_bucketed_df(*EconomicStatusAllocation.keys_labels())
-
-    def get_sector_df(self) -> pd.DataFrame:
-        return self.get_bucketed_df(*SectorAllocation.keys_labels())
-
-
-class SecurityHolding:
-    def __init__(self):
-        self.symbol: str = ""
-        self.name: str = ""
-        self.security_type: SecurityType = None
-        self.quantity: float = 0.0
-        self.last_price = None
-        self.avg_price_paid = None
-        self.total_value = 0.0
-
-    @classmethod
-    def build(
-        cls,
-        symbol: str,
-        name: Optional[str],
-        security_type: Optional[SecurityType],
-        quantity: float,
-        last_price,
-        avg_price_paid,
-        total_value: Optional[float] = None,
-    ) -> "SecurityHolding":
-        security = SecurityHolding()
-        security.symbol = symbol
-        security.name = name
-        security.security_type = security_type
-        security.quantity = quantity
-        security.last_price = last_price
-        security.avg_price_paid = avg_price_paid
-        security.total_value = total_value or (quantity * last_price)
-        return security
-
-    def total_return(self) -> Optional[float]:
-        if self.avg_price_paid and self.quantity:
-            return self.total_value - (self.avg_price_paid * self.quantity)
-        return None
-
-    def to_dict(self):
-        return {
-            "symbol": self.symbol,
-            "name": self.name,
-            "quantity": self.quantity,
-            "last_price": self.last_price,
-            "avg_price_paid": self.avg_price_paid,
-            "total_value": self.total_value,
-            "total_return": self.total_return(),
-        }
@@ -0,0 +1,215 @@
+"""
+Save a complete Portfolio to a single Arrow IPC file and load it back.
+
+The file holds one row per symbol: the holding columns, the SecurityInfo
+columns and one uint8 column per allocation key. Cash and account metadata
+go in the schema metadata. The file is written uncompressed, so loading maps
+it into memory and copies the columns into the portfolio's stores as whole
+arrays, without parsing rows or calling providers. Exposure is recomputed
+from the loaded matrix rather than trusted from the file.
+"""
+
+import json
+import os
+from typing import IO, Any, Dict, Union
+
+import numpy as np
+import pyarrow as pa
+
+from portfolio_app.portfolio.allocation_matrix import INFO_COLUMNS
+from portfolio_app.portfolio.exposure import ALLOCATION_COLUMNS
+from portfolio_app.portfolio.holdings import FLOAT_COLUMNS
+from portfolio_app.portfolio.models import SecurityType
+from portfolio_app.portfolio.portfolio import Portfolio, PortfolioType
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSION = "arrow"
+METADATA_KEY = b"portfolio_app.snapshot"
+# leading bytes of every Arrow IPC file
+ARROW_MAGIC = b"ARROW1"
+
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        ("symbol", pa.string()),
+        ("held", pa.bool_()),
+        ("name", pa.string()),
+        ("holding_security_type", pa.string()),
+        *((column, pa.float64()) for column in FLOAT_COLUMNS),
+        ("has_allocation", pa.bool_()),
+        *((column, pa.string()) for column in INFO_COLUMNS[1:]),
+        ("expense_ratio", pa.float64()),
+        *((column, pa.uint8()) for column in ALLOCATION_COLUMNS),
+    ]
+)
+
+
+def _security_type_value(security_type) -> Any:
+    return None if security_type is None else SecurityType(security_type).value
+
+
+def snapshot_table(portfolio: Portfolio) -> pa.Table:
+    """
+    Portfolio as a table: held symbols first, in holdings order, then any
+    symbols with allocation data but no holding.
+    """
+    holdings = portfolio.holdings
+    allocations = portfolio.security_allocation_data
+    symbols = holdings.symbols + [s for s in allocations.symbols if s not in holdings]
+    unheld = len(symbols) - len(holdings)
+
+    rows = allocations.rows(symbols)
+    has_allocation = rows >= 0
+    matrix = np.zeros((len(symbols), len(ALLOCATION_COLUMNS)), dtype=np.uint8)
+    matrix[has_allocation] = allocations.matrix[rows[has_allocation]]
+    expense_ratios = np.zeros(len(symbols), dtype=np.float64)
+    expense_ratios[has_allocation] = allocations.expense_ratios[rows[has_allocation]]
+
+    columns: Dict[str, Any] = {
+        "symbol": symbols,
+        "held": np.arange(len(symbols)) < len(holdings),
+        "name": holdings.names + [None] * unheld,
+        "holding_security_type": [
+            _security_type_value(security_type)
+            for security_type in holdings.security_types
+        ]
+        + [None] * unheld,
+        **{
+            column: np.concatenate([holdings.column(column), np.full(unheld, np.nan)])
+            for column in FLOAT_COLUMNS
+        },
+        "has_allocation": has_allocation,
+        **{
+            column: [
+                allocations.info[column][row] if row >= 0 else None
+                for row in rows.tolist()
+            ]
+            for column in INFO_COLUMNS[1:]
+        },
+        "expense_ratio": expense_ratios,
+        **{column: matrix[:, i] for i, column in enumerate(ALLOCATION_COLUMNS)},
+    }
+
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "cash": portfolio.cash,
+        "account_name": portfolio.account_name,
+        "portfolio_source": portfolio.portfolio_source,
+        "portfolio_type": (
+            portfolio.portfolio_type.name if portfolio.portfolio_type else None
+        ),
+        "data_complete": portfolio._data_complete,
+    }
+    return pa.table(
+        columns,
+        schema=SNAPSHOT_SCHEMA.with_metadata(
+            {METADATA_KEY: json.dumps(metadata).encode()}
+        ),
+    )
+
+
+def _write(table: pa.Table, sink) -> None:
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def save_portfolio(portfolio: Portfolio, path: Union[str, os.PathLike]) -> None:
+    """
+    Write `portfolio` to `path`. The file is written next to its destination
+    and moved into place, so an interrupted save keeps the previous snapshot.
+    """
+    table = snapshot_table(portfolio)
+    tmp_path = f"{os.fspath(path)}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        _write(table, sink)
+    os.replace(tmp_path, path)
+
+
+def snapshot_bytes(portfolio: Portfolio) -> bytes:
+    """Snapshot file contents, e.g. for a download button."""
+    sink = pa.BufferOutputStream()
+    _write(snapshot_table(portfolio), sink)
+    return sink.getvalue().to_pybytes()
+
+
+def is_snapshot(input_file: IO[bytes]) -> bool:
+    input_file.seek(0)
+    magic = input_file.read(len(ARROW_MAGIC))
+    input_file.seek(0)
+    return magic == ARROW_MAGIC
+
+
+def _read_table(source) -> pa.Table:
+    if isinstance(source, (str, os.PathLike)):
+        # the table's buffers keep the mapping alive once the file is closed
+        with pa.memory_map(os.fspath(source)) as mapped:
+            return pa.ipc.open_file(mapped).read_all()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+    else:
+        source.seek(0)
+        source = pa.BufferReader(source.read())
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_portfolio(source: Union[str, os.PathLike, bytes, IO[bytes]]) -> Portfolio:
+    """
+    Rebuild a Portfolio from a snapshot path, the file's bytes or an open
+    binary file. The portfolio gets its own copy of every column, so it does
+    not keep the file mapped. Allocation models are only built when a
+    symbol's SecurityAllocation is read.
+    """
+    table = _read_table(source)
+    metadata = (table.schema.metadata or {}).get(METADATA_KEY)
+    if metadata is None:
+        raise ValueError("Not a portfolio snapshot")
+    metadata = json.loads(metadata)
+    if metadata["version"] > SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {metadata['version']}")
+
+    portfolio = Portfolio(
+        account_name=metadata["account_name"],
+        portfolio_source=metadata["portfolio_source"],
+        portfolio_type=(
+            PortfolioType[metadata["portfolio_type"]]
+            if metadata["portfolio_type"]
+            else None
+        ),
+    )
+    symbols = table.column("symbol").to_pylist()
+
+    held = table.column("held").to_numpy()
+    held_rows = np.flatnonzero(held).tolist()
+    names = table.column("name").to_pylist()
+    security_types = table.column("holding_security_type").to_pylist()
+    floats = {column: table.column(column).to_numpy() for column in FLOAT_COLUMNS}
+    portfolio.holdings.extend(
+        [symbols[row] for row in held_rows],
+        *(floats[column][held] for column in FLOAT_COLUMNS),
+        names=[names[row] for row in held_rows],
+        security_types=[
+            None if security_types[row] is None else SecurityType(security_types[row])
+            for row in held_rows
+        ],
+    )
+
+    has_allocation = table.column("has_allocation").to_numpy()
+    allocation_rows = np.flatnonzero(has_allocation).tolist()
+    info = {
+        column: [values[row] for row in allocation_rows]
+        for column, values in (
+            (column, table.column(column).to_pylist()) for column in INFO_COLUMNS[1:]
+        )
+    }
+    matrix = np.column_stack(
+        [table.column(column).to_numpy() for column in ALLOCATION_COLUMNS]
+    )
+    portfolio.security_allocation_data.extend_rows(
+        [symbols[row] for row in allocation_rows],
+        info,
+        matrix[has_allocation],
+        table.column("expense_ratio").to_numpy()[has_allocation],
+    )
+
+    portfolio._data_complete = metadata["data_complete"]
+    portfolio.set_cash(metadata["cash"])
+    return portfolio
@@ -1,3 +1,9 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Iterable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
 
 def format_as_pct(value: float) -> str:
     return f"{value:.2f}%"
@@ -13,3 +19,19 @@ def float_dollars(value: float) -> float:
 def format_dollars(value: float) -> str:
     return f"${value:.2f}"
 
+
+def run_coroutine(coro: Coroutine) -> Any:
+    """run a coroutine to completion from synchronous code"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # already inside an event loop, so run on a fresh loop in another thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def chunks(items: Sequence[T], size: int) -> Iterable[List[T]]:
+    """split a sequence into lists of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield list(items[start : start + size])
@@ -1,6 +1,9 @@
+import asyncio
 from abc import ABCMeta, abstractmethod
 from datetime import date
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
 
 from portfolio_app.portfolio.models import SecurityAllocation
 
@@ -14,10 +17,70 @@ class LastPriceProviderClient(metaclass=ABCMeta):
     def last_price(self, symbol: str) -> Tuple[date, float]:
         raise NotImplementedError()
 
+    def last_prices(self, symbols: Iterable[str]) -> Dict[str, Tuple[date, float]]:
+        """
+        Last prices for many symbols. Providers with a bulk endpoint override
+        this; the default prices one symbol at a time.
+        """
+        return {symbol: self.last_price(symbol) for symbol in symbols}
+
+
+# fields of a daily OHLCV bar, in storage order
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class DailyBarsProviderClient(metaclass=ABCMeta):
+    """
+    Data provider of historical daily bars.
+    """
+
+    @abstractmethod
+    def daily_bars(
+        self, symbol: str, start: date, end: date
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Bars from `start` to `end` inclusive: the sessions as a datetime64[D]
+        array, ascending, and one float64 array per BAR_FIELDS field.
+        """
+        raise NotImplementedError()
+
 
 class AllocationDataClient(metaclass=ABCMeta):
     def lookup_allocation(self, symbol: str) -> SecurityAllocation:
         pass
 
     async def lookup_allocation_async(self, symbol: str) -> SecurityAllocation:
-        pass
+        """
+        Default async lookup runs the blocking lookup in a worker thread so
+        clients without a native async API can still be fetched concurrently.
+        """
+        return await asyncio.to_thread(self.lookup_allocation, symbol)
+
+    def lookup_allocations(
+        self, symbols: Iterable[str]
+    ) -> Dict[str, SecurityAllocation]:
+        """
+        Look up several symbols. Clients that can answer for many symbols in
+        one request override this; the default looks them up one at a time.
+        """
+        return {symbol: self.lookup_allocation(symbol) for symbol in symbols}
+
+    async def lookup_allocations_async(
+        self, symbols: Iterable[str]
+    ) -> Dict[str, SecurityAllocation]:
+        """
+        Symbols whose lookup fails are left out, like symbols a batched
+        provider does not answer, so one failure does not sink the batch.
+        """
+        symbols = list(symbols)
+        allocations = await asyncio.gather(
+            *(self.lookup_allocation_async(symbol) for symbol in symbols),
+            return_exceptions=True,
+        )
+        ret = {}
+        for symbol, allocation in zip(symbols, allocations):
+            if isinstance(allocation, BaseException):
+                print(f"Allocation lookup failed for {symbol}: {allocation}")
+            else:
+                ret[symbol] = allocation
+        return ret
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type, TypeVar
+
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+T = TypeVar("T")
+
+
+class ProviderError(Exception):
+    """A provider call failed."""
+
+
+class TransientProviderError(ProviderError):
+    """A provider call failed in a way that is worth retrying (429, 5xx)."""
+
+
+class CircuitOpenError(ProviderError):
+    """The provider failed too often recently; calls are short-circuited."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing `rate` calls per second on average
+    with bursts of up to `capacity`. Callers reserve a token and sleep until
+    it is due, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, possibly ahead of time; returns the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds. After that a single trial call is let
+    through; its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if (
+                time.monotonic() - self._opened_at < self.reset_timeout
+                or self._trial_running
+            ):
+                raise CircuitOpenError("circuit open")
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        """End a trial call that told nothing about the provider (cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+
+class ProviderExecutor:
+    """
+    Runs calls against one external provider: waits for a rate-limit token,
+    checks the circuit breaker, and retries `retry_on` errors with jittered
+    exponential backoff. Share one executor per provider so every client and
+    thread draws from the same quota.
+
+    Only `retry_on` errors count against the breaker; anything else (bad
+    input, unknown symbol) is raised straight away and, since the provider
+    did answer, counts as a success.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_attempts: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 20.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        retry_on: Tuple[Type[BaseException], ...] = (TransientProviderError,),
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retry_on = retry_on
+        self._retry_kwargs = dict(
+            stop=stop_after_attempt(max_attempts),
+            wait=wait_random_exponential(multiplier=backoff, max=max_backoff),
+            retry=retry_if_exception_type(retry_on),
+            reraise=True,
+        )
+
+    def _before(self) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            raise CircuitOpenError(f"{self.name} circuit open") from None
+
+    def _after(self, exc: Optional[BaseException]) -> None:
+        """
+        Report a call's outcome to the breaker. The provider answered unless
+        the error is a `retry_on` one, so other exceptions count as success;
+        a cancelled call only releases a half-open trial.
+        """
+        if isinstance(exc, self.retry_on):
+            self.breaker.record_failure()
+        elif exc is None or isinstance(exc, Exception):
+            self.breaker.record_success()
+        else:
+            self.breaker.release_trial()
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        for attempt in Retrying(**self._retry_kwargs):
+            with attempt:
+                self._before()
+                outcome: Optional[BaseException] = None
+                try:
+                    if self.bucket:
+                        self.bucket.acquire()
+                    result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    outcome = exc
+                    raise
+                finally:
+                    self._after(outcome)
+        return result
+
+    async def call_async(
+        self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> T:
+        async for attempt in AsyncRetrying(**self._retry_kwargs):
+            with attempt:
+                self._before()
+                outcome: Optional[BaseException] = None
+                try:
+                    if self.bucket:
+                        await self.bucket.acquire_async()
+                    result = await fn(*args, **kwargs)
+                except BaseException as exc:
+                    outcome = exc
+                    raise
+                finally:
+                    self._after(outcome)
+        return result
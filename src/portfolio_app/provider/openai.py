@@ -1,8 +1,12 @@
+import asyncio
+import json
 import os
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import openai
 
+from portfolio_app.portfolio.bulk import allocations_from_payloads
 from portfolio_app.portfolio.models import (
     EconomicStatusAllocation,
     FundAssetAllocation,
@@ -15,12 +19,126 @@ from portfolio_app.portfolio.models import (
     SecurityType,
     USInternationalAllocation,
 )
+from portfolio_app.portfolio.util import chunks
 from portfolio_app.provider.base import AllocationDataClient
+from portfolio_app.provider.execution import ProviderExecutor
+
+DEFAULT_BATCH_SIZE = int(os.getenv("OPENAI_LOOKUP_BATCH_SIZE", "10"))
+DEFAULT_BATCH_RETRIES = 2
+
+# shared by every OpenAIClient so concurrent sessions stay within one quota
+OPENAI_EXECUTOR = ProviderExecutor(
+    "openai",
+    rate=float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500")) / 60,
+    retry_on=(
+        openai.error.RateLimitError,
+        openai.error.APIError,
+        openai.error.APIConnectionError,
+        openai.error.ServiceUnavailableError,
+        openai.error.Timeout,
+        openai.error.TryAgain,
+    ),
+)
+
+
+MODEL = "gpt-3.5-turbo-0613"
+# send the schema without titles and descriptions to cut request size
+SLIM_SCHEMA = os.getenv("OPENAI_SLIM_SCHEMA", "0") == "1"
+
+# prompt and function definitions are built once per process; request args
+# share them, so they must not be mutated
+ALLOCATION_INSTRUCTIONS = (
+    "Give data as an integer percentage for the funds assets (stocks vs bonds). "
+    "Give the market cap split by small/medium/large."
+    "Give usa vs international, and for regions split out if possible, "
+    "default 100 to global if there is insufficient data."
+    "Finally provide growth vs value. If it's a blend use 50-50 for growth / value."
+)
+LOOKUP_PROMPT = (
+    "Give me an asset allocation breakdown for {symbol}. " + ALLOCATION_INSTRUCTIONS
+)
+BATCH_LOOKUP_PROMPT = (
+    "Give me an asset allocation breakdown for each of these symbols: {symbols}. "
+    "Return exactly one entry per symbol. " + ALLOCATION_INSTRUCTIONS
+)
+ANSWER_STEPS = (
+    "First the name, "
+    "then the fund asset allocation percentage of stocks and bonds "
+    "(if it is a fund), "
+    "then the market cap weighting, "
+    "then percent us and international, the split by economic region "
+    "(default to global), then if it's growth or value, "
+    "and finally the economic status breakdown of the portfolio's holdings "
+    "(developed, emerging, or frontier)"
+)
+LOOKUP_FUNCTION_NAME = "get_answer_for_user_query"
+BATCH_LOOKUP_FUNCTION_NAME = "get_answers_for_user_query"
+
+
+def slim_schema(schema: Any) -> Any:
+    """
+    Copy of a JSON schema without "title" and "description" annotations.
+    Property and definition names are kept even if they are called "title".
+    """
+    if isinstance(schema, list):
+        return [slim_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    slim = {}
+    for key, value in schema.items():
+        if key in ("properties", "$defs"):
+            slim[key] = {name: slim_schema(sub) for name, sub in value.items()}
+        elif key not in ("title", "description"):
+            slim[key] = slim_schema(value)
+    return slim
+
+
+@lru_cache(maxsize=None)
+def allocation_schema(slim: bool = False) -> Dict[str, Any]:
+    schema = SecurityAllocation.model_json_schema()
+    return slim_schema(schema) if slim else schema
+
+
+@lru_cache(maxsize=None)
+def lookup_functions(slim: bool = False) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": LOOKUP_FUNCTION_NAME,
+            "description": "Get user answer in series of steps. " + ANSWER_STEPS,
+            "parameters": allocation_schema(slim),
+        }
+    ]
+
+
+@lru_cache(maxsize=None)
+def batch_lookup_functions(slim: bool = False) -> List[Dict[str, Any]]:
+    items = dict(allocation_schema(slim))
+    defs = items.pop("$defs", {})
+    return [
+        {
+            "name": BATCH_LOOKUP_FUNCTION_NAME,
+            "description": "Get user answers, one per symbol, each in series of "
+            "steps. " + ANSWER_STEPS,
+            "parameters": {
+                "type": "object",
+                "properties": {"allocations": {"type": "array", "items": items}},
+                "required": ["allocations"],
+                "$defs": defs,
+            },
+        }
+    ]
 
 
 class OpenAIClient(AllocationDataClient):
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        executor: Optional[ProviderExecutor] = None,
+        slim_schema: bool = SLIM_SCHEMA,
+    ):
         self.set_api_key(api_key or os.getenv("OPENAI_API_KEY", None))
+        self.executor = executor or OPENAI_EXECUTOR
+        self.slim_schema = slim_schema
 
     @classmethod
     def set_api_key(cls, api_key: str):
@@ -33,43 +151,130 @@ class OpenAIClient(AllocationDataClient):
 
     def _lookup_allocation_args(self, symbol: str):
         return {
-            "model": "gpt-3.5-turbo-0613",
+            "model": MODEL,
             "messages": [
-                {
-                    "role": "user",
-                    "content": f"Give me an asset allocation breakdown for {symbol}. "
-                    f"Give data as an integer percentage for the funds assets (stocks vs bonds). "
-                    f"Give the market cap split by small/medium/large."
-                    f"Give usa vs international, and for regions split out if possible, default 100 to global if there is insufficient data."
-                    f"Finally provide growth vs value. If it's a blend use 50-50 for growth / value.",
-                }
+                {"role": "user", "content": LOOKUP_PROMPT.format(symbol=symbol)}
             ],
-            "functions": [
+            "functions": lookup_functions(self.slim_schema),
+            "function_call": {"name": LOOKUP_FUNCTION_NAME},
+        }
+
+    def _lookup_allocations_args(self, symbols: List[str]):
+        return {
+            "model": MODEL,
+            "messages": [
                 {
-                    "name": "get_answer_for_user_query",
-                    "description": "Get user answer in series of steps. "
-                    "First the name, "
-                    "then the fund asset allocation percentage of stocks and bonds (if it is a fund), "
-                    "then the market cap weighting, "
-                    "then percent us and international, the split by economic region (default to global), then if it's growth or value, "
-                    "and finally the economic status breakdown of the portfolio's holdings "
-                    "(developed, emerging, or frontier)",
-                    "parameters": SecurityAllocation.model_json_schema(),
+                    "role": "user",
+                    "content": BATCH_LOOKUP_PROMPT.format(symbols=", ".join(symbols)),
                 }
             ],
-            "function_call": {"name": "get_answer_for_user_query"},
+            "functions": batch_lookup_functions(self.slim_schema),
+            "function_call": {"name": BATCH_LOOKUP_FUNCTION_NAME},
         }
 
+    def _parse_allocations(
+        self, response: Any, symbols: List[str]
+    ) -> Tuple[Dict[str, SecurityAllocation], List[str]]:
+        """
+        Validate every returned element on its own so one bad entry does not
+        discard the rest of the batch. Returns the valid allocations keyed by
+        requested symbol and the symbols that still need an answer.
+        """
+        requested = {symbol.upper(): symbol for symbol in symbols}
+        found: Dict[str, SecurityAllocation] = {}
+        try:
+            payload = json.loads(
+                response.choices[0]["message"]["function_call"]["arguments"]
+            )
+            items = payload.get("allocations", [])
+        except (ValueError, KeyError, IndexError, AttributeError) as e:
+            print(f"Unreadable batch response for {symbols}: {e}")
+            items = []
+        for allocation in allocations_from_payloads(items):
+            if allocation is None:
+                continue
+            symbol = requested.get(allocation.symbol.upper())
+            if symbol and symbol not in found:
+                found[symbol] = allocation
+        return found, [symbol for symbol in symbols if symbol not in found]
+
+    def lookup_allocations(
+        self,
+        symbols: Iterable[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_retries: int = DEFAULT_BATCH_RETRIES,
+    ) -> Dict[str, SecurityAllocation]:
+        """
+        Look up `batch_size` symbols per request. Only symbols whose entries
+        are missing or fail validation are retried, as are whole batches
+        whose request failed; symbols still failing after `max_retries`
+        rounds are left out of the result.
+        """
+        results: Dict[str, SecurityAllocation] = {}
+        pending = list(dict.fromkeys(symbols))
+        for _ in range(max_retries + 1):
+            failed: List[str] = []
+            for batch in chunks(pending, batch_size):
+                try:
+                    response = self.executor.call(
+                        openai.ChatCompletion.create,
+                        **self._lookup_allocations_args(batch),
+                    )
+                except Exception as e:
+                    print(f"Batch lookup failed for {batch}: {e}")
+                    failed.extend(batch)
+                    continue
+                found, missing = self._parse_allocations(response, batch)
+                results.update(found)
+                failed.extend(missing)
+            if not failed:
+                break
+            pending = failed
+        return results
+
+    async def lookup_allocations_async(
+        self,
+        symbols: Iterable[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_retries: int = DEFAULT_BATCH_RETRIES,
+    ) -> Dict[str, SecurityAllocation]:
+        async def lookup_batch(batch: List[str]):
+            try:
+                response = await self.executor.call_async(
+                    openai.ChatCompletion.acreate,
+                    **self._lookup_allocations_args(batch),
+                )
+            except Exception as e:
+                print(f"Batch lookup failed for {batch}: {e}")
+                return {}, batch
+            return self._parse_allocations(response, batch)
+
+        results: Dict[str, SecurityAllocation] = {}
+        pending = list(dict.fromkeys(symbols))
+        for _ in range(max_retries + 1):
+            failed: List[str] = []
+            for found, missing in await asyncio.gather(
+                *(lookup_batch(batch) for batch in chunks(pending, batch_size))
+            ):
+                results.update(found)
+                failed.extend(missing)
+            if not failed:
+                break
+            pending = failed
+        return results
+
     def lookup_allocation(self, symbol: str):
-        response = openai.ChatCompletion.create(**self._lookup_allocation_args(symbol))
+        response = self.executor.call(
+            openai.ChatCompletion.create, **self._lookup_allocation_args(symbol)
+        )
         print(response)
         return SecurityAllocation.model_validate_json(
             response.choices[0]["message"]["function_call"]["arguments"]
         )
 
     async def lookup_allocation_async(self, symbol: str):
-        response = await openai.ChatCompletion.acreate(
-            **self._lookup_allocation_args(symbol)
+        response = await self.executor.call_async(
+            openai.ChatCompletion.acreate, **self._lookup_allocation_args(symbol)
         )
         return SecurityAllocation.model_validate_json(
             response.choices[0]["message"]["function_call"]["arguments"]
@@ -119,3 +324,6 @@ class MockOpenAIClient(AllocationDataClient):
                 health_care=50,
             ),
         )
+
+    async def lookup_allocation_async(self, symbol: str) -> SecurityAllocation:
+        return self.lookup_allocation(symbol)
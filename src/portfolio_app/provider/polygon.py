@@ -1,28 +1,195 @@
-from datetime import date
-from typing import Tuple
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
 import requests
-from portfolio_app.provider.base import LastPriceProviderClient
+from requests.adapters import HTTPAdapter
+from portfolio_app.provider.base import (
+    BAR_FIELDS,
+    DailyBarsProviderClient,
+    LastPriceProviderClient,
+)
+from portfolio_app.provider.execution import (
+    ProviderError,
+    ProviderExecutor,
+    TransientProviderError,
+)
 
+# the free Polygon tier allows 5 requests per minute
+POLYGON_EXECUTOR = ProviderExecutor(
+    "polygon",
+    rate=float(os.getenv("POLYGON_REQUESTS_PER_MINUTE", "5")) / 60,
+    burst=5,
+    retry_on=(
+        TransientProviderError,
+        requests.ConnectionError,
+        requests.Timeout,
+    ),
+)
 
-class PolygonClient(LastPriceProviderClient):
+
+# aggregate result keys of each BAR_FIELDS field
+_BAR_KEYS = dict(zip(BAR_FIELDS, ("o", "h", "l", "c", "v")))
+_MS_PER_DAY = 86_400_000
+
+
+class PolygonClient(LastPriceProviderClient, DailyBarsProviderClient):
     API_ROOT = "https://api.polygon.io/v2"
+    # most bars one range aggregate request returns
+    AGGREGATES_LIMIT = 50_000
+    # how far back to look for a published grouped-daily session (holidays)
+    GROUPED_LOOKBACK_DAYS = 5
+    POOL_SIZE = 16
+    TIMEOUT_SECONDS = 10
 
-    def __init__(self, polygon_api_key=None) -> None:
+    def __init__(
+        self,
+        polygon_api_key=None,
+        api_root: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        executor: Optional[ProviderExecutor] = None,
+    ) -> None:
         self.polygon_api_key = polygon_api_key
+        self.api_root = api_root or self.API_ROOT
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        self.executor = executor or POLYGON_EXECUTOR
+        # (symbol, trading date) -> close, filled by grouped and single lookups
+        self._quotes: Dict[Tuple[str, date], float] = {}
+        # requested trading date -> date of the session actually published
+        self._sessions: Dict[date, Optional[date]] = {}
 
+    @staticmethod
     def _as_of_date(unix_ts_ms: int) -> date:
         return date.fromtimestamp(unix_ts_ms / 1000)
 
+    @staticmethod
+    def _previous_trading_day(day: date) -> date:
+        """The weekday before `day`; `/prev` and grouped data lag by a session."""
+        day -= timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        return day
+
+    def _request(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        response = self.session.get(
+            f"{self.api_root}{path}",
+            params={
+                "adjusted": "true",
+                "apiKey": self.polygon_api_key,
+                **(params or {}),
+            },
+            timeout=self.TIMEOUT_SECONDS,
+        )
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientProviderError(
+                f"Polygon returned {response.status_code} for {path}"
+            )
+        return response.json()
+
+    def _get(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return self.executor.call(self._request, path, params)
+
     def last_price(self, symbol: str) -> Tuple[date, float]:
         """
         https://polygon.io/docs/stocks/get_v2_aggs_ticker__stocksticker__prev
         """
-        res = requests.get(
-            f"{self.API_ROOT}/aggs/ticker/{symbol}/prev?adjusted=true&apiKey={self.polygon_api_key}"
-        ).json()
-        if res["status"] != "OK":
-            raise Exception(f"Failed to get last price for {symbol}")
-        return self._as_of_date(res["results"][0]["t"]), res["results"][0]["c"]
+        trading_day = self._previous_trading_day(date.today())
+        session_day = self._sessions.get(trading_day, trading_day)
+        if (symbol, session_day) in self._quotes:
+            return session_day, self._quotes[(symbol, session_day)]
+        res = self._get(f"/aggs/ticker/{symbol}/prev")
+        if res["status"] != "OK" or not res.get("results"):
+            raise ProviderError(f"Failed to get last price for {symbol}")
+        as_of = self._as_of_date(res["results"][0]["t"])
+        close = res["results"][0]["c"]
+        self._quotes[(symbol, as_of)] = close
+        self._quotes[(symbol, session_day)] = close
+        return as_of, close
+
+    def _load_grouped_daily(self, trading_day: date) -> Optional[date]:
+        """
+        Load the whole market's closes for the latest published session on or
+        before `trading_day` with one request per day tried.
+        https://polygon.io/docs/stocks/get_v2_aggs_grouped_locale_us_market_stocks__date
+        """
+        if trading_day in self._sessions:
+            return self._sessions[trading_day]
+        day = trading_day
+        session_day = None
+        for _ in range(self.GROUPED_LOOKBACK_DAYS):
+            res = self._get(f"/aggs/grouped/locale/us/market/stocks/{day.isoformat()}")
+            if res.get("status") == "OK" and res.get("results"):
+                for result in res["results"]:
+                    self._quotes[(result["T"], day)] = result["c"]
+                session_day = day
+                break
+            day = self._previous_trading_day(day)
+        self._sessions[trading_day] = session_day
+        return session_day
+
+    def last_prices(self, symbols: Iterable[str]) -> Dict[str, Tuple[date, float]]:
+        """
+        Price many symbols with one grouped-daily request for the whole
+        market. Symbols the grouped endpoint does not cover (e.g. mutual
+        funds) fall back to per-symbol `/prev` lookups on the pooled session.
+        Symbols that cannot be priced are left out of the result.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        trading_day = self._previous_trading_day(date.today())
+        session_day = self._sessions.get(trading_day, trading_day)
+        if any((symbol, session_day) not in self._quotes for symbol in symbols):
+            try:
+                session_day = self._load_grouped_daily(trading_day) or trading_day
+            except (ProviderError, requests.RequestException) as e:
+                print(f"Grouped daily lookup failed, pricing per symbol: {e}")
+        prices = {}
+        for symbol in symbols:
+            if (symbol, session_day) in self._quotes:
+                prices[symbol] = session_day, self._quotes[(symbol, session_day)]
+                continue
+            try:
+                prices[symbol] = self.last_price(symbol)
+            except (ProviderError, requests.RequestException) as e:
+                print(f"Failed to price {symbol}: {e}")
+        return prices
+
+    def daily_bars(
+        self, symbol: str, start: date, end: date
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Daily bars from one range aggregate request. Bar timestamps are the
+        session's midnight in New York, which is the same date in UTC.
+        https://polygon.io/docs/stocks/get_v2_aggs_ticker__stocksticker__range__multiplier___timespan___from___to
+        """
+        if end < start:
+            return np.empty(0, dtype="datetime64[D]"), {
+                field: np.empty(0) for field in BAR_FIELDS
+            }
+        res = self._get(
+            f"/aggs/ticker/{symbol}/range/1/day/{start.isoformat()}/{end.isoformat()}",
+            {"sort": "asc", "limit": self.AGGREGATES_LIMIT},
+        )
+        if res.get("status") not in ("OK", "DELAYED"):
+            raise ProviderError(f"Failed to get daily bars for {symbol}")
+        results = res.get("results") or []
+        days = np.array(
+            [result["t"] // _MS_PER_DAY for result in results], dtype=np.int64
+        ).astype("datetime64[D]")
+        return days, {
+            field: np.array(
+                [result.get(key, np.nan) for result in results], dtype=np.float64
+            )
+            for field, key in _BAR_KEYS.items()
+        }
 
 
 class MockPolygonClient(LastPriceProviderClient):
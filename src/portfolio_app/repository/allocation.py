@@ -1,61 +1,340 @@
-from typing import Dict
+import asyncio
+import concurrent.futures
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from portfolio_app.portfolio.models import SecurityAllocation
+from portfolio_app.portfolio.util import chunks
+from portfolio_app.provider.base import AllocationDataClient
+from portfolio_app.provider.execution import ProviderError
 from portfolio_app.provider.openai import OpenAIClient
+from portfolio_app.repository.cache import DiskAllocationCache
+from portfolio_app.repository.securities import SecurityDataRepository
+from portfolio_app.repository.singleflight import SingleFlight
+
+DEFAULT_LOOKUP_CONCURRENCY = int(os.getenv("ALLOCATION_LOOKUP_CONCURRENCY", "8"))
+# symbols per provider request; above 1 uses the client's batched lookup
+DEFAULT_LOOKUP_BATCH_SIZE = int(os.getenv("ALLOCATION_LOOKUP_BATCH_SIZE", "1"))
+# cached allocations older than this are served but refreshed in the background
+DEFAULT_MAX_AGE = timedelta(days=int(os.getenv("ALLOCATION_MAX_AGE_DAYS", "7")))
+# background refreshes outlive the script run that scheduled them
+REFRESH_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="allocation-refresh"
+)
 
 
 class AllocationCache:
     """
-    Facade of multiple caches to guarantee access to repeated data
+    Facade of multiple caches to guarantee access to repeated data.
+
+    Lookups go to the in-process dict, then the browser session, then the
+    persistent disk tier. Hits from a slower tier are promoted to the faster
+    ones. When each entry was last fetched is tracked so callers can decide
+    whether it needs refreshing.
     """
 
-    def __init__(self):
+    def __init__(self, disk_cache: Optional[DiskAllocationCache] = None):
         self.cache: Dict[str, SecurityAllocation] = {}
-        st.session_state["allocation_cache"] = {}
+        # symbol -> epoch seconds the allocation was fetched from its source
+        self.modified_at: Dict[str, float] = {}
+        self.disk_cache = disk_cache
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _session_cache() -> Optional[Dict[str, Tuple[SecurityAllocation, float]]]:
+        """
+        The current session's symbol -> (allocation, modified_at) entries.
+        None outside a script run, e.g. on a background refresh thread, where
+        st.session_state is a throwaway copy; the in-process dict covers it.
+        """
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return None
+        if "allocation_cache" not in st.session_state:
+            st.session_state["allocation_cache"] = {}
+        return st.session_state["allocation_cache"]
 
-    def get(self, symbol: str) -> SecurityAllocation:
+    def get(self, symbol: str) -> Optional[SecurityAllocation]:
         if symbol in self.cache:
+            self.memory_hits += 1
             return self.cache[symbol]
-        session_cache = st.session_state.get("allocation_cache", {})
-        if symbol in session_cache:
-            return session_cache[symbol]
+        session_cache = self._session_cache()
+        if session_cache and symbol in session_cache:
+            self.memory_hits += 1
+            allocation, modified_at = session_cache[symbol]
+            self.cache[symbol] = allocation
+            self.modified_at[symbol] = modified_at
+            return allocation
+        if self.disk_cache:
+            entry = self.disk_cache.get_entry(symbol)
+            if entry:
+                allocation, modified_at = entry
+                self.disk_hits += 1
+                self._set_memory(symbol, allocation, modified_at)
+                return allocation
+        self.misses += 1
         return None
 
+    def peek(self, symbol: str) -> Optional[SecurityAllocation]:
+        """In-process lookup that does not touch the hit/miss counters."""
+        return self.cache.get(symbol)
+
     def exists(self, symbol: str) -> bool:
-        if symbol in self.cache:
-            return True
-        session_cache = st.session_state.get("allocation_cache", {})
-        if symbol in session_cache:
-            return True
-        return False
+        return self.get(symbol) is not None
+
+    def age(self, symbol: str) -> Optional[float]:
+        """Seconds since the entry was fetched, if known."""
+        modified_at = self.modified_at.get(symbol)
+        return None if modified_at is None else time.time() - modified_at
 
-    def set(self, symbol: str, allocation: SecurityAllocation) -> None:
+    def _set_memory(
+        self,
+        symbol: str,
+        allocation: SecurityAllocation,
+        modified_at: Optional[datetime] = None,
+    ) -> None:
+        timestamp = modified_at.timestamp() if modified_at else time.time()
         self.cache[symbol] = allocation
-        session_cache = st.session_state.get("allocation_cache", {})
-        session_cache[symbol] = allocation
-        st.session_state["allocation_cache"] = session_cache
+        self.modified_at[symbol] = timestamp
+        session_cache = self._session_cache()
+        if session_cache is not None:
+            session_cache[symbol] = (allocation, timestamp)
+
+    def set(
+        self,
+        symbol: str,
+        allocation: SecurityAllocation,
+        modified_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Store an allocation in every tier. `modified_at` is when the source
+        data was written and defaults to now.
+        """
+        self._set_memory(symbol, allocation, modified_at)
+        if self.disk_cache:
+            self.disk_cache.set(symbol, allocation, modified_at)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
 
 
 class AllocationLookupService:
-    def __init__(self):
-        self.cache = AllocationCache()
-        api_key = st.session_state.get("openai_api_key")
-        if api_key:
-            print("Using OpenAI API Key from session state")
-        self.openai_client = OpenAIClient(api_key=api_key)
+    def __init__(
+        self,
+        allocation_client: Optional[AllocationDataClient] = None,
+        max_concurrency: int = DEFAULT_LOOKUP_CONCURRENCY,
+        cache: Optional[AllocationCache] = None,
+        repository: Optional[SecurityDataRepository] = None,
+        batch_size: int = DEFAULT_LOOKUP_BATCH_SIZE,
+        max_age: Optional[timedelta] = DEFAULT_MAX_AGE,
+    ):
+        self.cache = cache or AllocationCache(disk_cache=DiskAllocationCache.from_env())
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.max_age = max_age
+        if allocation_client:
+            self.openai_client = allocation_client
+        else:
+            api_key = st.session_state.get("openai_api_key")
+            if api_key:
+                print("Using OpenAI API Key from session state")
+            self.openai_client = OpenAIClient(api_key=api_key)
+        self.repository = repository or SecurityDataRepository.from_env(
+            allocation_client=self.openai_client
+        )
+        # provider calls in flight, shared by every thread and event loop
+        self._in_flight = SingleFlight()
+        self._refreshes: List[concurrent.futures.Future] = []
+
+    def _revalidate(self, symbol: str) -> None:
+        """
+        Stale-while-revalidate: callers keep the cached allocation, and one
+        background refresh per symbol is scheduled once it is older than
+        `max_age`.
+        """
+        age = self.cache.age(symbol)
+        if self.max_age is None or age is None or age < self.max_age.total_seconds():
+            return
+        _, leader = self._in_flight.claim(("refresh", symbol))
+        if not leader:
+            return
+        self._refreshes = [future for future in self._refreshes if not future.done()]
+        self._refreshes.append(REFRESH_POOL.submit(self._refresh, symbol))
+
+    def _refresh(self, symbol: str) -> Optional[SecurityAllocation]:
+        allocation = None
+        try:
+            allocation = self.openai_client.lookup_allocation(symbol=symbol)
+            self.cache.set(symbol=symbol, allocation=allocation)
+            if self.repository:
+                self.repository.upsert_many_securities([allocation])
+        except Exception as e:
+            print(f"Background refresh failed for {symbol}: {e}")
+        self._in_flight.resolve(("refresh", symbol), allocation)
+        return allocation
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        concurrent.futures.wait(list(self._refreshes), timeout=timeout)
 
     def get_allocations_by_symbol(self, symbol: str) -> SecurityAllocation:
-        if self.cache.exists(symbol):
-            return self.cache.get(symbol)
+        cached = self.cache.get(symbol)
+        if cached:
+            self._revalidate(symbol)
+            return cached
+
+        def fetch() -> SecurityAllocation:
+            cached = self.cache.peek(symbol)
+            if cached:
+                return cached
+            response = self.openai_client.lookup_allocation(symbol=symbol)
+            self.cache.set(symbol=symbol, allocation=response)
+            return response
 
-        response = self.openai_client.lookup_allocation(symbol=symbol)
-        self.cache.set(symbol=symbol, allocation=response)
-        return response
+        return self._in_flight.do(symbol, fetch)
 
     async def get_allocations_by_symbol_async(self, symbol: str) -> SecurityAllocation:
-        if self.cache.exists(symbol):
-            return self.cache.get(symbol)
+        cached = self.cache.get(symbol)
+        if cached:
+            self._revalidate(symbol)
+            return cached
+        return await self._fetch_async(symbol)
+
+    async def _fetch_async(self, symbol: str) -> SecurityAllocation:
+        """
+        Provider lookup for one symbol. Concurrent callers for the same
+        symbol, from any thread or task, share a single provider call.
+        """
+
+        async def fetch() -> SecurityAllocation:
+            cached = self.cache.peek(symbol)
+            if cached:
+                return cached
+            response = await self.openai_client.lookup_allocation_async(symbol=symbol)
+            self.cache.set(symbol=symbol, allocation=response)
+            return response
+
+        return await self._in_flight.do_async(symbol, fetch)
+
+    async def _fetch_many_async(
+        self, symbols: List[str]
+    ) -> Dict[str, SecurityAllocation]:
+        """
+        Batched provider lookup. Symbols already in flight elsewhere are
+        awaited rather than requested again; the rest go out in one call.
+        """
+        results: Dict[str, SecurityAllocation] = {}
+        waiting = {}
+        owned = []
+        for symbol in symbols:
+            future, leader = self._in_flight.claim(symbol)
+            if not leader:
+                waiting[symbol] = future
+            elif self.cache.peek(symbol):
+                results[symbol] = self.cache.peek(symbol)
+                self._in_flight.resolve(symbol, results[symbol])
+            else:
+                owned.append(symbol)
+
+        if owned:
+            try:
+                response = await self.openai_client.lookup_allocations_async(owned)
+            except BaseException as exc:
+                for symbol in owned:
+                    self._in_flight.fail(symbol, exc)
+                raise
+            for symbol in owned:
+                allocation = response.get(symbol)
+                if allocation is None:
+                    # single-symbol followers expect an allocation or an error
+                    self._in_flight.fail(
+                        symbol, ProviderError(f"No allocation returned for {symbol}")
+                    )
+                    continue
+                self.cache.set(symbol=symbol, allocation=allocation)
+                results[symbol] = allocation
+                self._in_flight.resolve(symbol, allocation)
+
+        for symbol, future in waiting.items():
+            try:
+                results[symbol] = await asyncio.wrap_future(future)
+            except Exception as e:
+                print(f"Allocation lookup failed for {symbol}: {e}")
+        return results
+
+    async def get_many_allocations_async(
+        self,
+        symbols: Iterable[str],
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, SecurityAllocation], None]] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, SecurityAllocation]:
+        """
+        Look up allocations for many symbols at once. Cache hits are returned
+        immediately (stale ones are refreshed in the background), then the
+        remaining symbols are read from the repository in bulk; what is
+        still missing is sent to the provider concurrently, `batch_size`
+        symbols per request and at most `max_concurrency` requests at a
+        time, and written back to the repository in one upsert. Symbols the
+        provider could not answer, or whose lookup failed, are left out so
+        one failing call does not sink the rest. `on_result` is called as
+        each allocation becomes available, in completion order.
+        """
+        results: Dict[str, SecurityAllocation] = {}
+        misses = []
+        for symbol in dict.fromkeys(symbols):
+            cached = self.cache.get(symbol)
+            if cached:
+                self._revalidate(symbol)
+                results[symbol] = cached
+                if on_result:
+                    on_result(symbol, results[symbol])
+            else:
+                misses.append(symbol)
+
+        if misses and self.repository:
+            stored = await asyncio.to_thread(
+                self.repository.get_many_security_entries, misses
+            )
+            for symbol, (allocation, modified_at) in stored.items():
+                self.cache.set(
+                    symbol=symbol, allocation=allocation, modified_at=modified_at
+                )
+                self._revalidate(symbol)
+                results[symbol] = allocation
+                if on_result:
+                    on_result(symbol, allocation)
+            misses = [symbol for symbol in misses if symbol not in results]
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def lookup(batch: List[str]) -> Dict[str, SecurityAllocation]:
+            async with semaphore:
+                try:
+                    if len(batch) == 1:
+                        return {batch[0]: await self._fetch_async(batch[0])}
+                    return await self._fetch_many_async(batch)
+                except Exception as e:
+                    print(f"Allocation lookup failed for {batch}: {e}")
+                    return {}
+
+        batches = chunks(misses, batch_size or self.batch_size)
+        for future in asyncio.as_completed([lookup(batch) for batch in batches]):
+            for symbol, allocation in (await future).items():
+                if allocation is None:
+                    continue
+                results[symbol] = allocation
+                if on_result:
+                    on_result(symbol, allocation)
 
-        response = await self.openai_client.lookup_allocation_async(symbol=symbol)
-        self.cache.set(symbol=symbol, allocation=response)
-        return response
+        fetched = [results[symbol] for symbol in misses if symbol in results]
+        if fetched and self.repository:
+            await asyncio.to_thread(self.repository.upsert_many_securities, fetched)
+        return results
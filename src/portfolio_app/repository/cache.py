@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from portfolio_app.portfolio.models import SecurityAllocation
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "portfolio-app", "allocations.sqlite3"
+)
+DEFAULT_TTL = timedelta(days=int(os.getenv("ALLOCATION_CACHE_TTL_DAYS", "30")))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ALLOCATION_CACHE_MAX_ENTRIES", "10000"))
+
+
+class DiskAllocationCache:
+    """
+    SQLite backed allocation cache that survives restarts and is shared by
+    every session on the machine. Entries expire `ttl` after their
+    `modified_at`, and the least recently used entries are evicted once the
+    cache holds more than `max_entries`. The size is only checked every
+    `max_entries // 100` writes, so it can briefly run over by that many.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl: timedelta = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # writes between size checks, and writes since the last one
+        self._evict_interval = max(max_entries // 100, 1)
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS allocations ("
+            "symbol TEXT PRIMARY KEY, "
+            "payload TEXT NOT NULL, "
+            "modified_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS allocations_accessed_at "
+            "ON allocations (accessed_at)"
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["DiskAllocationCache"]:
+        """
+        Build the cache configured by ALLOCATION_CACHE_PATH. Setting the
+        variable to an empty string disables the disk tier.
+        """
+        path = os.getenv("ALLOCATION_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if not path:
+            return None
+        return cls(path=path)
+
+    def _expired(self, modified_at: float, now: float) -> bool:
+        return now - modified_at > self.ttl.total_seconds()
+
+    def get(self, symbol: str) -> Optional[SecurityAllocation]:
+        entry = self.get_entry(symbol)
+        return entry[0] if entry else None
+
+    def get_entry(self, symbol: str) -> Optional[Tuple[SecurityAllocation, datetime]]:
+        """The cached allocation together with its `modified_at`."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, modified_at FROM allocations WHERE symbol = ?",
+                (symbol,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            payload, modified_at = row
+            if self._expired(modified_at, now):
+                self._conn.execute(
+                    "DELETE FROM allocations WHERE symbol = ?", (symbol,)
+                )
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE allocations SET accessed_at = ? WHERE symbol = ?",
+                (now, symbol),
+            )
+            self.hits += 1
+        return (
+            SecurityAllocation.model_validate_json(payload),
+            datetime.fromtimestamp(modified_at),
+        )
+
+    def set(
+        self,
+        symbol: str,
+        allocation: SecurityAllocation,
+        modified_at: Optional[datetime] = None,
+    ) -> None:
+        now = time.time()
+        modified_ts = modified_at.timestamp() if modified_at else now
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO allocations "
+                "(symbol, payload, modified_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (symbol, allocation.model_dump_json(), modified_ts, now),
+            )
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self._evict_interval:
+                self._evict()
+
+    def _evict(self) -> None:
+        self._writes_since_evict = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM allocations").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM allocations WHERE symbol IN ("
+                "SELECT symbol FROM allocations ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def delete(self, symbol: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM allocations WHERE symbol = ?", (symbol,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM allocations")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM allocations").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
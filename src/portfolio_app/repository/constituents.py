@@ -0,0 +1,171 @@
+"""
+Fund constituent weights as a sparse funds x stocks matrix.
+
+The source is a local CSV with one row per fund holding, `fund,symbol,weight`
+with the weight in percent of the fund, as published in fund holdings
+files. Parsing a few million rows takes seconds, so the parsed matrix is
+cached next to the CSV as `<csv>.npz` and reused until the CSV changes.
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DEFAULT_CONSTITUENTS_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "portfolio-app", "constituents.csv"
+)
+CACHE_SUFFIX = ".npz"
+
+
+class ConstituentIndex:
+    """
+    Weight of every constituent stock in every fund, as fractions of the
+    fund, in a CSR matrix with one row per fund. Only stored weights take
+    memory, so funds with thousands of names cost a few bytes per name.
+    """
+
+    def __init__(
+        self, funds: Sequence[str], stocks: Sequence[str], weights: sparse.csr_matrix
+    ):
+        self.funds: List[str] = list(funds)
+        self.stocks: List[str] = list(stocks)
+        self.weights = sparse.csr_matrix(weights)
+        self._fund_index: Dict[str, int] = {f: i for i, f in enumerate(self.funds)}
+        self._stock_index: Dict[str, int] = {s: i for i, s in enumerate(self.stocks)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ConstituentIndex":
+        """Build from `fund`, `symbol` and `weight` (percent) columns."""
+        fund_codes, funds = pd.factorize(df["fund"], sort=True)
+        stock_codes, stocks = pd.factorize(df["symbol"], sort=True)
+        weights = sparse.coo_matrix(
+            (
+                df["weight"].to_numpy(dtype=np.float64) / 100,
+                (fund_codes, stock_codes),
+            ),
+            shape=(len(funds), len(stocks)),
+        ).tocsr()  # duplicate rows are summed
+        weights.eliminate_zeros()
+        return cls(funds.tolist(), stocks.tolist(), weights)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ConstituentIndex":
+        df = pd.read_csv(
+            path,
+            usecols=["fund", "symbol", "weight"],
+            dtype={"fund": str, "symbol": str, "weight": np.float64},
+        )
+        return cls.from_frame(df.dropna())
+
+    def save(self, path: str) -> None:
+        """Write the index as an uncompressed npz, moved into place."""
+        tmp_path = f"{path}.tmp{CACHE_SUFFIX}"
+        np.savez(
+            tmp_path,
+            funds=np.array(self.funds, dtype=str),
+            stocks=np.array(self.stocks, dtype=str),
+            data=self.weights.data,
+            indices=self.weights.indices,
+            indptr=self.weights.indptr,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_cache(cls, path: str) -> "ConstituentIndex":
+        with np.load(path, allow_pickle=False) as cached:
+            funds, stocks = cached["funds"].tolist(), cached["stocks"].tolist()
+            weights = sparse.csr_matrix(
+                (cached["data"], cached["indices"], cached["indptr"]),
+                shape=(len(funds), len(stocks)),
+            )
+        return cls(funds, stocks, weights)
+
+    @classmethod
+    def load(cls, path: str) -> "ConstituentIndex":
+        """
+        Load the CSV at `path`, from its cache when that is newer than the
+        CSV. A missing or stale cache is rebuilt.
+        """
+        cache_path = path + CACHE_SUFFIX
+        if os.path.exists(cache_path) and os.path.getmtime(
+            cache_path
+        ) >= os.path.getmtime(path):
+            return cls.from_cache(cache_path)
+        index = cls.from_csv(path)
+        try:
+            index.save(cache_path)
+        except OSError as e:
+            print(f"Could not cache constituents at {cache_path}: {e}")
+        return index
+
+    @classmethod
+    def from_env(cls) -> Optional["ConstituentIndex"]:
+        """
+        Load the CSV configured by CONSTITUENTS_PATH, if it exists. Setting
+        the variable to an empty string disables look-through.
+        """
+        path = os.getenv("CONSTITUENTS_PATH", DEFAULT_CONSTITUENTS_PATH)
+        if not path or not os.path.exists(path):
+            return None
+        return cls.load(path)
+
+    def __contains__(self, fund: object) -> bool:
+        return fund in self._fund_index
+
+    def __len__(self) -> int:
+        return len(self.funds)
+
+    def constituents(self, fund: str) -> pd.Series:
+        """Weights of one fund's constituents, largest first."""
+        row = self.weights[self._fund_index[fund]]
+        return pd.Series(
+            row.data, index=[self.stocks[i] for i in row.indices], name=fund
+        ).sort_values(ascending=False)
+
+    def exposure_matrix(
+        self, symbols: Iterable[str]
+    ) -> Tuple[sparse.csr_matrix, List[str]]:
+        """
+        Holdings x stocks matrix of what one dollar of each holding owns, and
+        its column labels. Funds in the index own their constituents; any
+        other holding owns itself, adding a column if it is not already a
+        constituent of some fund.
+        """
+        symbols = list(symbols)
+        stocks = list(self.stocks)
+        stock_index = dict(self._stock_index)
+        fund_rows, direct_rows, direct_columns = [], [], []
+        positions = np.empty(len(symbols), dtype=np.intp)
+        for position, symbol in enumerate(symbols):
+            row = self._fund_index.get(symbol)
+            if row is not None:
+                positions[position] = len(fund_rows)
+                fund_rows.append(row)
+                continue
+            column = stock_index.get(symbol)
+            if column is None:
+                column = stock_index[symbol] = len(stocks)
+                stocks.append(symbol)
+            positions[position] = -1 - len(direct_rows)
+            direct_rows.append(position)
+            direct_columns.append(column)
+
+        funds = self.weights[fund_rows]
+        funds = sparse.csr_matrix(
+            (funds.data, funds.indices, funds.indptr),
+            shape=(len(fund_rows), len(stocks)),
+        )
+        direct = sparse.csr_matrix(
+            (
+                np.ones(len(direct_rows)),
+                np.array(direct_columns, dtype=np.int32),
+                np.arange(len(direct_rows) + 1, dtype=np.int32),
+            ),
+            shape=(len(direct_rows), len(stocks)),
+        )
+        # funds first, then direct holdings; reorder rows to follow `symbols`
+        order = np.where(positions >= 0, positions, len(fund_rows) - 1 - positions)
+        return sparse.vstack([funds, direct], format="csr")[order], stocks
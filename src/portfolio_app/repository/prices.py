@@ -0,0 +1,252 @@
+"""
+Daily OHLCV history on local disk, memory-mapped for reading.
+
+Every symbol and field is one raw float64 file, `<root>/<symbol>/<field>.f64`,
+with row `i` holding the bar for the i-th weekday on or after the store's
+start date. All symbols share that weekday calendar, so a date range is the
+same row range in every file and reading it is a slice of a memory map.
+Market holidays and days before a symbol's first bar are NaN.
+
+Files only grow: `update` requests bars from the day after a symbol's last
+stored bar and appends them, so later runs fetch only the missing days.
+"""
+
+import json
+import os
+import re
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import requests
+
+from portfolio_app.provider.base import BAR_FIELDS, DailyBarsProviderClient
+from portfolio_app.provider.execution import ProviderError
+
+DEFAULT_PRICE_STORE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "portfolio-app", "prices"
+)
+# history backfilled for a new store
+DEFAULT_HISTORY_YEARS = int(os.getenv("PRICE_STORE_HISTORY_YEARS", "10"))
+PRICE_STORE_VERSION = 1
+_METADATA_FILE = "meta.json"
+_EXTENSION = ".f64"
+_ROW_BYTES = np.dtype(np.float64).itemsize
+# a symbol's directory name; "/" (as in BRK/B) is stored as "_"
+_TICKER = re.compile(r"[A-Za-z0-9][A-Za-z0-9.:/_-]*")
+
+DateLike = Union[date, np.datetime64, str]
+
+
+def _day(value: DateLike) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+class PriceStore:
+    """
+    Memory-mapped daily bars for many symbols on a shared weekday calendar.
+    Arrays returned by `column` and `read` are read-only views of the files.
+    Nothing is written to `root` until the first bars are appended.
+    """
+
+    def __init__(self, root: str = DEFAULT_PRICE_STORE_PATH, start: DateLike = None):
+        self.root = root
+        metadata_path = os.path.join(root, _METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            if metadata["version"] > PRICE_STORE_VERSION:
+                raise ValueError(
+                    f"Unsupported price store version {metadata['version']}"
+                )
+            self.start = _day(metadata["start"])
+        else:
+            if start is None:
+                start = date.today() - timedelta(days=365 * DEFAULT_HISTORY_YEARS)
+            self.start = np.busday_offset(_day(start), 0, roll="forward")
+        # (symbol, field) -> memory map of the rows stored when it was opened
+        self._maps: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["PriceStore"]:
+        """
+        Open the store configured by PRICE_STORE_PATH, if it has been created
+        by an `update`. Setting the variable to an empty string disables it.
+        """
+        path = os.getenv("PRICE_STORE_PATH", DEFAULT_PRICE_STORE_PATH)
+        if not path or not os.path.exists(os.path.join(path, _METADATA_FILE)):
+            return None
+        return cls(path)
+
+    def _create(self) -> None:
+        """Write the store's metadata, fixing its start date, if missing."""
+        metadata_path = os.path.join(self.root, _METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            os.makedirs(self.root, exist_ok=True)
+            with open(metadata_path, "w") as f:
+                json.dump({"version": PRICE_STORE_VERSION, "start": str(self.start)}, f)
+
+    def _path(self, symbol: str, field: str) -> str:
+        if not _TICKER.fullmatch(symbol):
+            raise ValueError(f"Not a ticker symbol: {symbol!r}")
+        return os.path.join(self.root, symbol.replace("/", "_"), field + _EXTENSION)
+
+    def row(self, day: DateLike) -> int:
+        """Row of `day`, or of the next weekday when `day` is a weekend."""
+        return int(np.busday_count(self.start, _day(day)))
+
+    def dates(self, start_row: int = 0, end_row: Optional[int] = None) -> np.ndarray:
+        """Calendar dates (datetime64[D]) of rows start_row up to end_row."""
+        if end_row is None:
+            end_row = self.length()
+        return np.busday_offset(
+            self.start, np.arange(start_row, max(end_row, start_row))
+        )
+
+    @property
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            entry.name
+            for entry in os.scandir(self.root)
+            if entry.is_dir() and self.rows_stored(entry.name)
+        )
+
+    def rows_stored(self, symbol: str) -> int:
+        """
+        Rows every field of `symbol` has. Fields can only disagree if a write
+        was interrupted; the shortest wins and the rest is overwritten later.
+        Anything that is not a ticker symbol has no rows.
+        """
+        if not _TICKER.fullmatch(symbol):
+            return 0
+        sizes = []
+        for field in BAR_FIELDS:
+            try:
+                sizes.append(os.path.getsize(self._path(symbol, field)))
+            except FileNotFoundError:
+                return 0
+        return min(sizes) // _ROW_BYTES
+
+    def length(self, symbols: Optional[Iterable[str]] = None) -> int:
+        """Rows of the longest of `symbols`, by default of every symbol."""
+        if symbols is None:
+            symbols = self.symbols
+        return max((self.rows_stored(symbol) for symbol in symbols), default=0)
+
+    def last_date(self, symbol: str) -> Optional[np.datetime64]:
+        """Date of the last stored row, which is always a bar."""
+        rows = self.rows_stored(symbol)
+        return self.dates(rows - 1, rows)[0] if rows else None
+
+    def column(self, symbol: str, field: str = "close") -> np.ndarray:
+        """Every stored row of one field, memory-mapped."""
+        key = (symbol, field)
+        column = self._maps.get(key)
+        if column is None:
+            rows = self.rows_stored(symbol)
+            if rows:
+                column = np.memmap(
+                    self._path(symbol, field), dtype=np.float64, mode="r", shape=(rows,)
+                )
+            else:
+                column = np.empty(0)
+            self._maps[key] = column
+        return column
+
+    def read(
+        self,
+        symbols: Iterable[str],
+        field: str = "close",
+        start: DateLike = None,
+        end: DateLike = None,
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Dates from `start` to `end` (inclusive) and each symbol's rows in that
+        range, as views of the memory maps. A symbol whose history stops
+        before `end` has a shorter array.
+        """
+        symbols = list(symbols)
+        start_row = 0 if start is None else max(self.row(start), 0)
+        end_row = (
+            self.length(symbols)
+            if end is None
+            else self.row(_day(end) + np.timedelta64(1, "D"))
+        )
+        columns = {
+            symbol: self.column(symbol, field)[start_row:end_row] for symbol in symbols
+        }
+        return self.dates(start_row, end_row), columns
+
+    def frame(
+        self,
+        symbols: Iterable[str],
+        field: str = "close",
+        start: DateLike = None,
+        end: DateLike = None,
+    ) -> pd.DataFrame:
+        """`read` as a dates x symbols DataFrame. Copies, padding with NaN."""
+        dates, columns = self.read(symbols, field, start, end)
+        values = np.full((len(dates), len(columns)), np.nan)
+        for i, column in enumerate(columns.values()):
+            values[: len(column), i] = column
+        return pd.DataFrame(
+            values, index=pd.DatetimeIndex(dates), columns=list(columns)
+        )
+
+    def append(self, symbol: str, days: np.ndarray, bars: Dict[str, np.ndarray]) -> int:
+        """
+        Store bars dated after the symbol's last stored row; earlier and
+        weekend bars are ignored. Returns the number of bars stored.
+        """
+        stored = self.rows_stored(symbol)
+        days = np.asarray(days, dtype="datetime64[D]")
+        rows = np.busday_count(self.start, days)
+        keep = (rows >= stored) & np.is_busday(days)
+        if not keep.any():
+            return 0
+        rows = rows[keep] - stored
+        self._create()
+        os.makedirs(os.path.dirname(self._path(symbol, BAR_FIELDS[0])), exist_ok=True)
+        for field in BAR_FIELDS:
+            block = np.full(rows.max() + 1, np.nan)
+            block[rows] = np.asarray(bars[field], dtype=np.float64)[keep]
+            with open(self._path(symbol, field), "ab") as f:
+                f.truncate(stored * _ROW_BYTES)
+                f.write(block.tobytes())
+        for field in BAR_FIELDS:
+            self._maps.pop((symbol, field), None)
+        return int(keep.sum())
+
+    def update(
+        self,
+        client: DailyBarsProviderClient,
+        symbols: Iterable[str],
+        end: DateLike = None,
+    ) -> Dict[str, int]:
+        """
+        Fetch each symbol's bars after its last stored one, through `end`
+        (default yesterday, whose bars are final), and append them. Returns
+        the bars stored per symbol; symbols that fail are reported and left
+        for the next run.
+        """
+        end = _day(end or date.today() - timedelta(days=1))
+        stored = {}
+        for symbol in dict.fromkeys(symbols):
+            if not _TICKER.fullmatch(symbol):
+                print(f"Skipping daily bars for {symbol!r}: not a ticker symbol")
+                continue
+            last = self.last_date(symbol)
+            first = self.start if last is None else last + np.timedelta64(1, "D")
+            if first > end:
+                stored[symbol] = 0
+                continue
+            try:
+                days, bars = client.daily_bars(symbol, first.item(), end.item())
+            except (ProviderError, requests.RequestException) as e:
+                print(f"Failed to load daily bars for {symbol}: {e}")
+                continue
+            stored[symbol] = self.append(symbol, days, bars)
+        return stored
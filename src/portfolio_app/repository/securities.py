@@ -1,8 +1,10 @@
-from datetime import date
+from datetime import date, datetime, timezone
 import os
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from supabase import create_client, Client
+from portfolio_app.portfolio.bulk import allocations_from_records
 from portfolio_app.portfolio.models import (
+    BaseAllocationModel,
     EconomicStatusAllocation,
     FundAssetAllocation,
     GrowthValueAllocation,
@@ -13,8 +15,13 @@ from portfolio_app.portfolio.models import (
     SecurityInfo,
     USInternationalAllocation,
 )
-from portfolio_app.provider.base import AllocationDataClient
+from portfolio_app.provider.base import AllocationDataClient, LastPriceProviderClient
 from portfolio_app.provider.openai import OpenAIClient
+from portfolio_app.provider.polygon import PolygonClient
+
+SECURITY_TABLES = ("securities", "security_fund_info", "security_allocation_info")
+# keep PostgREST `in.(...)` filters comfortably inside URL length limits
+BULK_CHUNK_SIZE = 200
 
 
 class SecurityDataRepository:
@@ -26,6 +33,7 @@ class SecurityDataRepository:
         self,
         allocation_client: Optional[AllocationDataClient] = None,
         supabase_client: Optional[Client] = None,
+        price_client: Optional[LastPriceProviderClient] = None,
     ) -> None:
         if supabase_client:
             self.supabase = supabase_client
@@ -37,11 +45,122 @@ class SecurityDataRepository:
             self.allocation_client = allocation_client
         else:
             self.allocation_client = OpenAIClient()
+        if price_client:
+            self.price_client = price_client
+        else:
+            self.price_client = PolygonClient(os.environ.get("POLYGON_API_KEY"))
+
+    @classmethod
+    def from_env(
+        cls, allocation_client: Optional[AllocationDataClient] = None
+    ) -> Optional["SecurityDataRepository"]:
+        """
+        Build a repository when Supabase credentials are configured.
+        """
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_SERVICE_ROLE_SECRET")
+        if not url or not key:
+            return None
+        return cls(
+            allocation_client=allocation_client,
+            supabase_client=create_client(url, key),
+        )
 
     def get_many_securities(
         self, symbols: Iterable[str]
     ) -> Iterable[SecurityAllocation]:
-        pass
+        """
+        Bulk read stored allocations, one round trip per table per chunk of
+        symbols. Rows are validated as one batch; symbols without stored
+        allocation info, or whose stored rows are invalid, are left out.
+        """
+        return [model for model, _ in self._supabase_get_many(symbols).values()]
+
+    def get_many_security_entries(
+        self, symbols: Iterable[str]
+    ) -> Dict[str, Tuple[SecurityAllocation, Optional[datetime]]]:
+        """
+        Like `get_many_securities`, keyed by symbol and paired with when each
+        allocation was last written.
+        """
+        return {
+            symbol: (model, self._parse_timestamp(modified_at))
+            for symbol, (model, modified_at) in self._supabase_get_many(symbols).items()
+        }
+
+    @staticmethod
+    def _parse_timestamp(value: Any) -> Optional[datetime]:
+        if isinstance(value, datetime) or value is None:
+            return value
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _supabase_select_in(
+        self, table_key: str, symbols: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        rows = {}
+        for start in range(0, len(symbols), BULK_CHUNK_SIZE):
+            response = (
+                self.supabase.table(table_key)
+                .select("*")
+                .in_("symbol", symbols[start : start + BULK_CHUNK_SIZE])
+                .execute()
+            )
+            rows.update({row["symbol"]: row for row in response.data})
+        return rows
+
+    def _supabase_get_many(
+        self, symbols: Iterable[str]
+    ) -> Dict[str, Tuple[SecurityAllocation, date]]:
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        securities, fund_info, allocation_info = (
+            self._supabase_select_in(table_key, symbols)
+            for table_key in SECURITY_TABLES
+        )
+        symbols = [symbol for symbol in securities if symbol in allocation_info]
+        records = [
+            {
+                **allocation_info[symbol],
+                **securities[symbol],
+                "expense_ratio": fund_info.get(symbol, {"expense_ratio": 0.0})[
+                    "expense_ratio"
+                ],
+            }
+            for symbol in symbols
+        ]
+        ret = {}
+        for symbol, model in zip(symbols, allocations_from_records(records)):
+            if model is not None:
+                ret[symbol] = model, allocation_info[symbol].get(
+                    "modified_at", securities[symbol].get("modified_at")
+                )
+        return ret
+
+    def upsert_many_securities(
+        self, security_allocations: Iterable[SecurityAllocation]
+    ) -> int:
+        """
+        Bulk upsert allocations, one round trip per table. `modified_at` is
+        stamped on every row so refreshed data reads as fresh.
+        """
+        modified_at = datetime.now(timezone.utc).isoformat()
+        rows: Dict[str, List[Dict[str, Any]]] = {key: [] for key in SECURITY_TABLES}
+        for security_allocation in security_allocations:
+            for table_key, record in self._model_to_records(
+                security_allocation
+            ).items():
+                rows[table_key].append({**record, "modified_at": modified_at})
+        if not rows["securities"]:
+            return 0
+        for table_key in SECURITY_TABLES:
+            self.supabase.table(table_key).upsert(
+                rows[table_key], on_conflict="symbol"
+            ).execute()
+        return len(rows["securities"])
 
     def _supabase_contains(self, symbol: str) -> bool:
         """
@@ -103,6 +222,15 @@ class SecurityDataRepository:
         )
         return ret, record["modified_at"]
 
+    def _allocation_columns(self, allocation: BaseAllocationModel) -> Dict[str, int]:
+        """
+        Column names mirror `_record_partial`: `<prefix>_<field>`.
+        """
+        return {
+            f"{allocation.prefix()}_{f}": getattr(allocation, f)
+            for f in type(allocation).model_fields
+        }
+
     def _model_to_records(self, model: SecurityAllocation) -> Dict[str, Dict[str, Any]]:
         ret = {
             "securities": {
@@ -117,28 +245,13 @@ class SecurityDataRepository:
             },
             "security_allocation_info": {
                 "symbol": model.symbol,
-                "asset_stocks": model.fund_asset_allocation.stocks,
-                "asset_bonds": model.fund_asset_allocation.bonds,
-                "mc_large_cap": model.market_cap_allocation.large_cap,
-                "mc_mid_cap": model.market_cap_allocation.mid_cap,
-                "mc_small_cap": model.market_cap_allocation.small_cap,
-                "strategy_growth": model.growth_value_allocation.growth,
-                "strategy_value": model.growth_value_allocation.value,
-                "intl_us": model.us_international_allocation.us,
-                "intl_international": model.us_international_allocation.international,
-                "region_north_america": model.region_allocation.north_america,
-                "econ_developed": model.economic_status_allocation.developed,
-                "econ_emerging": model.economic_status_allocation.emerging,
-                "sector_communication_services": model.sector_allocation.communication_services,
-                "sector_consumer_cyclical": model.sector_allocation.consumer_cyclical,
-                "sector_consumer_defensive": model.sector_allocation.consumer_defensive,
-                "sector_energy": model.sector_allocation.energy,
-                "sector_financial_services": model.sector_allocation.financial_services,
-                "sector_healthcare": model.sector_allocation.health_care,
-                "sector_industrials": model.sector_allocation.industrials,
-                "sector_real_estate": model.sector_allocation.real_estate,
-                "sector_technology": model.sector_allocation.information_technology,
-                "sector_utilities": model.sector_allocation.utilities,
+                **self._allocation_columns(model.fund_asset_allocation),
+                **self._allocation_columns(model.market_cap_allocation),
+                **self._allocation_columns(model.growth_value_allocation),
+                **self._allocation_columns(model.us_international_allocation),
+                **self._allocation_columns(model.region_allocation),
+                **self._allocation_columns(model.economic_status_allocation),
+                **self._allocation_columns(model.sector_allocation),
             },
         }
         return ret
@@ -190,16 +303,9 @@ class SecurityDataRepository:
 
     def _supabase_add(self, security_allocation: SecurityAllocation) -> bool:
         """
-        Add a security to Supabase
+        Add a security to Supabase, replacing any stored version
         """
-        records = self._model_to_records(security_allocation)
-        for table_key in records.keys():
-            _, count = (
-                self.supabase.table(table_key).insert(records[table_key]).execute()
-            )
-            if count != 1:
-                raise Exception(f"Failed to insert record into {table_key}")
-        return True
+        return self.upsert_many_securities([security_allocation]) == 1
 
     def get_single_security_by_symbol(self, symbol: str) -> SecurityAllocation:
         data, count = (
@@ -210,9 +316,13 @@ class SecurityDataRepository:
         pass
 
     def get_last_price_by_symbol(self, symbol: str) -> float:
-        pass
+        _, price = self.price_client.last_price(symbol)
+        return price
 
     def get_last_prices_by_symbols(
         self, symbols: Iterable[str]
     ) -> Iterable[Tuple[str, float]]:
-        pass
+        return [
+            (symbol, price)
+            for symbol, (_, price) in self.price_client.last_prices(symbols).items()
+        ]
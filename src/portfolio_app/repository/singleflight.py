@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key onto one in-flight call.
+
+    The first caller for a key becomes the leader and runs the call; anyone
+    asking for the key while it is running waits on the leader's future and
+    gets the same result or exception. In-flight calls are tracked with
+    `concurrent.futures.Future`, so followers can be other threads (blocking
+    on `result()`) or asyncio tasks on any event loop (`asyncio.wrap_future`).
+
+    A sync follower must not wait on a key led from its own thread's running
+    event loop, as that would block the leader.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Return the in-flight future for `key` and whether the caller is its
+        leader. A leader must settle the key with `resolve` or `fail`.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = self._calls[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def resolve(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            future = self._calls.pop(key)
+        future.set_result(result)
+
+    def fail(self, key: Hashable, exception: BaseException) -> None:
+        with self._lock:
+            future = self._calls.pop(key)
+        future.set_exception(exception)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self.fail(key, exc)
+            raise
+        self.resolve(key, result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future, leader = self.claim(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as exc:
+            self.fail(key, exc)
+            raise
+        self.resolve(key, result)
+        return result
@@ -0,0 +1,171 @@
+"""
+Pre-warm the securities tables with allocation data for a list of symbols.
+
+    python src/portfolio_app/warmup.py symbols.txt --batch-size 10 --concurrency 4
+
+The symbols file holds one ticker per line (commas also separate tickers,
+`#` starts a comment). Symbols already stored in Supabase are left alone;
+the rest are looked up through the batched async provider path and
+bulk-upserted into the `securities`, `security_fund_info` and
+`security_allocation_info` tables. Progress is checkpointed to a state file
+after every chunk, so an interrupted run picks up where it stopped and only
+symbols that failed are retried.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Callable, Dict, Iterable, List, Optional
+
+from tqdm import tqdm
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+)
+from portfolio_app.provider.openai import DEFAULT_BATCH_SIZE  # noqa: E402
+from portfolio_app.repository.allocation import (  # noqa: E402
+    DEFAULT_LOOKUP_CONCURRENCY,
+    AllocationCache,
+    AllocationLookupService,
+)
+from portfolio_app.repository.securities import SecurityDataRepository  # noqa: E402
+
+# symbols per checkpoint; each chunk is one bulk read and one bulk upsert
+DEFAULT_CHUNK_SIZE = 100
+
+
+def read_symbols(path: str) -> List[str]:
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            symbols.extend(s.strip().upper() for s in line.split(",") if s.strip())
+    return list(dict.fromkeys(symbols))
+
+
+class WarmupState:
+    """
+    Symbols completed and failed so far, persisted as JSON. Writes go to a
+    temporary file first so a crash never leaves a truncated state file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.done: Dict[str, bool] = {}
+        self.failed: Dict[str, bool] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.done = dict.fromkeys(state.get("done", []), True)
+            self.failed = dict.fromkeys(state.get("failed", []), True)
+
+    def record(self, succeeded: Iterable[str], failed: Iterable[str]) -> None:
+        for symbol in succeeded:
+            self.done[symbol] = True
+            self.failed.pop(symbol, None)
+        for symbol in failed:
+            self.failed[symbol] = True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"done": list(self.done), "failed": list(self.failed)}, f)
+        os.replace(tmp_path, self.path)
+
+
+async def warm_up(
+    symbols: Iterable[str],
+    service: AllocationLookupService,
+    state: WarmupState,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_LOOKUP_CONCURRENCY,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> WarmupState:
+    """
+    Resolve every symbol not yet recorded as done, `chunk_size` symbols at a
+    time, checkpointing `state` after each chunk. `on_progress` receives the
+    number of symbols succeeded and failed in each chunk.
+    """
+    pending = [symbol for symbol in symbols if symbol not in state.done]
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start : start + chunk_size]
+        results = await service.get_many_allocations_async(
+            chunk, max_concurrency=max_concurrency, batch_size=batch_size
+        )
+        succeeded = [symbol for symbol in chunk if symbol in results]
+        failed = [symbol for symbol in chunk if symbol not in results]
+        state.record(succeeded, failed)
+        state.save()
+        if on_progress:
+            on_progress(len(succeeded), len(failed))
+    return state
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("symbols_file", help="file with one symbol per line")
+    parser.add_argument(
+        "--state", help="checkpoint file (default: <symbols_file>.warmup.json)"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore any saved progress"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_LOOKUP_CONCURRENCY)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    repository = SecurityDataRepository.from_env()
+    if repository is None:
+        parser.error("SUPABASE_URL and SUPABASE_SERVICE_ROLE_SECRET must be set")
+    # skip the local disk cache: a symbol cached on this machine may still be
+    # missing from the shared tables. Stored rows count as warm whatever
+    # their age; interactive sessions refresh stale ones.
+    service = AllocationLookupService(
+        cache=AllocationCache(disk_cache=None),
+        repository=repository,
+        allocation_client=repository.allocation_client,
+        max_age=None,
+    )
+
+    symbols = read_symbols(args.symbols_file)
+    state_path = args.state or f"{args.symbols_file}.warmup.json"
+    if args.restart and os.path.exists(state_path):
+        os.remove(state_path)
+    state = WarmupState(state_path)
+
+    already_done = sum(symbol in state.done for symbol in symbols)
+    with tqdm(total=len(symbols), initial=already_done, unit="symbol") as progress:
+
+        def on_progress(succeeded: int, failed: int) -> None:
+            progress.update(succeeded + failed)
+            progress.set_postfix(failed=len(state.failed))
+
+        asyncio.run(
+            warm_up(
+                symbols,
+                service,
+                state,
+                chunk_size=args.chunk_size,
+                batch_size=args.batch_size,
+                max_concurrency=args.concurrency,
+                on_progress=on_progress,
+            )
+        )
+
+    done = sum(symbol in state.done for symbol in symbols)
+    print(f"Warmed {done} of {len(symbols)} symbols")
+    failed = [symbol for symbol in symbols if symbol in state.failed]
+    if failed:
+        print(f"{len(failed)} failed, rerun to retry: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
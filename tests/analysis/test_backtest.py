@@ -0,0 +1,143 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_app.analysis import backtest
+from portfolio_app.portfolio.portfolio import Portfolio
+
+
+def random_prices(days: int, symbols: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.015, (days, symbols))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(returns, axis=0)),
+        index=pd.bdate_range("2020-01-01", periods=days),
+        columns=[f"S{i}" for i in range(symbols)],
+    )
+
+
+def reference_values(prices: np.ndarray, weights: np.ndarray, rows) -> list:
+    """Day by day: hold shares, rebalance to `weights` at the close of `rows`."""
+    shares = weights / prices[0]
+    values = []
+    for day, day_prices in enumerate(prices):
+        value = shares @ day_prices
+        values.append(value)
+        if day in rows:
+            shares = value * weights / day_prices
+    return values
+
+
+def test_buy_and_hold():
+    prices = pd.DataFrame(
+        {"A": [10.0, 20.0, 40.0], "B": [10.0, 10.0, 5.0]},
+        index=pd.to_datetime(["2023-01-02", "2023-07-03", "2024-01-02"]),
+    )
+    result = backtest.backtest({"A": 3, "B": 1}, prices, initial_value=100)
+    assert result.values.tolist() == pytest.approx([100.0, 175.0, 312.5])
+    assert result.rebalance_rows.tolist() == [0]
+    assert result.cagr() == pytest.approx(2.125, rel=1e-2)
+    assert result.max_drawdown() == 0.0
+
+
+@pytest.mark.parametrize(
+    "frequency, threshold",
+    [("monthly", None), ("daily", None), ("never", 0.01), ("weekly", 0.005)],
+)
+def test_rebalanced_values_match_daily_simulation(frequency, threshold):
+    prices = random_prices(300, 8)
+    weights = dict(zip(prices.columns, np.linspace(1, 2, 8)))
+    result = backtest.backtest(weights, prices, frequency, threshold)
+    w = np.linspace(1, 2, 8) / np.linspace(1, 2, 8).sum()
+    assert result.values == pytest.approx(
+        reference_values(prices.to_numpy(), w, set(result.rebalance_rows[1:]))
+    )
+    assert len(result.rebalance_rows) > 1
+
+
+def test_calendar_rebalance_days():
+    dates = pd.bdate_range("2023-12-27", "2024-04-03").to_numpy().astype("M8[D]")
+    months = backtest.period_starts(dates, "monthly")
+    assert [str(dates[row]) for row in months] == [
+        "2024-01-01",
+        "2024-02-01",
+        "2024-03-01",
+        "2024-04-01",
+    ]
+    weeks = backtest.period_starts(dates, "weekly")
+    assert [str(dates[row]) for row in weeks[:4]] == [
+        "2024-01-01",
+        "2024-01-08",
+        "2024-01-15",
+        "2024-01-22",
+    ]
+    assert len(weeks) == 14
+    quarters = backtest.period_starts(dates, "quarterly")
+    assert [str(dates[row]) for row in quarters] == ["2024-01-01", "2024-04-01"]
+    assert not len(backtest.period_starts(dates, "never"))
+
+
+def test_threshold_rebalances_when_drift_crosses():
+    prices = pd.DataFrame(
+        {"A": [10.0, 10.5, 13.0, 13.0, 13.0], "B": [10.0] * 5},
+        index=pd.bdate_range("2024-01-01", periods=5),
+    )
+    result = backtest.backtest({"A": 1, "B": 1}, prices, threshold=0.05)
+    # 10.5 drifts A to 51.2%; 13.0 to 56.5%, then the weights hold still
+    assert result.rebalance_rows.tolist() == [0, 2]
+    assert result.values[-1] == pytest.approx(1.15)
+
+
+def test_drawdown():
+    prices = pd.DataFrame(
+        {"A": [10.0, 12.0, 9.0, 15.0]}, index=pd.bdate_range("2024-01-01", periods=4)
+    )
+    result = backtest.backtest({"A": 1}, prices)
+    assert result.drawdown.tolist() == pytest.approx([0, 0, -0.25, 0])
+    assert result.max_drawdown() == pytest.approx(-0.25)
+
+
+def test_prepare_aligns_history():
+    prices = pd.DataFrame(
+        {
+            "A": [np.nan, 10.0, np.nan, 12.0, 13.0],
+            "B": [np.nan, np.nan, np.nan, 20.0, np.nan],
+            "C": [np.nan] * 5,
+        },
+        index=pd.bdate_range("2024-01-01", periods=5),
+    )
+    dates, matrix, weights, symbols, missing = backtest.prepare(
+        {"A": 1, "B": 3, "C": 1, "D": 1, "E": 0}, prices
+    )
+    # holidays dropped, gaps carried forward, starting once B trades
+    assert [str(day) for day in dates] == ["2024-01-04", "2024-01-05"]
+    assert matrix.tolist() == [[12.0, 20.0], [13.0, 20.0]]
+    assert weights.tolist() == [0.25, 0.75]
+    assert symbols == ["A", "B"]
+    assert missing == ["C", "D"]
+
+
+def test_holdings_weights():
+    portfolio = Portfolio()
+    portfolio.add_securities(
+        ["A", "B", "C"],
+        quantity=[1, 3, 0],
+        last_price=[10.0, 10.0, 10.0],
+        avg_price_paid=[None] * 3,
+        total_value=[10.0, 30.0, 0.0],
+    )
+    assert backtest.holdings_weights(portfolio) == {"A": 0.25, "B": 0.75}
+
+
+def test_sweep_is_fast():
+    prices = random_prices(2520, 500)
+    weights = dict(zip(prices.columns, np.ones(500)))
+    thresholds = [None, *np.linspace(0.002, 0.05, 16)]
+    start = time.perf_counter()
+    results = backtest.sweep(weights, prices, tuple(backtest.FREQUENCIES), thresholds)
+    elapsed = time.perf_counter() - start
+    assert len(results) == len(backtest.FREQUENCIES) * len(thresholds)
+    assert results["rebalances"].max() == 2519
+    assert elapsed < 10
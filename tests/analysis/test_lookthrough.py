@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from portfolio_app.analysis.lookthrough import fund_overlap, look_through
+from portfolio_app.portfolio.portfolio import Portfolio
+from portfolio_app.repository.constituents import ConstituentIndex
+
+INDEX = ConstituentIndex.from_frame(
+    pd.DataFrame(
+        {
+            "fund": ["SPY", "SPY", "SPY", "QQQ", "QQQ", "QQQ", "BND"],
+            "symbol": ["AAPL", "MSFT", "XOM", "AAPL", "MSFT", "NVDA", "UST"],
+            "weight": [10.0, 10.0, 80.0, 30.0, 20.0, 50.0, 100.0],
+        }
+    )
+)
+
+
+def portfolio_of(values) -> Portfolio:
+    portfolio = Portfolio()
+    symbols = list(values)
+    portfolio.add_securities(
+        symbols,
+        quantity=[1] * len(symbols),
+        last_price=[values[s] for s in symbols],
+        avg_price_paid=[None] * len(symbols),
+        total_value=[values[s] for s in symbols],
+    )
+    return portfolio
+
+
+def test_concentration():
+    result = look_through(
+        portfolio_of({"SPY": 1000, "QQQ": 1000, "AAPL": 500, "BND": 400}), INDEX
+    )
+    top = result.concentration_df(top=3)
+    assert top["symbol"].tolist() == ["AAPL", "XOM", "NVDA"]
+    assert top["value"].tolist() == [900.0, 800.0, 500.0]
+    assert top["percent"].tolist() == [31.03, 27.59, 17.24]
+    assert top["holdings"].tolist() == [3, 1, 1]
+    assert result.stock_values.sum() == pytest.approx(2900)
+    weights = np.array([900, 800, 500, 400, 300]) / 2900
+    assert result.effective_names() == pytest.approx(1 / np.square(weights).sum())
+
+
+def test_overlap():
+    result = look_through(portfolio_of({"SPY": 1, "QQQ": 1, "BND": 1}), INDEX)
+    overlap = result.overlap_df()
+    assert overlap.loc["SPY", "QQQ"] == overlap.loc["QQQ", "SPY"] == 20.0
+    assert overlap.loc["SPY", "BND"] == 0.0
+    assert np.diag(overlap).tolist() == [100.0, 100.0, 100.0]
+
+
+def test_overlap_scales_to_thousands_of_names():
+    rng = np.random.default_rng(0)
+    funds, universe, names = 50, 8000, 3700
+    rows = np.repeat(np.arange(funds), names)
+    columns = np.concatenate(
+        [rng.choice(universe, names, replace=False) for _ in range(funds)]
+    )
+    weights = sparse.csr_matrix(
+        (rng.random(funds * names), (rows, columns)), shape=(funds, universe)
+    )
+    weights = sparse.diags(1 / np.asarray(weights.sum(axis=1)).ravel()) @ weights
+    start = time.perf_counter()
+    overlap = fund_overlap(weights)
+    elapsed = time.perf_counter() - start
+    dense = weights.toarray()
+    assert overlap[3, 7] == pytest.approx(np.minimum(dense[3], dense[7]).sum())
+    assert overlap.diagonal() == pytest.approx(np.ones(funds))
+    assert elapsed < 5
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from portfolio_app.analysis.projection import (
+    ASSET_CLASSES,
+    PERCENTILES,
+    asset_class_weights,
+    lognormal_parameters,
+    percentile_bands,
+    project,
+    simulate,
+)
+from portfolio_app.portfolio.portfolio import Portfolio
+from portfolio_app.provider.openai import MockOpenAIClient
+
+WEIGHTS = [0.6, 0.3, 0.05, 0.05]
+
+
+def test_projection_is_reproducible():
+    first = project(WEIGHTS, 100_000, 40, 65, paths=10_000, seed=7)
+    again = project(list(WEIGHTS), 100_000, 40, 65, paths=10_000, seed=7)
+    other = project(WEIGHTS, 100_000, 40, 65, paths=10_000, seed=8)
+    np.testing.assert_array_equal(first.bands, again.bands)
+    assert not np.array_equal(first.bands, other.bands)
+    assert first.bands.shape == (len(PERCENTILES), 26)
+    assert list(first.df().index) == list(range(40, 66))
+    assert (np.diff(first.bands[:, -1]) > 0).all()
+
+
+def test_process_pool_matches_serial():
+    serial = simulate(WEIGHTS, 1_000, 5, paths=60_000, seed=3)
+    pooled = simulate(WEIGHTS, 1_000, 5, paths=60_000, seed=3, processes=2)
+    np.testing.assert_array_equal(serial, pooled)
+
+
+def test_simulated_growth_matches_assumptions():
+    values = simulate(WEIGHTS, 1.0, 1, paths=200_000, seed=1)
+    log_mean, log_std = lognormal_parameters(np.array(WEIGHTS))
+    log_growth = np.log(values[1])
+    assert log_growth.mean() == pytest.approx(log_mean, abs=1e-3)
+    assert log_growth.std() == pytest.approx(log_std, rel=1e-2)
+
+
+def test_contributions_are_added_every_year():
+    cash_only = [0.0, 0.0, 0.0, 1.0]
+    without = simulate(cash_only, 1_000, 3, paths=5, seed=2)
+    with_contributions = simulate(
+        cash_only, 1_000, 3, paths=5, seed=2, annual_contribution=100
+    )
+    growth = without[1:] / without[:-1]
+    expected = [np.full(5, 1_000.0)]
+    for year_growth in growth:
+        expected.append(expected[-1] * year_growth + 100)
+    np.testing.assert_allclose(with_contributions, np.array(expected))
+
+
+def test_percentile_bands_match_numpy():
+    values = np.random.default_rng(0).random((4, 1001))
+    np.testing.assert_allclose(
+        percentile_bands(values), np.percentile(values, PERCENTILES, axis=1)
+    )
+
+
+def test_retired_projection_is_current_value():
+    projection = project(WEIGHTS, 5_000, 70, 65, paths=100, seed=1)
+    assert projection.at_retirement() == {p: 5_000 for p in PERCENTILES}
+
+
+def test_asset_class_weights_count_unallocated_value_as_cash():
+    portfolio = Portfolio()
+    portfolio.add_securities(
+        ["SPY", "BND"], [10, 10], [100.0, 100.0], [None] * 2, [1000.0, 1000.0]
+    )
+    portfolio.set_cash(2000)
+    portfolio.set_security_allocation_data(
+        {"SPY": MockOpenAIClient().lookup_allocation("SPY")}
+    )
+    weights = asset_class_weights(portfolio, portfolio.total_value())
+    assert weights.sum() == pytest.approx(1)
+    stocks = portfolio.exposure().totals_for(["asset_stocks_pct"])[0]
+    assert weights[ASSET_CLASSES.index("Stocks")] == pytest.approx(stocks / 4000)
+    assert weights[ASSET_CLASSES.index("Cash")] >= 0.75
@@ -0,0 +1,138 @@
+import time
+import warnings
+
+import numpy as np
+import pytest
+
+from portfolio_app.analysis.rebalance import rebalance
+from portfolio_app.portfolio.exposure import ALLOCATION_DIMENSIONS
+from portfolio_app.portfolio.models import (
+    FundAssetAllocation,
+    RegionAllocation,
+    SecurityAllocation,
+    SecurityInfo,
+)
+from portfolio_app.portfolio.portfolio import Portfolio
+
+
+def allocation(symbol: str, **dimensions) -> SecurityAllocation:
+    """Allocation with the given dimensions; the rest 100% in the first key."""
+    values = {}
+    for attr, model in ALLOCATION_DIMENSIONS:
+        fields = list(model.model_fields)
+        values[attr] = dimensions.get(attr) or model(
+            **{field: 100 if field == fields[0] else 0 for field in fields}
+        )
+    return SecurityAllocation(
+        symbol=symbol,
+        security_info=SecurityInfo(symbol=symbol, security_name=symbol),
+        **values,
+    )
+
+
+def portfolio_of(values, allocations, cash=0.0) -> Portfolio:
+    portfolio = Portfolio()
+    symbols = list(values)
+    portfolio.add_securities(
+        symbols,
+        quantity=[values[s] / 10 for s in symbols],
+        last_price=[10.0] * len(symbols),
+        avg_price_paid=[None] * len(symbols),
+        total_value=[values[s] for s in symbols],
+    )
+    portfolio.set_cash(cash)
+    portfolio.set_security_allocation_data(allocations)
+    return portfolio
+
+
+STOCKS = allocation("STK", fund_asset_allocation=FundAssetAllocation(stocks=100))
+BONDS = allocation("BND", fund_asset_allocation=FundAssetAllocation(bonds=100))
+
+
+def test_rebalance_reaches_reachable_target():
+    portfolio = portfolio_of(
+        {"STK": 9_000, "BND": 1_000}, {"STK": STOCKS, "BND": BONDS}, cash=1_000
+    )
+    plan = rebalance(portfolio, [FundAssetAllocation(stocks=60, bonds=40)])
+    np.testing.assert_allclose(plan.target_values, [6_600, 4_400])
+    np.testing.assert_allclose(plan.target_exposure[:2], [60, 40])
+    assert plan.tracking_error() == pytest.approx(0)
+    trades = plan.trades_df().set_index("symbol")
+    assert trades.loc["STK", "action"] == "Sell"
+    assert trades.loc["STK", "quantity"] == pytest.approx(240)
+    assert trades.loc["BND", "action"] == "Buy"
+
+
+def test_rebalance_on_target_holds():
+    portfolio = portfolio_of(
+        {"STK": 6_000, "BND": 4_000}, {"STK": STOCKS, "BND": BONDS}
+    )
+    plan = rebalance(portfolio, [FundAssetAllocation(stocks=60, bonds=40)])
+    assert set(plan.trades_df()["action"]) == {"Hold"}
+    assert plan.turnover() == pytest.approx(0)
+
+
+def test_turnover_penalty_limits_trades():
+    portfolio = portfolio_of(
+        {"STK": 9_000, "BND": 1_000}, {"STK": STOCKS, "BND": BONDS}
+    )
+    target = [FundAssetAllocation(stocks=60, bonds=40)]
+    # moving value closes a stocks gap and a bonds gap of the same size, so
+    # trading pays off only while the penalty is below two
+    assert rebalance(portfolio, target, turnover_penalty=1.9).turnover() > 0
+    assert rebalance(portfolio, target, turnover_penalty=2.1).turnover() == 0
+
+
+def test_rebalance_leaves_untradable_holdings():
+    portfolio = portfolio_of(
+        {"STK": 5_000, "BND": 3_000, "XYZ": 2_000}, {"STK": STOCKS, "BND": BONDS}
+    )
+    plan = rebalance(portfolio, [FundAssetAllocation(stocks=60, bonds=40)])
+    assert plan.symbols == ["STK", "BND"]
+    # XYZ has no allocation data but still counts towards the total
+    np.testing.assert_allclose(plan.current_exposure[:2], [50, 30])
+    assert plan.target_values.sum() == pytest.approx(8_000)
+    assert plan.target_exposure[:2].sum() == pytest.approx(80)
+
+
+def test_rebalance_without_tradable_value():
+    portfolio = portfolio_of({"STK": 0, "XYZ": 2_000}, {"STK": STOCKS})
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        plan = rebalance(portfolio, [FundAssetAllocation(stocks=60, bonds=40)])
+        assert plan.symbols == ["STK"]
+        assert plan.target_values.tolist() == [0.0]
+        assert plan.turnover() == 0.0
+
+
+def test_rebalance_hundreds_of_holdings_several_dimensions():
+    rng = np.random.default_rng(0)
+    allocations = {}
+    for i in range(500):
+        stocks, regions = rng.multinomial(100, [0.5, 0.5]), rng.multinomial(
+            100, [0.4, 0.3, 0.3]
+        )
+        allocations[f"S{i:03d}"] = allocation(
+            f"S{i:03d}",
+            fund_asset_allocation=FundAssetAllocation(
+                stocks=stocks[0], bonds=stocks[1]
+            ),
+            region_allocation=RegionAllocation(
+                north_america=regions[0], emea=regions[1], apac=regions[2]
+            ),
+        )
+    portfolio = portfolio_of(
+        {symbol: 1_000 for symbol in allocations}, allocations, cash=5_000
+    )
+    targets = [
+        FundAssetAllocation(stocks=70, bonds=30),
+        RegionAllocation(north_america=50, emea=25, apac=25),
+    ]
+    start = time.perf_counter()
+    plan = rebalance(portfolio, targets)
+    assert time.perf_counter() - start < 1
+    assert plan.target_values.sum() == pytest.approx(505_000)
+    current_gap = np.abs(plan.current_exposure - plan.targets).mean()
+    assert plan.tracking_error() < 0.8 * current_gap
+    unpenalized = rebalance(portfolio, targets, turnover_penalty=0)
+    assert unpenalized.tracking_error() <= plan.tracking_error()
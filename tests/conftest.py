@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+import pytest
+import streamlit as st
+
+# keep the module level allocation service away from the user's disk cache
+os.environ["ALLOCATION_CACHE_PATH"] = os.path.join(
+    tempfile.mkdtemp(), "allocations.sqlite3"
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_allocation_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("ALLOCATION_CACHE_PATH", str(tmp_path / "allocations.sqlite3"))
+    st.session_state.clear()
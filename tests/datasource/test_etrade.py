@@ -7,16 +7,42 @@ from portfolio_app.portfolio.portfolio import Portfolio
 
 @pytest.fixture
 def etrade():
-    with open('resources/portfolio-etrade-sample.csv', "rb") as fh:
+    with open("resources/portfolio-etrade-sample.csv", "rb") as fh:
         buf = BytesIO(fh.read())
     return ETradeCSVDataSource(buf)
 
+
 def test_get_portfolio_name(etrade):
-    assert etrade.get_portfolio_name() == 'Roth IRA -XXXX'
+    assert etrade.get_portfolio_name() == "Roth IRA -XXXX"
+
 
 def test_get_portfolio(etrade):
     portfolio = etrade.get_portfolio()
     assert isinstance(portfolio, Portfolio)
-    assert portfolio.account_name == 'Roth IRA -XXXX'
+    assert portfolio.account_name == "Roth IRA -XXXX"
+    assert portfolio.cash == 781.05
+    assert len(portfolio.holdings) == 12
+
+
+def test_validate(etrade):
+    assert etrade.validate()
+    assert not ETradeCSVDataSource(BytesIO(b"Symbol,Quantity\n")).validate()
+
+
+def test_get_portfolio_large_export():
+    with open("resources/portfolio-etrade-sample.csv", "rb") as fh:
+        lines = fh.read().split(b"\n")
+    header_index = next(
+        i for i, line in enumerate(lines) if line.startswith(b"Symbol,Last")
+    )
+    positions = [
+        f"SYM{i},10.00,0,0,2,8.00,0,4.00,0,20.00".encode() for i in range(5000)
+    ]
+    # replace the 12 sample positions, keeping the CASH/TOTAL rows and footer
+    data = b"\n".join(
+        lines[: header_index + 1] + positions + lines[header_index + 13 :]
+    )
+    portfolio = ETradeCSVDataSource(BytesIO(data)).get_portfolio()
+    assert len(portfolio.holdings) == 5000
     assert portfolio.cash == 781.05
-    assert len(portfolio.holdings) == 12
\ No newline at end of file
+    assert portfolio.holdings["SYM4999"].total_value == 20.0
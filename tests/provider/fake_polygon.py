@@ -0,0 +1,105 @@
+import json
+import re
+import threading
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse
+
+
+def timestamp_ms(day: date) -> int:
+    return int(
+        datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc).timestamp()
+        * 1000
+    )
+
+
+class FakePolygonServer:
+    """
+    Local HTTP stand-in for the Polygon aggregates endpoints.
+
+    `grouped` maps a date to {symbol: close} for the grouped daily endpoint;
+    `prev` maps a symbol to (date, close) for the per-symbol endpoint and
+    `bars` a symbol to {date: (open, high, low, close, volume)} for the range
+    endpoint.
+    Status codes pushed onto `failures` are returned, in order, instead of
+    the next responses.
+    """
+
+    def __init__(self):
+        self.grouped: Dict[date, Dict[str, float]] = {}
+        self.prev: Dict[str, tuple] = {}
+        self.bars: Dict[str, Dict[date, tuple]] = {}
+        self.requests: List[str] = []
+        self.failures: List[int] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                server.requests.append(path)
+                if server.failures:
+                    self.send_error(server.failures.pop(0))
+                    return
+                body = json.dumps(server.route(path)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def api_root(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v2"
+
+    def route(self, path: str) -> dict:
+        grouped = re.match(r"/v2/aggs/grouped/locale/us/market/stocks/(.+)", path)
+        if grouped:
+            day = date.fromisoformat(grouped.group(1))
+            closes = self.grouped.get(day, {})
+            return {
+                "status": "OK",
+                "resultsCount": len(closes),
+                "results": [
+                    {"T": symbol, "c": close, "t": timestamp_ms(day)}
+                    for symbol, close in closes.items()
+                ],
+            }
+        bars = re.match(r"/v2/aggs/ticker/([^/]+)/range/1/day/([^/]+)/([^/]+)", path)
+        if bars:
+            start, end = map(date.fromisoformat, bars.group(2, 3))
+            days = sorted(
+                day for day in self.bars.get(bars.group(1), {}) if start <= day <= end
+            )
+            return {
+                "status": "OK",
+                "resultsCount": len(days),
+                "results": [
+                    {
+                        **dict(zip("ohlcv", self.bars[bars.group(1)][day])),
+                        "t": timestamp_ms(day),
+                    }
+                    for day in days
+                ],
+            }
+        prev = re.match(r"/v2/aggs/ticker/([^/]+)/prev", path)
+        if prev and prev.group(1) in self.prev:
+            day, close = self.prev[prev.group(1)]
+            return {"status": "OK", "results": [{"c": close, "t": timestamp_ms(day)}]}
+        return {"status": "ERROR", "results": []}
+
+    def __enter__(self) -> "FakePolygonServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+from portfolio_app.provider.execution import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderExecutor,
+    TokenBucket,
+    TransientProviderError,
+)
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # the first 5 are a burst, the next 10 are paced at 50 per second
+    assert time.monotonic() - start >= 0.18
+
+
+def test_token_bucket_async():
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    async def main():
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(6)))
+
+    start = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - start >= 0.045
+
+
+def test_circuit_breaker_half_open():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()
+    # only one trial call while half open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.before_call()
+
+
+def test_executor_retries_transient_errors_only():
+    executor = ProviderExecutor("test", backoff=0.001, max_backoff=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TransientProviderError("503")
+        return "ok"
+
+    assert executor.call(flaky) == "ok"
+    assert len(attempts) == 3
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad symbol")
+
+    with pytest.raises(ValueError):
+        executor.call(broken)
+    assert len(attempts) == 4
+    assert executor.breaker.failures == 0
+
+
+def test_executor_releases_half_open_trial_on_other_errors():
+    executor = ProviderExecutor(
+        "test",
+        max_attempts=1,
+        failure_threshold=1,
+        reset_timeout=0.01,
+    )
+
+    def fail(exc: BaseException):
+        raise exc
+
+    for trial_error in (ValueError("unknown symbol"), KeyboardInterrupt()):
+        with pytest.raises(TransientProviderError):
+            executor.call(fail, TransientProviderError("503"))
+        time.sleep(0.02)
+        with pytest.raises(type(trial_error)):
+            executor.call(fail, trial_error)
+        assert executor.call(lambda: "ok") == "ok"
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    with pytest.raises(TransientProviderError):
+        executor.call(fail, TransientProviderError("503"))
+    time.sleep(0.02)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(executor.call_async(cancelled))
+    assert executor.call(lambda: "ok") == "ok"
+
+
+def test_executor_async_gives_up_after_max_attempts():
+    executor = ProviderExecutor("test", max_attempts=2, backoff=0.001)
+    attempts = []
+
+    async def down():
+        attempts.append(1)
+        raise TransientProviderError("429")
+
+    with pytest.raises(TransientProviderError):
+        asyncio.run(executor.call_async(down))
+    assert len(attempts) == 2
@@ -0,0 +1,105 @@
+import json
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from portfolio_app.provider.execution import ProviderExecutor
+from portfolio_app.provider.openai import MockOpenAIClient, OpenAIClient
+
+
+def completion(items):
+    arguments = json.dumps({"allocations": items})
+    return SimpleNamespace(
+        choices=[{"message": {"function_call": {"arguments": arguments}}}]
+    )
+
+
+def allocation_payload(symbol):
+    return MockOpenAIClient().lookup_allocation(symbol).model_dump()
+
+
+@pytest.fixture
+def requests_sent(monkeypatch):
+    """
+    Fake completions answer every requested symbol, except that the first
+    answer for BAD does not sum to 100.
+    """
+    sent = []
+
+    def create(**kwargs):
+        content = kwargs["messages"][0]["content"]
+        symbols = content.split("symbols: ")[1].split(". ")[0].split(", ")
+        sent.append(symbols)
+        items = [allocation_payload(symbol) for symbol in symbols]
+        for item in items:
+            if item["symbol"] == "BAD" and len(sent) == 1:
+                item["fund_asset_allocation"]["stocks"] = 10
+        return completion(items)
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", create)
+    return sent
+
+
+def test_lookup_allocations_batches(requests_sent):
+    symbols = ["SPY", "VTI", "QQQ", "VEA", "VWO"]
+    results = OpenAIClient().lookup_allocations(symbols, batch_size=2)
+    assert requests_sent == [["SPY", "VTI"], ["QQQ", "VEA"], ["VWO"]]
+    assert list(results) == symbols
+    assert results["QQQ"].symbol == "QQQ"
+
+
+def test_lookup_allocations_retries_only_failures(requests_sent):
+    results = OpenAIClient().lookup_allocations(["SPY", "BAD", "VTI"], batch_size=3)
+    assert requests_sent == [["SPY", "BAD", "VTI"], ["BAD"]]
+    assert set(results) == {"SPY", "BAD", "VTI"}
+
+
+def test_lookup_allocations_schema_is_a_list_of_allocations():
+    args = OpenAIClient()._lookup_allocations_args(["SPY"])
+    parameters = args["functions"][0]["parameters"]
+    assert parameters["properties"]["allocations"]["type"] == "array"
+    assert "SecurityInfo" in parameters["$defs"]
+
+
+def test_lookup_allocations_survives_rate_limits(requests_sent, monkeypatch):
+    create = openai.ChatCompletion.create
+    calls = []
+
+    def flaky_create(**kwargs):
+        calls.append(1)
+        if len(calls) <= 2:
+            raise openai.error.RateLimitError("slow down")
+        return create(**kwargs)
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", flaky_create)
+    executor = ProviderExecutor(
+        "openai-test",
+        backoff=0.01,
+        max_backoff=0.01,
+        retry_on=(openai.error.RateLimitError,),
+    )
+    results = OpenAIClient(executor=executor).lookup_allocations(["SPY", "VTI"])
+    assert set(results) == {"SPY", "VTI"}
+    assert len(calls) == 3
+
+
+def test_lookup_functions_are_built_once():
+    client = OpenAIClient()
+    first = client._lookup_allocation_args("SPY")
+    second = client._lookup_allocation_args("VTI")
+    assert first["functions"] is second["functions"]
+    assert "VTI" in second["messages"][0]["content"]
+
+
+def test_slim_schema_drops_annotations_only():
+    full = OpenAIClient()._lookup_allocation_args("SPY")["functions"][0]
+    slim = OpenAIClient(slim_schema=True)._lookup_allocation_args("SPY")
+    parameters = slim["functions"][0]["parameters"]
+    serialized = json.dumps(parameters)
+    assert '"title"' not in serialized and '"description"' not in serialized
+    assert parameters["properties"].keys() == full["parameters"]["properties"].keys()
+    assert parameters["$defs"]["SectorAllocation"]["properties"].keys() == (
+        full["parameters"]["$defs"]["SectorAllocation"]["properties"].keys()
+    )
+    assert len(serialized) < len(json.dumps(full["parameters"]))
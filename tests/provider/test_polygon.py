@@ -0,0 +1,105 @@
+from datetime import date
+
+import pytest
+
+from portfolio_app.portfolio.portfolio import Portfolio, SecurityHolding
+from portfolio_app.provider.execution import CircuitOpenError, ProviderExecutor
+from portfolio_app.provider.polygon import POLYGON_EXECUTOR, PolygonClient
+from tests.provider.fake_polygon import FakePolygonServer
+
+TRADING_DAY = PolygonClient._previous_trading_day(date.today())
+EARLIER_DAY = PolygonClient._previous_trading_day(TRADING_DAY)
+
+
+@pytest.fixture
+def polygon():
+    with FakePolygonServer() as server:
+        yield server
+
+
+@pytest.fixture
+def executor():
+    return ProviderExecutor(
+        "polygon-test",
+        backoff=0.01,
+        max_backoff=0.01,
+        failure_threshold=3,
+        retry_on=POLYGON_EXECUTOR.retry_on,
+    )
+
+
+@pytest.fixture
+def client(polygon, executor):
+    return PolygonClient("test-key", api_root=polygon.api_root, executor=executor)
+
+
+def test_last_prices_uses_one_grouped_request(polygon, client):
+    polygon.grouped[TRADING_DAY] = {f"SYM{i}": float(i) for i in range(500)}
+    prices = client.last_prices(["SYM1", "SYM2", "SYM499"])
+    assert prices == {
+        "SYM1": (TRADING_DAY, 1.0),
+        "SYM2": (TRADING_DAY, 2.0),
+        "SYM499": (TRADING_DAY, 499.0),
+    }
+    assert len(polygon.requests) == 1
+
+    # the rest of the market is cached for the same session
+    assert client.last_prices(["SYM3"]) == {"SYM3": (TRADING_DAY, 3.0)}
+    assert client.last_price("SYM4") == (TRADING_DAY, 4.0)
+    assert len(polygon.requests) == 1
+
+
+def test_last_prices_steps_back_over_holidays(polygon, client):
+    polygon.grouped[EARLIER_DAY] = {"SPY": 420.0}
+    assert client.last_prices(["SPY"]) == {"SPY": (EARLIER_DAY, 420.0)}
+    assert len(polygon.requests) == 2
+
+
+def test_last_prices_falls_back_for_uncovered_symbols(polygon, client):
+    polygon.grouped[TRADING_DAY] = {"SPY": 420.0}
+    polygon.prev["VTSAX"] = (TRADING_DAY, 110.0)
+    prices = client.last_prices(["SPY", "VTSAX"])
+    assert prices["VTSAX"] == (TRADING_DAY, 110.0)
+    assert len(polygon.requests) == 2
+    client.last_prices(["SPY", "VTSAX"])
+    assert len(polygon.requests) == 2
+
+
+def test_last_price_failure(client):
+    with pytest.raises(Exception):
+        client.last_price("MISSING")
+
+
+def test_portfolio_reprice(polygon, client):
+    polygon.grouped[TRADING_DAY] = {"SPY": 400.0, "VTI": 200.0}
+    portfolio = Portfolio()
+    portfolio.add_security(SecurityHolding.build("SPY", None, None, 2, 300.0, 250.0))
+    portfolio.add_security(SecurityHolding.build("VTI", None, None, 3, 150.0, 100.0))
+    portfolio.reprice(client)
+    assert portfolio.total_value() == 1400.0
+    assert len(polygon.requests) == 1
+
+
+def test_last_price_retries_transient_errors(polygon, client):
+    polygon.prev["SPY"] = (TRADING_DAY, 420.0)
+    polygon.failures = [429, 503]
+    assert client.last_price("SPY") == (TRADING_DAY, 420.0)
+    assert len(polygon.requests) == 3
+
+
+def test_last_prices_skips_failing_symbols(polygon, client):
+    polygon.grouped[TRADING_DAY] = {"SPY": 420.0}
+    polygon.prev["VTSAX"] = (TRADING_DAY, 110.0)
+    prices = client.last_prices(["SPY", "MISSING", "VTSAX"])
+    assert prices == {"SPY": (TRADING_DAY, 420.0), "VTSAX": (TRADING_DAY, 110.0)}
+
+
+def test_circuit_opens_after_repeated_failures(polygon, client, executor):
+    polygon.failures = [500] * 4
+    with pytest.raises(Exception):
+        client.last_price("SPY")
+    assert executor.breaker.is_open
+    requests_sent = len(polygon.requests)
+    with pytest.raises(CircuitOpenError):
+        client.last_price("SPY")
+    assert len(polygon.requests) == requests_sent
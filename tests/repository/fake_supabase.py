@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+
+class FakeResponse:
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.data = data
+        self.count = len(data)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.rows = None
+
+    def select(self, *columns):
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in set(values))
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def upsert(self, rows, on_conflict=""):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def insert(self, rows):
+        return self.upsert(rows)
+
+    def execute(self) -> FakeResponse:
+        self.client.round_trips += 1
+        table = self.client.tables.setdefault(self.table, {})
+        if self.rows is not None:
+            for row in self.rows:
+                table[row["symbol"]] = {
+                    **row,
+                    "modified_at": self.client.now,
+                }
+            return FakeResponse(self.rows)
+        return FakeResponse(
+            [row for row in table.values() if all(f(row) for f in self.filters)]
+        )
+
+
+class FakeSupabaseClient:
+    """
+    In-memory stand-in for the PostgREST query builder used by the repository.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.round_trips = 0
+        # stamped on upserted rows, like the tables' modified_at trigger
+        self.now = datetime.now(timezone.utc).isoformat()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
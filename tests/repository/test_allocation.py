@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from portfolio_app.portfolio import portfolio as portfolio_module
+from portfolio_app.portfolio.portfolio import Portfolio, SecurityHolding
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.repository.allocation import AllocationLookupService
+
+
+class SlowMockClient(MockOpenAIClient):
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def lookup_allocation_async(self, symbol: str):
+        self.calls.append(symbol)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return self.lookup_allocation(symbol)
+
+
+SYMBOLS = [f"SYM{i}" for i in range(20)]
+
+
+def test_get_many_allocations_async_runs_concurrently():
+    client = SlowMockClient(delay=0.1)
+    service = AllocationLookupService(allocation_client=client, max_concurrency=20)
+    seen = []
+
+    start = time.perf_counter()
+    results = asyncio.run(
+        service.get_many_allocations_async(
+            SYMBOLS, on_result=lambda symbol, _: seen.append(symbol)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert set(results) == set(SYMBOLS)
+    assert sorted(seen) == sorted(SYMBOLS)
+
+
+def test_get_many_allocations_async_respects_concurrency_limit():
+    client = SlowMockClient(delay=0.01)
+    service = AllocationLookupService(allocation_client=client)
+    asyncio.run(service.get_many_allocations_async(SYMBOLS, max_concurrency=3))
+    assert client.max_in_flight == 3
+
+
+def test_get_many_allocations_async_uses_cache():
+    client = SlowMockClient(delay=0)
+    service = AllocationLookupService(allocation_client=client)
+    asyncio.run(service.get_many_allocations_async(SYMBOLS[:5]))
+    asyncio.run(service.get_many_allocations_async(SYMBOLS[:10]))
+    assert sorted(client.calls) == sorted(SYMBOLS[:10])
+
+
+def test_portfolio_fetch_security_data(monkeypatch):
+    service = AllocationLookupService(allocation_client=SlowMockClient(delay=0.05))
+    monkeypatch.setattr(portfolio_module, "allocation_service", service)
+    portfolio = Portfolio()
+    for symbol in SYMBOLS:
+        portfolio.add_security(SecurityHolding.build(symbol, None, None, 1, 10.0, 5.0))
+
+    portfolio._complete_portfolio_data(max_concurrency=10)
+
+    assert set(portfolio.security_allocation_data) == set(SYMBOLS)
+    assert portfolio.holdings["SYM0"].name == "Mock Security: SYM0"
+
+
+def test_portfolio_fetch_security_data_reports_progress(monkeypatch):
+    service = AllocationLookupService(allocation_client=SlowMockClient(delay=0.01))
+    monkeypatch.setattr(portfolio_module, "allocation_service", service)
+    portfolio = Portfolio()
+    for symbol in SYMBOLS:
+        portfolio.add_security(SecurityHolding.build(symbol, None, None, 1, 10.0, 5.0))
+    assert list(portfolio.holdings_df()["symbol"]) == SYMBOLS
+
+    partial_totals = []
+
+    def on_result(symbol, allocation):
+        exposure = portfolio.current_exposure()
+        partial_totals.append(exposure.get_fund_asset_df()["Total Value"].sum())
+
+    portfolio.fetch_security_data(max_concurrency=5, on_result=on_result)
+
+    assert len(partial_totals) == len(SYMBOLS)
+    assert partial_totals == sorted(partial_totals)
+    assert partial_totals[0] == 10.0
+    assert partial_totals[-1] == 200.0
+    assert service.openai_client.calls.count("SYM0") == 1
+
+
+def test_get_many_allocations_async_deduplicates_symbols():
+    client = SlowMockClient(delay=0)
+    service = AllocationLookupService(allocation_client=client)
+    asyncio.run(service.get_many_allocations_async(["VTI", "VTI", "SPY"]))
+    assert sorted(client.calls) == ["SPY", "VTI"]
+
+
+def test_get_many_allocations_async_batches_provider_requests():
+    batches = []
+
+    class BatchingMockClient(MockOpenAIClient):
+        async def lookup_allocations_async(self, symbols):
+            batches.append(list(symbols))
+            return await super().lookup_allocations_async(symbols)
+
+    service = AllocationLookupService(allocation_client=BatchingMockClient())
+    results = asyncio.run(service.get_many_allocations_async(SYMBOLS, batch_size=8))
+    assert set(results) == set(SYMBOLS)
+    assert sorted(len(batch) for batch in batches) == [4, 8, 8]
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.repository.allocation import AllocationCache
+from portfolio_app.repository.cache import DiskAllocationCache
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    return DiskAllocationCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+
+
+def allocation(symbol):
+    return MockOpenAIClient().lookup_allocation(symbol)
+
+
+def test_disk_cache_round_trip(disk_cache):
+    disk_cache.set("SPY", allocation("SPY"))
+    assert disk_cache.get("SPY") == allocation("SPY")
+    assert disk_cache.get("VTI") is None
+    assert disk_cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1}
+
+
+def test_disk_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    DiskAllocationCache(path=path).set("QQQ", allocation("QQQ"))
+    assert DiskAllocationCache(path=path).get("QQQ") == allocation("QQQ")
+
+
+def test_disk_cache_ttl(disk_cache):
+    disk_cache.set(
+        "SPY", allocation("SPY"), modified_at=datetime.now() - timedelta(days=90)
+    )
+    assert disk_cache.get("SPY") is None
+    assert len(disk_cache) == 0
+
+
+def test_disk_cache_lru_eviction(disk_cache):
+    disk_cache.set("SPY", allocation("SPY"))
+    disk_cache.set("VTI", allocation("VTI"))
+    disk_cache.get("SPY")
+    disk_cache.set("QQQ", allocation("QQQ"))
+    assert disk_cache.get("VTI") is None
+    assert disk_cache.get("SPY") is not None
+    assert disk_cache.get("QQQ") is not None
+    assert disk_cache.evictions == 1
+
+
+def test_disk_cache_checks_size_every_interval(tmp_path):
+    disk_cache = DiskAllocationCache(path=str(tmp_path / "c.sqlite3"), max_entries=300)
+    statements = []
+    disk_cache._conn.set_trace_callback(statements.append)
+    for i in range(305):
+        disk_cache.set(f"SYM{i}", allocation("SPY"))
+    counts = [s for s in statements if s.startswith("SELECT COUNT(*)")]
+    # one size check per 3 writes, evicting the overflow at the check
+    assert len(counts) == 101
+    assert disk_cache.evictions == 3
+    assert len(disk_cache) == 302
+
+
+def test_allocation_cache_promotes_disk_hits(disk_cache):
+    disk_cache.set("SPY", allocation("SPY"))
+    cache = AllocationCache(disk_cache=disk_cache)
+    assert cache.get("SPY") == allocation("SPY")
+    assert cache.get("SPY") == allocation("SPY")
+    assert cache.get("VTI") is None
+    assert cache.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 1}
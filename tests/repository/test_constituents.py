@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_app.repository.constituents import CACHE_SUFFIX, ConstituentIndex
+
+HOLDINGS = pd.DataFrame(
+    {
+        "fund": ["SPY", "SPY", "SPY", "QQQ", "QQQ", "QQQ"],
+        "symbol": ["AAPL", "MSFT", "XOM", "AAPL", "MSFT", "NVDA"],
+        "weight": [7.0, 6.5, 86.5, 9.0, 8.0, 83.0],
+    }
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "constituents.csv")
+    HOLDINGS.to_csv(path, index=False)
+    return path
+
+
+def test_from_frame():
+    index = ConstituentIndex.from_frame(HOLDINGS)
+    assert index.funds == ["QQQ", "SPY"]
+    assert index.stocks == ["AAPL", "MSFT", "NVDA", "XOM"]
+    assert index.weights.nnz == 6
+    assert index.constituents("SPY").to_dict() == {
+        "XOM": 0.865,
+        "AAPL": 0.07,
+        "MSFT": 0.065,
+    }
+
+
+def test_load_caches_until_csv_changes(csv_path):
+    index = ConstituentIndex.load(csv_path)
+    cache_path = csv_path + CACHE_SUFFIX
+    assert os.path.exists(cache_path)
+    cached = ConstituentIndex.load(csv_path)
+    assert cached.funds == index.funds and cached.stocks == index.stocks
+    assert (cached.weights != index.weights).nnz == 0
+
+    extra = pd.DataFrame({"fund": ["VTI"], "symbol": ["AAPL"], "weight": [100.0]})
+    pd.concat([HOLDINGS, extra]).to_csv(csv_path, index=False)
+    os.utime(csv_path, (os.path.getmtime(cache_path) + 1,) * 2)
+    assert "VTI" in ConstituentIndex.load(csv_path)
+
+
+def test_exposure_matrix_keeps_holding_order():
+    index = ConstituentIndex.from_frame(HOLDINGS)
+    exposures, stocks = index.exposure_matrix(["TSLA", "SPY", "MSFT", "QQQ"])
+    assert stocks == ["AAPL", "MSFT", "NVDA", "XOM", "TSLA"]
+    np.testing.assert_allclose(
+        exposures.toarray(),
+        [
+            [0, 0, 0, 0, 1],
+            [0.07, 0.065, 0, 0.865, 0],
+            [0, 1, 0, 0, 0],
+            [0.09, 0.08, 0.83, 0, 0],
+        ],
+    )
@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from portfolio_app.provider.base import BAR_FIELDS
+from portfolio_app.provider.execution import ProviderExecutor
+from portfolio_app.provider.polygon import POLYGON_EXECUTOR, PolygonClient
+from portfolio_app.repository.prices import PriceStore
+from tests.provider.fake_polygon import FakePolygonServer
+
+START = date(2024, 1, 1)  # a Monday
+
+
+def weekdays(start: date, count: int):
+    return [
+        day
+        for day in (start + timedelta(days=i) for i in range(count * 2))
+        if day.weekday() < 5
+    ][:count]
+
+
+def bar(close: float) -> tuple:
+    return close - 1, close + 1, close - 2, close, 1000.0
+
+
+@pytest.fixture
+def polygon():
+    with FakePolygonServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(polygon):
+    executor = ProviderExecutor(
+        "polygon-test",
+        backoff=0.01,
+        max_backoff=0.01,
+        retry_on=POLYGON_EXECUTOR.retry_on,
+    )
+    return PolygonClient("test-key", api_root=polygon.api_root, executor=executor)
+
+
+def test_daily_bars(polygon, client):
+    days = weekdays(START, 3)
+    polygon.bars["SPY"] = {day: bar(400.0 + i) for i, day in enumerate(days)}
+    sessions, bars = client.daily_bars("SPY", START, days[-1])
+    assert sessions.tolist() == days
+    assert bars["close"].tolist() == [400.0, 401.0, 402.0]
+    assert bars["open"].tolist() == [399.0, 400.0, 401.0]
+    assert bars["volume"].tolist() == [1000.0] * 3
+
+
+def test_update_appends_only_missing_days(polygon, client, tmp_path):
+    days = weekdays(START, 10)
+    polygon.bars["SPY"] = {day: bar(100.0 + i) for i, day in enumerate(days)}
+    # VTI lists on the third day and skips a holiday
+    polygon.bars["VTI"] = {day: bar(50.0) for day in days[2:6] if day != days[4]}
+    store = PriceStore(str(tmp_path), start=START)
+
+    assert store.update(client, ["SPY", "VTI"], end=days[5]) == {"SPY": 6, "VTI": 3}
+    assert store.symbols == ["SPY", "VTI"]
+    assert store.column("SPY").tolist() == [100.0 + i for i in range(6)]
+    vti = store.column("VTI")
+    assert np.isnan(vti[[0, 1, 4]]).all()
+    assert vti[[2, 3, 5]].tolist() == [50.0] * 3
+
+    polygon.requests.clear()
+    assert store.update(client, ["SPY", "VTI"], end=days[-1]) == {"SPY": 4, "VTI": 0}
+    assert polygon.requests == [
+        f"/v2/aggs/ticker/SPY/range/1/day/{days[6]}/{days[-1]}",
+        f"/v2/aggs/ticker/VTI/range/1/day/{days[6]}/{days[-1]}",
+    ]
+    assert store.column("SPY").tolist() == [100.0 + i for i in range(10)]
+    assert store.last_date("SPY") == np.datetime64(days[-1])
+
+    # the layout survives reopening
+    reopened = PriceStore(str(tmp_path))
+    assert reopened.start == np.datetime64(START)
+    assert reopened.column("SPY", "high").tolist() == [101.0 + i for i in range(10)]
+
+
+def test_update_skips_failed_symbols(polygon, client, tmp_path):
+    polygon.bars["SPY"] = {START: bar(100.0)}
+    store = PriceStore(str(tmp_path), start=START)
+    polygon.failures.extend([400])
+    assert store.update(client, ["BAD", "SPY"], end=START) == {"SPY": 1}
+    assert store.symbols == ["SPY"]
+
+
+def test_read_is_zero_copy(tmp_path):
+    store = PriceStore(str(tmp_path), start=START)
+    days = np.array(weekdays(START, 20), dtype="datetime64[D]")
+    for symbol, offset in (("AAA", 0.0), ("BBB", 10.0)):
+        store.append(
+            symbol, days, {field: np.arange(20) + offset for field in BAR_FIELDS}
+        )
+
+    dates, columns = store.read(["AAA", "BBB"], start=days[5], end=days[9])
+    assert dates.tolist() == days[5:10].tolist()
+    assert columns["BBB"].tolist() == [15.0, 16.0, 17.0, 18.0, 19.0]
+    for symbol, column in columns.items():
+        assert np.shares_memory(column, store.column(symbol))
+        assert not column.flags.writeable
+
+    # weekend bounds snap to the enclosing weekdays
+    dates, _ = store.read(["AAA"], start="2024-01-06", end="2024-01-14")
+    assert dates.tolist() == days[5:10].tolist()
+
+    frame = store.frame(["AAA", "MISSING"], start=days[18])
+    assert frame["AAA"].tolist() == [18.0, 19.0]
+    assert frame["MISSING"].isna().all()
+
+
+def test_store_is_created_by_the_first_append(tmp_path, monkeypatch):
+    root = tmp_path / "prices"
+    monkeypatch.setenv("PRICE_STORE_PATH", str(root))
+    assert PriceStore.from_env() is None
+    store = PriceStore(str(root), start=START)
+    assert store.symbols == []
+    assert store.frame(["SPY"])["SPY"].empty
+    assert not root.exists()
+
+    days = np.array(weekdays(START, 2), dtype="datetime64[D]")
+    store.append("SPY", days, {field: np.ones(2) for field in BAR_FIELDS})
+    opened = PriceStore.from_env()
+    assert opened.start == np.datetime64(START)
+    assert opened.symbols == ["SPY"]
+
+
+def test_symbols_must_be_tickers(tmp_path):
+    store = PriceStore(str(tmp_path / "prices"), start=START)
+    days = np.array([START], dtype="datetime64[D]")
+    bars = {field: np.ones(1) for field in BAR_FIELDS}
+    for symbol in ("..", "../SPY", "", "SPY 2"):
+        with pytest.raises(ValueError):
+            store.append(symbol, days, bars)
+        assert store.rows_stored(symbol) == 0
+    store.append("BRK/B", days, bars)
+    assert store.column("BRK/B").tolist() == [1.0]
+    assert not (tmp_path / "SPY").exists()
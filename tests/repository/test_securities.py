@@ -0,0 +1,198 @@
+import asyncio
+import threading
+from collections.abc import MutableMapping
+
+import pytest
+import streamlit as st
+
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.repository import allocation as allocation_module
+from portfolio_app.repository.allocation import AllocationCache, AllocationLookupService
+from portfolio_app.repository.securities import SecurityDataRepository
+from tests.repository.fake_supabase import FakeSupabaseClient
+
+SYMBOLS = [f"SYM{i}" for i in range(50)]
+
+
+@pytest.fixture
+def supabase():
+    return FakeSupabaseClient()
+
+
+@pytest.fixture
+def repository(supabase):
+    return SecurityDataRepository(
+        allocation_client=MockOpenAIClient(), supabase_client=supabase
+    )
+
+
+def test_upsert_many_securities(repository, supabase):
+    allocations = [MockOpenAIClient().lookup_allocation(s) for s in SYMBOLS]
+    assert repository.upsert_many_securities(allocations) == len(SYMBOLS)
+    assert supabase.round_trips == 3
+    assert set(supabase.tables["security_allocation_info"]) == set(SYMBOLS)
+
+
+def test_get_many_securities_round_trip(repository, supabase):
+    allocations = [MockOpenAIClient().lookup_allocation(s) for s in SYMBOLS]
+    repository.upsert_many_securities(allocations)
+    supabase.round_trips = 0
+
+    stored = list(repository.get_many_securities(SYMBOLS + ["MISSING"]))
+
+    assert supabase.round_trips == 3
+    assert sorted(stored, key=lambda a: a.symbol) == sorted(
+        allocations, key=lambda a: a.symbol
+    )
+
+
+def test_lookup_service_reads_and_writes_repository(repository, supabase):
+    repository.upsert_many_securities(
+        [MockOpenAIClient().lookup_allocation(s) for s in SYMBOLS[:10]]
+    )
+    supabase.round_trips = 0
+    service = AllocationLookupService(
+        allocation_client=MockOpenAIClient(), repository=repository
+    )
+
+    results = asyncio.run(service.get_many_allocations_async(SYMBOLS))
+
+    assert set(results) == set(SYMBOLS)
+    # one bulk read and one bulk upsert, three tables each
+    assert supabase.round_trips == 6
+    assert set(supabase.tables["securities"]) == set(SYMBOLS)
+
+
+class CountingMockClient(MockOpenAIClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def lookup_allocation(self, symbol):
+        self.calls.append(symbol)
+        return super().lookup_allocation(symbol)
+
+
+def test_stale_allocations_are_served_then_refreshed(repository, supabase):
+    supabase.now = "2023-10-24T14:00:28.345543+00:00"
+    repository.upsert_many_securities([MockOpenAIClient().lookup_allocation("SPY")])
+    supabase.now = "2030-01-01T00:00:00+00:00"
+    client = CountingMockClient()
+    service = AllocationLookupService(
+        allocation_client=client,
+        repository=repository,
+        cache=AllocationCache(disk_cache=None),
+    )
+
+    results = asyncio.run(service.get_many_allocations_async(["SPY"]))
+    assert results["SPY"].symbol == "SPY"
+    service.wait_for_refreshes(timeout=5)
+
+    assert client.calls == ["SPY"]
+    assert supabase.tables["security_allocation_info"]["SPY"]["modified_at"] == (
+        "2030-01-01T00:00:00+00:00"
+    )
+    # the refreshed entry is fresh, so later hits do not refresh again
+    assert service.cache.age("SPY") < 60
+    service.get_allocations_by_symbol("SPY")
+    service.wait_for_refreshes(timeout=5)
+    assert client.calls == ["SPY"]
+
+
+def test_fresh_allocations_are_not_refreshed(repository):
+    repository.upsert_many_securities([MockOpenAIClient().lookup_allocation("SPY")])
+    client = CountingMockClient()
+    service = AllocationLookupService(
+        allocation_client=client,
+        repository=repository,
+        cache=AllocationCache(disk_cache=None),
+    )
+    asyncio.run(service.get_many_allocations_async(["SPY"]))
+    service.get_allocations_by_symbol("SPY")
+    service.wait_for_refreshes(timeout=5)
+    assert client.calls == []
+
+
+class ScriptSessionState(MutableMapping):
+    """
+    Session state as Streamlit serves it: the script thread has a
+    ScriptRunContext and sees the session, any other thread has no context
+    and a fresh empty state on every access.
+    """
+
+    def __init__(self):
+        self.session = {}
+        self.script_thread = threading.current_thread()
+
+    def context(self, suppress_warning: bool = False):
+        return object() if threading.current_thread() is self.script_thread else None
+
+    def _state(self):
+        if threading.current_thread() is self.script_thread:
+            return self.session
+        return {}
+
+    def __getitem__(self, key):
+        return self._state()[key]
+
+    def __setitem__(self, key, value):
+        self._state()[key] = value
+
+    def __delitem__(self, key):
+        del self._state()[key]
+
+    def __iter__(self):
+        return iter(self._state())
+
+    def __len__(self):
+        return len(self._state())
+
+
+def start_session(monkeypatch) -> ScriptSessionState:
+    session = ScriptSessionState()
+    monkeypatch.setattr(st, "session_state", session)
+    monkeypatch.setattr(allocation_module, "get_script_run_ctx", session.context)
+    return session
+
+
+def test_stale_session_entries_are_refreshed(repository, supabase, monkeypatch):
+    session = start_session(monkeypatch)
+    supabase.now = "2023-10-24T14:00:28.345543+00:00"
+    repository.upsert_many_securities([MockOpenAIClient().lookup_allocation("SPY")])
+    supabase.now = "2030-01-01T00:00:00+00:00"
+    # the first run serves the stale entry and leaves it in the session
+    first_run = AllocationLookupService(
+        allocation_client=CountingMockClient(),
+        repository=repository,
+        cache=AllocationCache(disk_cache=None),
+        max_age=None,
+    )
+    asyncio.run(first_run.get_many_allocations_async(["SPY"]))
+    assert "SPY" in session.session["allocation_cache"]
+
+    # a cache that only has the session entry keeps its age and refreshes it
+    client = CountingMockClient()
+    service = AllocationLookupService(
+        allocation_client=client,
+        repository=repository,
+        cache=AllocationCache(disk_cache=None),
+    )
+    service.get_allocations_by_symbol("SPY")
+    service.wait_for_refreshes(timeout=5)
+    assert client.calls == ["SPY"]
+    # the refresh ran on a pool thread, outside the session, and is served
+    # from the in-process tier
+    assert service.cache.age("SPY") < 60
+    service.get_allocations_by_symbol("SPY")
+    service.wait_for_refreshes(timeout=5)
+    assert client.calls == ["SPY"]
+
+
+def test_sessions_keep_their_own_entries(monkeypatch):
+    cache = AllocationCache(disk_cache=None)
+    first = start_session(monkeypatch)
+    cache.set("SPY", MockOpenAIClient().lookup_allocation("SPY"))
+    second = start_session(monkeypatch)
+    cache.set("VTI", MockOpenAIClient().lookup_allocation("VTI"))
+    assert list(first.session["allocation_cache"]) == ["SPY"]
+    assert list(second.session["allocation_cache"]) == ["VTI"]
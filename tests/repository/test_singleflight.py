@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from portfolio_app.portfolio.util import run_coroutine
+from portfolio_app.provider.execution import ProviderError
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.repository.allocation import AllocationCache, AllocationLookupService
+from portfolio_app.repository.singleflight import SingleFlight
+
+from .test_allocation import SlowMockClient
+
+
+def wait_until(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_single_flight_coalesces_threads():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "VTI"
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = pool.map(lambda _: flight.do("VTI", fetch), range(10))
+        # the leader holds the key until every other thread has joined it
+        wait_until(lambda: flight.followers == 9)
+        release.set()
+        results = list(results)
+
+    assert results == ["VTI"] * 10
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_coalesces_tasks_and_shares_errors():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    async def main():
+        return await asyncio.gather(
+            *(flight.do_async("VTI", fail) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    # the key is released after failing, so the next call retries
+    with pytest.raises(ValueError):
+        asyncio.run(flight.do_async("VTI", fail))
+    assert len(calls) == 2
+
+
+def test_concurrent_sessions_share_provider_calls():
+    client = SlowMockClient(delay=0.05)
+    service = AllocationLookupService(
+        allocation_client=client, cache=AllocationCache(disk_cache=None)
+    )
+    symbols = ["VTI", "SPY", "BND"]
+
+    def session(batch_size):
+        return run_coroutine(
+            service.get_many_allocations_async(symbols, batch_size=batch_size)
+        )
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(session, [1, 3] * 5))
+
+    assert all(set(result) == set(symbols) for result in results)
+    assert sorted(client.calls) == sorted(symbols)
+
+
+def test_symbols_missing_from_a_batch_fail_their_followers():
+    release = threading.Event()
+
+    class OmittingClient(MockOpenAIClient):
+        async def lookup_allocations_async(self, symbols):
+            await asyncio.to_thread(release.wait, 5)
+            return {s: self.lookup_allocation(s) for s in symbols if s != "GONE"}
+
+    service = AllocationLookupService(
+        allocation_client=OmittingClient(), cache=AllocationCache(disk_cache=None)
+    )
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        batch = pool.submit(
+            run_coroutine,
+            service.get_many_allocations_async(["SPY", "GONE"], batch_size=2),
+        )
+        wait_until(lambda: service._in_flight.in_flight() == 2)
+        follower = pool.submit(service.get_allocations_by_symbol, "GONE")
+        wait_until(lambda: service._in_flight.followers == 1)
+        release.set()
+
+        assert set(batch.result()) == {"SPY"}
+        with pytest.raises(ProviderError):
+            follower.result()
+    assert service._in_flight.in_flight() == 0
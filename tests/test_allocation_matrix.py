@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+
+from portfolio_app.portfolio.allocation_matrix import AllocationMatrix
+from portfolio_app.portfolio.exposure import ALLOCATION_COLUMNS, ExposureEngine
+from portfolio_app.portfolio.models import FundAssetAllocation
+from portfolio_app.provider.openai import MockOpenAIClient
+
+
+def allocations(symbols):
+    return {s: MockOpenAIClient().lookup_allocation(s) for s in symbols}
+
+
+def test_allocation_matrix_mapping():
+    data = allocations(["SPY", "VTI", "BND"])
+    matrix = AllocationMatrix(capacity=1)
+    matrix.update(data)
+    assert list(matrix) == ["SPY", "VTI", "BND"]
+    assert matrix["VTI"] is data["VTI"]
+    assert matrix.matrix.dtype == np.uint8
+    assert matrix.matrix.shape == (3, len(ALLOCATION_COLUMNS))
+
+    del matrix["SPY"]
+    assert list(matrix) == ["BND", "VTI"]
+    assert list(matrix.rows(["VTI", "SPY", "BND"])) == [1, -1, 0]
+    assert matrix["BND"] is data["BND"]
+
+
+def test_allocation_matrix_df_matches_models():
+    data = allocations(["SPY", "VTI"])
+    matrix = AllocationMatrix()
+    matrix.update(data)
+    expected = pd.DataFrame(allocation.to_dict() for allocation in data.values())
+    pd.testing.assert_frame_equal(matrix.df(), expected, check_dtype=False)
+
+
+def test_allocation_matrix_exposure_matches_engine():
+    data = allocations(["SPY", "VTI"])
+    matrix = AllocationMatrix()
+    matrix.update(data)
+    symbols = ["SPY", "CASHX", "VTI"]
+    values = np.array([1000.0, 50.0, np.nan])
+    exposure = matrix.exposure(symbols, values)
+    expected = ExposureEngine.build(zip(symbols, values.tolist()), data)
+    np.testing.assert_allclose(exposure.totals, expected.totals)
+    assert exposure.expense_total == expected.expense_total
+
+
+def test_allocation_percentages_fit_the_matrix():
+    # a leveraged or short mix would not fit the uint8 rows, so it is rejected
+    with pytest.raises(ValidationError):
+        FundAssetAllocation(stocks=110, cash=-10)
+    matrix = AllocationMatrix()
+    matrix["SPY"] = MockOpenAIClient().lookup_allocation("SPY")
+    assert matrix.matrix.min() >= 0 and matrix.matrix.max() <= 100
@@ -0,0 +1,76 @@
+from portfolio_app.portfolio.bulk import (
+    _construct,
+    allocations_from_payloads,
+    allocations_from_records,
+)
+from portfolio_app.portfolio.exposure import ALLOCATION_DIMENSIONS
+from portfolio_app.portfolio.models import SecurityAllocation
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.repository.securities import SecurityDataRepository
+from tests.repository.fake_supabase import FakeSupabaseClient
+
+
+def payloads(symbols):
+    return [MockOpenAIClient().lookup_allocation(s).model_dump() for s in symbols]
+
+
+def test_allocations_from_payloads_matches_model_validate():
+    items = payloads(["SPY", "VTI"])
+    del items[1]["sector_allocation"]["health_care"]
+    items[1]["sector_allocation"]["information_technology"] = 100
+    allocations = allocations_from_payloads(items)
+    assert allocations == [SecurityAllocation.model_validate(i) for i in items]
+    assert allocations[1].sector_allocation.health_care == 0
+
+
+def test_allocations_from_payloads_drops_invalid_items():
+    items = payloads(["SPY", "BADSUM", "BADTYPE", "LEVERED", "VTI"])
+    items[1]["market_cap_allocation"]["large_cap"] = 90
+    items[2]["fund_asset_allocation"]["stocks"] = "lots"
+    # sums to 100, but the percentages must each be 0..100
+    items[3]["fund_asset_allocation"] = {"stocks": 110, "cash": -10}
+    allocations = allocations_from_payloads(items)
+    assert [a and a.symbol for a in allocations] == [
+        "SPY",
+        None,
+        None,
+        None,
+        "VTI",
+    ]
+    assert allocations_from_payloads([]) == []
+
+
+def test_allocations_from_records_round_trip():
+    repository = SecurityDataRepository(
+        allocation_client=MockOpenAIClient(), supabase_client=FakeSupabaseClient()
+    )
+    expected = [MockOpenAIClient().lookup_allocation(s) for s in ["SPY", "VTI"]]
+    records = []
+    for allocation in expected:
+        tables = repository._model_to_records(allocation)
+        records.append(
+            {
+                **tables["security_allocation_info"],
+                **tables["securities"],
+                "expense_ratio": tables["security_fund_info"]["expense_ratio"],
+            }
+        )
+    records[1]["econ_developed"] = 10
+    assert allocations_from_records(records) == [expected[0], None]
+
+
+def test_construct_matches_model_construct():
+    allocation = MockOpenAIClient().lookup_allocation("SPY")
+    instances = [allocation, allocation.security_info] + [
+        getattr(allocation, attr) for attr, _ in ALLOCATION_DIMENSIONS
+    ]
+    for instance in instances:
+        model = type(instance)
+        values = {field: getattr(instance, field) for field in model.model_fields}
+        constructed = _construct(model, dict(values))
+        expected = model.model_construct(**values)
+        # every piece of pydantic's internal state, not just the fields
+        assert constructed.__getstate__() == expected.__getstate__()
+        assert constructed.model_fields_set == expected.model_fields_set
+        assert constructed.model_dump() == expected.model_dump()
+        assert constructed == expected
@@ -0,0 +1,66 @@
+import numpy as np
+
+from portfolio_app.portfolio.holdings import HoldingsStore, SecurityHolding
+from portfolio_app.portfolio.models import SecurityType
+
+
+def test_holdings_store_views():
+    store = HoldingsStore(capacity=1)
+    store.add(SecurityHolding.build("SPY", "SPDR", SecurityType.ETF, 10, 100, 50))
+    store.add(SecurityHolding.build("VTI", None, SecurityType.ETF, 8, 200, None))
+    assert list(store) == ["SPY", "VTI"]
+    assert len(store) == 2
+
+    vti = store["VTI"]
+    assert vti.avg_price_paid is None
+    assert vti.total_return() is None
+    vti.name = "Vanguard Total Stock Market ETF"
+    vti.quantity = 9
+    assert store.names[1] == "Vanguard Total Stock Market ETF"
+    assert store.column("quantity").tolist() == [10, 9]
+    assert store["SPY"].to_dict() == {
+        "symbol": "SPY",
+        "name": "SPDR",
+        "quantity": 10,
+        "last_price": 100,
+        "avg_price_paid": 50,
+        "total_value": 1000,
+        "total_return": 500,
+    }
+
+
+def test_holdings_store_overwrites_existing_symbol():
+    store = HoldingsStore()
+    store.add(SecurityHolding.build("SPY", None, None, 10, 100, 50))
+    store.add(SecurityHolding.build("SPY", None, None, 20, 100, 50))
+    assert len(store) == 1
+    assert store["SPY"].total_value == 2000
+
+
+def test_holdings_store_reductions():
+    store = HoldingsStore()
+    store.extend(
+        [f"S{i}" for i in range(1000)],
+        quantity=np.full(1000, 2.0),
+        last_price=np.full(1000, 10.0),
+        avg_price_paid=np.full(1000, 5.0),
+        total_value=np.full(1000, 20.0),
+    )
+    assert store.total_value() == 20000
+    assert store.total_return() == 10000
+
+
+def test_holdings_store_df_is_zero_copy():
+    store = HoldingsStore()
+    store.add(SecurityHolding.build("SPY", "SPDR", SecurityType.ETF, 10, 100, 50))
+    df = store.df()
+    assert list(df.columns) == [
+        "symbol",
+        "name",
+        "quantity",
+        "last_price",
+        "avg_price_paid",
+        "total_value",
+        "total_return",
+    ]
+    assert np.shares_memory(df["quantity"].to_numpy(), store.column("quantity"))
@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from portfolio_app.portfolio.household import Household
+from portfolio_app.portfolio.portfolio import Portfolio, SecurityHolding
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.provider.polygon import MockPolygonClient
+from portfolio_app.repository.allocation import AllocationCache, AllocationLookupService
+
+
+class CountingMockClient(MockOpenAIClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def lookup_allocation_async(self, symbol):
+        self.calls.append(symbol)
+        return self.lookup_allocation(symbol)
+
+
+def account(name, holdings):
+    portfolio = Portfolio(account_name=name)
+    for symbol, quantity, last_price in holdings:
+        portfolio.add_security(
+            SecurityHolding.build(symbol, None, None, quantity, last_price, 1.0)
+        )
+    return portfolio
+
+
+@pytest.fixture
+def client():
+    return CountingMockClient()
+
+
+@pytest.fixture
+def household(client):
+    service = AllocationLookupService(
+        allocation_client=client, cache=AllocationCache(disk_cache=None)
+    )
+    household = Household(allocation_service=service)
+    household.add_portfolio(account("Roth", [("SPY", 10, 100.0), ("VTI", 5, 200.0)]))
+    household.add_portfolio(account("Taxable", [("VTI", 2, 200.0), ("QQQ", 4, 50.0)]))
+    return household
+
+
+def test_household_shares_allocation_lookups(household, client):
+    assert sorted(client.calls) == ["QQQ", "SPY", "VTI"]
+    assert household.accounts["Taxable"].holdings["VTI"].name == "Mock Security: VTI"
+
+
+def test_household_totals(household):
+    assert household.total_value() == 2600.0
+    df = household.get_fund_asset_df()
+    assert df["Total Value"]["Stocks"] == 1300.0
+    assert df["Percentage"]["Bonds"] == 50.0
+    assert household.get_total_expense_ratio() == 0.1
+    assert len(household.df()) == 4
+
+
+def test_household_remove_portfolio(household):
+    household.remove_portfolio("Taxable")
+    assert household.total_value() == 2000.0
+    assert household.get_us_international_df()["Total Value"]["US"] == 1000.0
+    # QQQ was only held in Taxable; VTI is still held in Roth
+    assert sorted(household.allocation_df()["symbol"]) == ["SPY", "VTI"]
+
+
+def test_household_reprice(household):
+    household.reprice("Roth", MockPolygonClient())
+    # Roth: 15 shares at 100, Taxable unchanged at 600
+    assert household.total_value() == 2100.0
+    assert household.get_market_cap_df()["Total Value"]["Large Cap"] == 840.0
+
+
+def test_household_empty_expense_ratio():
+    household = Household()
+    assert math.isnan(household.get_total_expense_ratio())
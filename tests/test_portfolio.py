@@ -1,4 +1,8 @@
+import math
+from datetime import date
+
 import pytest
+from portfolio_app.portfolio.cache import portfolio_cache
 from portfolio_app.portfolio.models import (
     EconomicStatusAllocation,
     FundAssetAllocation,
@@ -16,6 +20,8 @@ from portfolio_app.portfolio.portfolio import (
     SecurityHolding,
     SecurityType,
 )
+from portfolio_app.provider.base import LastPriceProviderClient
+from portfolio_app.provider.openai import MockOpenAIClient
 
 
 class TestPortfolio:
@@ -227,6 +233,8 @@ class TestPortfolio:
             portfolio_source="TEST", portfolio_type=PortfolioType.ROTH_IRA
         )
         assert subject.holdings == {}
+        subject._data_complete = True
+        assert math.isnan(subject.get_total_expense_ratio())
 
     def test_portfolio_df_keys(self, portfolio):
         df = portfolio.df()
@@ -296,6 +304,91 @@ class TestPortfolio:
     def test_portfolio_total_return(self, portfolio):
         assert portfolio.total_return() == 1580
 
+    def test_portfolio_us_international_df(self, portfolio):
+        df = portfolio.get_us_international_df()
+        assert list(df.index) == ["US", "International"]
+        assert list(df["Total Value"]) == [3500.0, 250.0]
+        assert list(df["Percentage"]) == [93.33, 6.67]
+
+    def test_portfolio_exposure_invalidated_on_add(self, portfolio):
+        assert portfolio.get_fund_asset_df()["Total Value"]["Stocks"] == 3705.0
+        portfolio.add_security(
+            SecurityHolding.build(
+                symbol="BND",
+                name="Vanguard Total Bond Market ETF",
+                security_type=SecurityType.ETF,
+                quantity=10,
+                last_price=70,
+                avg_price_paid=75,
+            )
+        )
+        portfolio.add_security_allocation_data(
+            MockOpenAIClient().lookup_allocation("BND")
+        )
+        df = portfolio.get_fund_asset_df()
+        assert df["Total Value"]["Stocks"] == 4055.0
+        assert df["Total Value"]["Bonds"] == 350.0
+
+    def test_portfolio_df_memoized_per_content(self, portfolio):
+        assert portfolio.df() is portfolio.df()
+        other = Portfolio(portfolio_source="TEST")
+        other.add_security(
+            SecurityHolding.build("AAPL", "Apple", SecurityType.STOCK, 1, 150, 100)
+        )
+        other._data_complete = True
+        assert list(other.df()["symbol"]) == ["AAPL"]
+        assert other.df() is not portfolio.df()
+
+    def test_portfolio_cached_df_unchanged_by_reprice(self):
+        class FixedPrices(LastPriceProviderClient):
+            def last_price(self, symbol):
+                return date.today(), 100.0
+
+        def build() -> Portfolio:
+            portfolio = Portfolio(portfolio_source="REPRICE")
+            portfolio.add_securities(
+                ["A", "B"],
+                quantity=[1, 1],
+                last_price=[10.0, 20.0],
+                avg_price_paid=[None, None],
+                total_value=[10.0, 20.0],
+            )
+            return portfolio
+
+        repriced = build()
+        df = repriced.holdings_df()
+        repriced.reprice(FixedPrices())
+        assert list(df["last_price"]) == [10.0, 20.0]
+        assert list(repriced.holdings_df()["last_price"]) == [100.0, 100.0]
+        # an identical portfolio still gets a frame with the original prices
+        assert list(build().holdings_df()["last_price"]) == [10.0, 20.0]
+
+    def test_portfolio_partial_exposure_not_cached(self):
+        portfolio = Portfolio(portfolio_source="PARTIAL")
+        portfolio.add_securities(
+            ["SPY", "VTI", "BND"],
+            quantity=[1, 1, 1],
+            last_price=[10.0, 20.0, 30.0],
+            avg_price_paid=[None] * 3,
+            total_value=[10.0, 20.0, 30.0],
+        )
+        client = MockOpenAIClient()
+        entries = len(portfolio_cache)
+        for symbol in ("SPY", "VTI"):
+            portfolio.add_security_allocation_data(client.lookup_allocation(symbol))
+            assert portfolio.current_exposure().weights.sum() > 0
+        assert len(portfolio_cache) == entries
+
+        portfolio.set_security_allocation_data({"BND": client.lookup_allocation("BND")})
+        assert portfolio.current_exposure() is portfolio.current_exposure()
+
+    def test_portfolio_content_hash_invalidation(self, portfolio):
+        content_hash = portfolio.content_hash()
+        assert portfolio.content_hash() == content_hash
+        portfolio.set_cash(0)
+        assert portfolio.content_hash() != content_hash
+        assert portfolio.total_value() == 3750
+
 
 class TestSecurity:
     def test_security(self):
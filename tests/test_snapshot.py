@@ -0,0 +1,110 @@
+import json
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from portfolio_app.datasource.snapshot import PortfolioSnapshotDataSource
+from portfolio_app.portfolio import portfolio as portfolio_module
+from portfolio_app.portfolio.cache import portfolio_cache
+from portfolio_app.portfolio.portfolio import Portfolio, PortfolioType, SecurityType
+from portfolio_app.portfolio.snapshot import (
+    METADATA_KEY,
+    load_portfolio,
+    save_portfolio,
+    snapshot_bytes,
+    snapshot_table,
+)
+from portfolio_app.provider.openai import MockOpenAIClient
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = Portfolio(
+        account_name="TEST ACCOUNT",
+        portfolio_source="TEST",
+        portfolio_type=PortfolioType.ROTH_IRA,
+    )
+    portfolio.add_securities(
+        ["SPY", "VTI", "XYZ"],
+        quantity=[10, 5, 1],
+        last_price=[100.0, 200.0, None],
+        avg_price_paid=[50.0, None, 3.0],
+        total_value=[1000.0, 1000.0, 0.0],
+        names=["SPDR S&P 500 ETF", None, "Unknown"],
+    )
+    portfolio.holdings["SPY"].security_type = SecurityType.ETF
+    portfolio.set_cash(999.99)
+    client = MockOpenAIClient()
+    portfolio.set_security_allocation_data(
+        {symbol: client.lookup_allocation(symbol) for symbol in ("SPY", "VTI")}
+    )
+    # allocation data without a holding is kept too
+    portfolio.add_security_allocation_data(client.lookup_allocation("BND"))
+    return portfolio
+
+
+@pytest.fixture
+def no_lookups(monkeypatch):
+    class FailingService:
+        async def get_many_allocations_async(self, *args, **kwargs):
+            raise AssertionError("snapshot load should not look anything up")
+
+    monkeypatch.setattr(portfolio_module, "allocation_service", FailingService())
+
+
+def test_snapshot_round_trip(portfolio, tmp_path, no_lookups):
+    path = tmp_path / "portfolio.arrow"
+    save_portfolio(portfolio, path)
+    loaded = load_portfolio(path)
+
+    assert loaded.account_name == "TEST ACCOUNT"
+    assert loaded.portfolio_source == "TEST"
+    assert loaded.portfolio_type == PortfolioType.ROTH_IRA
+    assert loaded.cash == 999.99
+    assert loaded.holdings["SPY"].security_type == SecurityType.ETF
+    assert loaded.holdings["XYZ"].last_price is None
+    pd.testing.assert_frame_equal(loaded.df(), portfolio.df())
+    pd.testing.assert_frame_equal(loaded.allocation_df(), portfolio.allocation_df())
+    assert list(loaded.security_allocation_data) == ["SPY", "VTI", "BND"]
+    for symbol in ("SPY", "VTI", "BND"):
+        assert (
+            loaded.security_allocation_data[symbol]
+            == portfolio.security_allocation_data[symbol]
+        )
+    assert loaded.get_total_expense_ratio() == portfolio.get_total_expense_ratio()
+    pd.testing.assert_frame_equal(loaded.get_sector_df(), portfolio.get_sector_df())
+
+
+def test_snapshot_exposure_is_recomputed(portfolio):
+    table = snapshot_table(portfolio)
+    metadata = json.loads(table.schema.metadata[METADATA_KEY])
+    # totals written by earlier versions, here disagreeing with the matrix
+    metadata["exposure"] = {"totals": [1e9] * 3, "expense_total": 1e9}
+    table = table.replace_schema_metadata({METADATA_KEY: json.dumps(metadata).encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    portfolio_cache.clear()
+    loaded = load_portfolio(sink.getvalue().to_pybytes())
+    np.testing.assert_allclose(loaded.exposure().totals, portfolio.exposure().totals)
+    assert loaded.exposure().expense_total == portfolio.exposure().expense_total
+
+
+def test_snapshot_data_source(portfolio):
+    source = PortfolioSnapshotDataSource(BytesIO(snapshot_bytes(portfolio)))
+    assert source.validate()
+    assert source.get_portfolio().total_value() == portfolio.total_value()
+    assert not PortfolioSnapshotDataSource(BytesIO(b"Account Summary\n")).validate()
+
+
+def test_load_rejects_other_arrow_files():
+    sink = pa.BufferOutputStream()
+    table = pa.table({"symbol": ["SPY"]})
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    with pytest.raises(ValueError):
+        load_portfolio(sink.getvalue().to_pybytes())
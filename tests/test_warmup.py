@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from portfolio_app.provider.openai import MockOpenAIClient
+from portfolio_app.repository.allocation import AllocationCache, AllocationLookupService
+from portfolio_app.repository.securities import SecurityDataRepository
+from portfolio_app.warmup import WarmupState, read_symbols, warm_up
+from tests.repository.fake_supabase import FakeSupabaseClient
+
+SYMBOLS = [f"SYM{i}" for i in range(25)]
+
+
+class FlakyMockClient(MockOpenAIClient):
+    def __init__(self, failing=()):
+        super().__init__()
+        self.failing = set(failing)
+        self.calls = []
+
+    async def lookup_allocation_async(self, symbol):
+        self.calls.append(symbol)
+        if symbol in self.failing:
+            raise RuntimeError(f"no data for {symbol}")
+        return self.lookup_allocation(symbol)
+
+
+@pytest.fixture
+def supabase():
+    return FakeSupabaseClient()
+
+
+def service_for(supabase, client):
+    return AllocationLookupService(
+        allocation_client=client,
+        cache=AllocationCache(disk_cache=None),
+        repository=SecurityDataRepository(
+            allocation_client=client, supabase_client=supabase
+        ),
+        max_age=None,
+    )
+
+
+def test_read_symbols(tmp_path):
+    path = tmp_path / "symbols.txt"
+    path.write_text("spy\nVTI, QQQ  # core\n\n# bonds\nBND\nSPY\n")
+    assert read_symbols(str(path)) == ["SPY", "VTI", "QQQ", "BND"]
+
+
+def test_warm_up_upserts_in_chunks(supabase):
+    client = FlakyMockClient()
+    progress = []
+    state = asyncio.run(
+        warm_up(
+            SYMBOLS,
+            service_for(supabase, client),
+            WarmupState(),
+            chunk_size=10,
+            batch_size=5,
+            on_progress=lambda ok, failed: progress.append((ok, failed)),
+        )
+    )
+    assert progress == [(10, 0), (10, 0), (5, 0)]
+    assert list(state.done) == SYMBOLS
+    assert set(supabase.tables["security_allocation_info"]) == set(SYMBOLS)
+    # a bulk read and a bulk upsert of three tables per chunk
+    assert supabase.round_trips == 3 * 6
+
+
+def test_warm_up_resumes_from_state(tmp_path, supabase):
+    state_path = str(tmp_path / "state.json")
+    first = FlakyMockClient(failing={"SYM3", "SYM17"})
+    asyncio.run(warm_up(SYMBOLS, service_for(supabase, first), WarmupState(state_path)))
+    state = WarmupState(state_path)
+    assert set(state.failed) == {"SYM3", "SYM17"}
+    assert len(state.done) == len(SYMBOLS) - 2
+
+    second = FlakyMockClient()
+    state = asyncio.run(warm_up(SYMBOLS, service_for(supabase, second), state))
+    assert sorted(second.calls) == ["SYM17", "SYM3"]
+    assert not state.failed
+    assert set(WarmupState(state_path).done) == set(SYMBOLS)